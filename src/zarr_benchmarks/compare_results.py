@@ -0,0 +1,340 @@
+"""Compare two sets of benchmark results (e.g. before / after upgrading zarr-python or tensorstore), and report the
+benchmarks that became significantly faster or slower.
+
+Benchmarks are matched between the two sets by package and params. Each matched pair is compared with a two-sided
+Mann-Whitney U test on the time of every round, so results must be saved with --benchmark-save-data (benchmarks without
+per-round data are skipped). As many benchmarks are compared at once, p values are adjusted for multiple comparisons
+with the Benjamini-Hochberg procedure (controlling the false discovery rate).
+
+Run with e.g.:
+
+python src/zarr_benchmarks/compare_results.py --baseline data/results/heart/old/0001_tensorstore.json \
+    --contender data/results/heart/new/0001_tensorstore.json
+"""
+
+import argparse
+import math
+import statistics
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from zarr_benchmarks.create_plots import SAVE_NAME_PACKAGES, get_benchmarks_dataframe
+
+# columns that identify a benchmark case in the dataframe from get_benchmarks_dataframe
+CASE_COLUMNS = [
+    "package",
+    "group",
+    "compressor",
+    "compression_level",
+    "chunk_size",
+    "chunk_shape",
+    "blosc_shuffle",
+    "zarr_spec",
+    "dtype",
+    "shard_size",
+    "concurrency",
+    "write_empty_chunks",
+    "roi_size",
+    "roi_alignment",
+    "slice_plane",
+    "slice_thickness",
+    "processes",
+    "in_flight",
+    "preallocated_out",
+]
+
+# columns of the comparison of each case, from compare_results
+COMPARISON_COLUMNS = [
+    "n_baseline",
+    "n_contender",
+    "baseline_median",
+    "contender_median",
+    "ratio",
+    "cliffs_delta",
+    "p_value",
+]
+
+
+def mann_whitney_u_test(
+    baseline: list[float], contender: list[float]
+) -> tuple[float, float]:
+    """Two-sided Mann-Whitney U test of whether baseline and contender values come from the same distribution.
+
+    The p value uses the normal approximation to the distribution of U (with tie and continuity corrections). This is
+    close to the exact test from around 8 values in each sample - with fewer, p values are only approximate.
+
+    Args:
+        baseline (list[float]): values from the baseline e.g. the time of each round.
+        contender (list[float]): values from the contender.
+    Returns:
+        tuple[float, float]: U statistic of the contender (the number of pairs where the contender value is larger, with
+            ties counting as half), and the p value.
+    """
+    n_baseline = len(baseline)
+    n_contender = len(contender)
+    values = sorted(
+        [(value, False) for value in baseline] + [(value, True) for value in contender]
+    )
+
+    # rank all values together, giving tied values the mean of their ranks
+    contender_rank_sum = 0.0
+    tie_correction = 0
+    start = 0
+    while start < len(values):
+        end = start
+        while end < len(values) and values[end][0] == values[start][0]:
+            end += 1
+        n_tied = end - start
+        mean_rank = (start + 1 + end) / 2
+        contender_rank_sum += mean_rank * sum(
+            is_contender for _, is_contender in values[start:end]
+        )
+        tie_correction += n_tied**3 - n_tied
+        start = end
+
+    u_statistic = contender_rank_sum - n_contender * (n_contender + 1) / 2
+
+    n = n_baseline + n_contender
+    variance = 0.0
+    if n > 1:
+        variance = (
+            n_baseline * n_contender / 12 * ((n + 1) - tie_correction / (n * (n - 1)))
+        )
+    if variance <= 0:
+        # all values are tied
+        return u_statistic, 1.0
+
+    deviation = abs(u_statistic - n_baseline * n_contender / 2)
+    z = max(deviation - 0.5, 0) / math.sqrt(variance)
+    p_value = 2 * (1 - statistics.NormalDist().cdf(z))
+
+    return u_statistic, min(p_value, 1.0)
+
+
+def adjust_p_values(p_values: list[float]) -> list[float]:
+    """Benjamini-Hochberg adjusted p values, for comparing many benchmarks at once. Treating adjusted p values below
+    alpha as significant keeps the expected fraction of false discoveries below alpha."""
+    n = len(p_values)
+    order = sorted(range(n), key=lambda index: p_values[index])
+
+    adjusted = [1.0] * n
+    smallest = 1.0
+    for rank in range(n, 0, -1):
+        index = order[rank - 1]
+        smallest = min(smallest, p_values[index] * n / rank)
+        adjusted[index] = smallest
+
+    return adjusted
+
+
+def _get_package(json_path: Path) -> str:
+    """Package name from the --benchmark-save name of a result json e.g. 0001_zarr-python-v2.json"""
+    save_name = json_path.stem.split("_", 1)[-1]
+    return SAVE_NAME_PACKAGES.get(save_name, save_name)
+
+
+def get_results_dataframe(json_paths: list[Path]) -> pd.DataFrame:
+    """Combine a set of pytest-benchmark json results into a single dataframe (see get_benchmarks_dataframe)"""
+    package_paths_dict = {}
+    for json_path in json_paths:
+        package = _get_package(json_path)
+        if package in package_paths_dict:
+            raise ValueError(
+                f"Results for {package} given more than once: {package_paths_dict[package]} and {json_path}"
+            )
+        package_paths_dict[package] = json_path
+
+    return get_benchmarks_dataframe(package_paths_dict)
+
+
+def match_cases(baseline_df: pd.DataFrame, contender_df: pd.DataFrame) -> pd.DataFrame:
+    """Match benchmark cases between two results dataframes (from get_benchmarks_dataframe) by package and params.
+
+    Returns:
+        pd.DataFrame: one row per case in both dataframes, with CASE_COLUMNS and the per-round times of each as
+            'baseline_data' / 'contender_data'.
+    """
+    dfs = []
+    for df, name in [(baseline_df, "baseline"), (contender_df, "contender")]:
+        if df.duplicated(CASE_COLUMNS).any():
+            raise ValueError(
+                f"The {name} results contain more than one benchmark with the same params"
+            )
+        if "stats.data" not in df:
+            raise ValueError(
+                f"The {name} results have no per-round data - run with --benchmark-save-data"
+            )
+        dfs.append(df[CASE_COLUMNS + ["stats.data"]])
+
+    return pd.merge(
+        dfs[0], dfs[1], on=CASE_COLUMNS, suffixes=("_baseline", "_contender")
+    ).rename(
+        columns={
+            "stats.data_baseline": "baseline_data",
+            "stats.data_contender": "contender_data",
+        }
+    )
+
+
+def compare_results(
+    baseline_df: pd.DataFrame,
+    contender_df: pd.DataFrame,
+    alpha: float = 0.05,
+    min_change: float = 0.0,
+) -> pd.DataFrame:
+    """Compare the per-round times of each benchmark case in both results dataframes.
+
+    Args:
+        baseline_df (pd.DataFrame): baseline results, from get_benchmarks_dataframe.
+        contender_df (pd.DataFrame): contender results, from get_benchmarks_dataframe.
+        alpha (float, optional): false discovery rate for significant changes. Defaults to 0.05.
+        min_change (float, optional): minimum relative change in median time for a significant change to be reported
+            e.g. 0.05 ignores changes smaller than 5%. Defaults to 0.0.
+    Returns:
+        pd.DataFrame: one row per compared case, with CASE_COLUMNS, the number of rounds and median time of each,
+            effect sizes ('ratio' of contender / baseline median time, and Cliff's delta - the probability a contender
+            round is slower than a baseline round, minus the probability it is faster), the adjusted 'p_value' and
+            'change' ('regression', 'speedup' or None).
+    """
+    matched_df = match_cases(baseline_df, contender_df)
+
+    # cases without per-round data (not run with --benchmark-save-data) or with a single round can't be tested
+    has_data = matched_df.baseline_data.map(
+        lambda data: isinstance(data, list) and len(data) > 1
+    ) & matched_df.contender_data.map(
+        lambda data: isinstance(data, list) and len(data) > 1
+    )
+    n_skipped = (~has_data).sum()
+    if n_skipped > 0:
+        print(f"Skipping {n_skipped} cases without per-round data in both results")
+    matched_df = matched_df[has_data].reset_index(drop=True)
+
+    rows = []
+    for baseline, contender in zip(matched_df.baseline_data, matched_df.contender_data):
+        u_statistic, p_value = mann_whitney_u_test(baseline, contender)
+        baseline_median = statistics.median(baseline)
+        contender_median = statistics.median(contender)
+        rows.append(
+            {
+                "n_baseline": len(baseline),
+                "n_contender": len(contender),
+                "baseline_median": baseline_median,
+                "contender_median": contender_median,
+                "ratio": contender_median / baseline_median,
+                "cliffs_delta": 2 * u_statistic / (len(baseline) * len(contender)) - 1,
+                "p_value": p_value,
+            }
+        )
+
+    comparison_df = pd.concat(
+        [
+            matched_df[CASE_COLUMNS],
+            pd.DataFrame(rows, columns=COMPARISON_COLUMNS),
+        ],
+        axis=1,
+    )
+    comparison_df["p_value"] = adjust_p_values(list(comparison_df["p_value"]))
+
+    significant = (comparison_df.p_value < alpha) & (
+        (comparison_df.ratio - 1).abs() >= min_change
+    )
+    comparison_df["change"] = None
+    comparison_df.loc[significant & (comparison_df.cliffs_delta > 0), "change"] = (
+        "regression"
+    )
+    comparison_df.loc[significant & (comparison_df.cliffs_delta < 0), "change"] = (
+        "speedup"
+    )
+
+    return comparison_df
+
+
+def _format_changes(comparison_df: pd.DataFrame) -> str:
+    """Table of significant changes, largest regressions first. Params that are the same for every change are left
+    out."""
+    changes_df = comparison_df[~comparison_df.change.isna()].sort_values(
+        "ratio", ascending=False
+    )
+    varying_columns = [
+        col
+        for col in CASE_COLUMNS
+        if changes_df[col].astype(str).nunique() > 1 or col in ["package", "group"]
+    ]
+    return changes_df[varying_columns + COMPARISON_COLUMNS[2:] + ["change"]].to_string(
+        index=False, float_format=lambda value: f"{value:.4g}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare two sets of benchmark results (run with --benchmark-save-data), and report benchmarks "
+        "that are significantly faster / slower in the contender than the baseline. Exits with code 1 if any are "
+        "slower, when --fail-on-regression is given."
+    )
+    parser.add_argument(
+        "--baseline",
+        nargs="+",
+        type=Path,
+        required=True,
+        metavar="JSON",
+        help="pytest-benchmark json results to compare against e.g. one per package",
+    )
+    parser.add_argument(
+        "--contender",
+        nargs="+",
+        type=Path,
+        required=True,
+        metavar="JSON",
+        help="pytest-benchmark json results to compare e.g. from the same packages after an upgrade",
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=0.05,
+        help="False discovery rate for significant changes. Defaults to 0.05.",
+    )
+    parser.add_argument(
+        "--min-change",
+        type=float,
+        default=0.0,
+        help="Only report changes in median time of at least this fraction e.g. 0.05 for 5%%. Defaults to 0.",
+    )
+    parser.add_argument(
+        "--csv",
+        type=Path,
+        default=None,
+        help="Path to save the comparison of every matched benchmark to, as csv",
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with code 1 if any benchmark is significantly slower",
+    )
+    args = parser.parse_args()
+
+    comparison_df = compare_results(
+        get_results_dataframe(args.baseline),
+        get_results_dataframe(args.contender),
+        alpha=args.alpha,
+        min_change=args.min_change,
+    )
+    if args.csv is not None:
+        comparison_df.to_csv(args.csv, index=False)
+        print(f"Saved comparison to {args.csv}")
+
+    n_regressions = (comparison_df.change == "regression").sum()
+    n_speedups = (comparison_df.change == "speedup").sum()
+    print(
+        f"Compared {len(comparison_df)} benchmarks: {n_regressions} regressions, {n_speedups} speedups"
+    )
+    if n_regressions + n_speedups > 0:
+        print(_format_changes(comparison_df))
+
+    if args.fail_on_regression and n_regressions > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
 import argparse
+import math
 from pathlib import Path
 from typing import Literal
 
 import pandas as pd
 
 from zarr_benchmarks import utils
+from zarr_benchmarks.phase_timing import PHASES
 from zarr_benchmarks.plotting_functions import (
     plot_catplot_benchmarks,
     plot_errorbars_benchmarks,
     plot_relplot_benchmarks,
 )
 
+# package names for results saved from each tox env (via --benchmark-save)
+SAVE_NAME_PACKAGES = {
+    "zarr-python-v2": "zarr_python_2",
+    "zarr-python-v3": "zarr_python_3",
+    "tensorstore": "tensorstore",
+    "numcodecs": "numcodecs",
+    "h5py": "h5py",
+}
+
 
 def prepare_benchmarks_dataframe(json_dict: dict) -> pd.DataFrame:
     """Prepare a pandas DataFrame from the pytest-benchmark json results.
@@ -22,8 +33,36 @@ def prepare_benchmarks_dataframe(json_dict: dict) -> pd.DataFrame:
     benchmark_df = pd.json_normalize(json_dict["benchmarks"])
     benchmark_df["machine"] = json_dict["machine_info"]["system"]
 
+    # compressor params are missing from results where no benchmark used that compressor
+    for param in [
+        "params.blosc_clevel",
+        "params.blosc_cname",
+        "params.blosc_shuffle",
+        "params.gzip_level",
+        "params.zstd_level",
+    ]:
+        if param not in benchmark_df:
+            benchmark_df[param] = float("nan")
+
+    # chunk sizes are an int for cubic chunks, or a [z, y, x] list for other chunk shapes. Keep the shape of every chunk
+    # as a 'ZxYxX' string, and only keep chunk_size for cubic chunks (so it can still be used as a numeric axis)
+    chunk_shapes = benchmark_df["params.chunk_size"].map(
+        utils.get_chunk_shape, na_action="ignore"
+    )
+    benchmark_df["chunk_shape"] = chunk_shapes.map(
+        lambda shape: "x".join(str(length) for length in shape), na_action="ignore"
+    )
+    benchmark_df["params.chunk_size"] = pd.to_numeric(
+        chunk_shapes.map(
+            lambda shape: shape[0] if len(set(shape)) == 1 else None,
+            na_action="ignore",
+        )
+    )
+
     # copy compression ratio from read benchmarks to write benchmarks
-    param_cols = [col for col in benchmark_df if col.startswith("params")]
+    param_cols = [col for col in benchmark_df if col.startswith("params")] + [
+        "chunk_shape"
+    ]
     benchmark_df["compression_ratio"] = benchmark_df.groupby(
         param_cols, dropna=False, as_index=False
     )["extra_info.compression_ratio"].transform("max")
@@ -56,26 +95,195 @@ def prepare_benchmarks_dataframe(json_dict: dict) -> pd.DataFrame:
         # related to compression level
         benchmark_df.loc[benchmark_df["compressor"] == "none", "compression_level"] = 19
 
+    # results from before sharding / concurrency / dtypes were benchmarked are all un-sharded, with default concurrency
+    # and the image's own dtype. Results from before backends were parametrized have one backend per json file.
+    for param in [
+        "params.shard_size",
+        "params.concurrency",
+        "params.dtype",
+        "params.backend",
+    ]:
+        if param not in benchmark_df:
+            benchmark_df[param] = None
+
+    # only read / write benchmarks skip empty chunks. All other benchmarks (and results from before write_empty_chunks
+    # was benchmarked) write every chunk.
+    if "params.write_empty_chunks" not in benchmark_df:
+        benchmark_df["params.write_empty_chunks"] = True
+    benchmark_df["params.write_empty_chunks"] = (
+        benchmark_df["params.write_empty_chunks"].fillna(True).astype(bool)
+    )
+
+    # params / extra info only set for ROI, plane, parallel write, async and preallocated read benchmarks
+    for col in [
+        "params.roi_size",
+        "params.roi_alignment",
+        "params.slice_plane",
+        "params.slice_thickness",
+        "params.processes",
+        "params.in_flight",
+        "params.preallocated_out",
+        "extra_info.read_amplification",
+        "extra_info.precision",
+    ]:
+        if col not in benchmark_df:
+            benchmark_df[col] = None
+
+    # effective throughput, for benchmarks that record the bytes read / written per round
+    if "extra_info.nbytes" in benchmark_df:
+        benchmark_df["throughput_mb_s"] = (
+            benchmark_df["extra_info.nbytes"] / benchmark_df["stats.mean"] / 1e6
+        )
+    else:
+        benchmark_df["throughput_mb_s"] = None
+
+    # peak memory of the largest round (the memory a worker needs), in MB and per byte read / written
+    for memory in ["peak_rss", "tracemalloc_peak"]:
+        if (
+            f"extra_info.{memory}" in benchmark_df
+            and "extra_info.nbytes" in benchmark_df
+        ):
+            peak = benchmark_df[f"extra_info.{memory}"].map(
+                lambda values: max(values) if isinstance(values, list) else None
+            )
+            peak = pd.to_numeric(peak)
+            benchmark_df[f"{memory}_mb"] = peak / 1e6
+            benchmark_df[f"{memory}_per_byte"] = (
+                peak / benchmark_df["extra_info.nbytes"]
+            )
+        else:
+            benchmark_df[f"{memory}_mb"] = None
+            benchmark_df[f"{memory}_per_byte"] = None
+
+    # files in the store (only recorded by read / write benchmarks). Filesystems allocate whole blocks to each file, so
+    # the disk space allocated to stores with many small chunks can be much larger than the bytes stored.
+    if "extra_info.allocated_bytes" in benchmark_df:
+        benchmark_df["block_overhead"] = (
+            benchmark_df["extra_info.allocated_bytes"]
+            / benchmark_df["extra_info.nbytes_stored"]
+        )
+        benchmark_df["median_chunk_nbytes"] = pd.to_numeric(
+            benchmark_df["extra_info.chunk_nbytes_quantiles"].map(
+                lambda quantiles: (
+                    quantiles[len(quantiles) // 2]
+                    if isinstance(quantiles, list)
+                    else None
+                )
+            )
+        )
+    else:
+        benchmark_df["block_overhead"] = None
+        benchmark_df["median_chunk_nbytes"] = None
+
+    for col in [
+        "extra_info.nbytes_stored",
+        "extra_info.n_empty_chunks",
+        "extra_info.n_missing_chunks",
+    ]:
+        if col not in benchmark_df:
+            benchmark_df[col] = None
+
+    # CPU time per round (user + system, over all threads), compared to wall time. On a shared cluster, cores are
+    # what we pay for - so also compute the throughput per core-second of CPU time.
+    if "extra_info.cpu_time" in benchmark_df:
+        cpu_time = pd.to_numeric(
+            benchmark_df["extra_info.cpu_time"].map(
+                lambda values: (
+                    sum(values) / len(values) if isinstance(values, list) else None
+                )
+            )
+        )
+        benchmark_df["cpu_time"] = cpu_time
+        benchmark_df["cpu_utilisation"] = cpu_time / benchmark_df["stats.mean"]
+        benchmark_df["throughput_mb_per_core_s"] = (
+            benchmark_df["extra_info.nbytes"] / cpu_time / 1e6
+        )
+    else:
+        benchmark_df["cpu_time"] = None
+        benchmark_df["cpu_utilisation"] = None
+        benchmark_df["throughput_mb_per_core_s"] = None
+
+    # mean time of each phase of a round (only recorded when run with --phase-timing)
+    for phase in PHASES:
+        if "extra_info.phases" in benchmark_df:
+            benchmark_df[f"phase_{phase}"] = pd.to_numeric(
+                benchmark_df["extra_info.phases"].map(
+                    lambda rounds: (
+                        sum(durations[phase] for durations in rounds) / len(rounds)
+                        if isinstance(rounds, list)
+                        else None
+                    )
+                )
+            )
+        else:
+            benchmark_df[f"phase_{phase}"] = None
+
     # remove un-needed columns
     stats_cols = [col for col in benchmark_df if col.startswith("stats")]
     benchmark_df = benchmark_df[
         [
             "machine",
             "group",
+            "params.backend",
             "compressor",
             "compression_level",
             "compression_ratio",
             "params.chunk_size",
+            "chunk_shape",
             "params.blosc_shuffle",
             "params.zarr_spec",
+            "params.dtype",
+            "params.shard_size",
+            "params.concurrency",
+            "params.write_empty_chunks",
+            "params.roi_size",
+            "params.roi_alignment",
+            "params.slice_plane",
+            "params.slice_thickness",
+            "params.processes",
+            "params.in_flight",
+            "params.preallocated_out",
+            "throughput_mb_s",
+            "extra_info.precision",
+            "extra_info.read_amplification",
+            "block_overhead",
+            "median_chunk_nbytes",
+            "extra_info.nbytes_stored",
+            "extra_info.n_empty_chunks",
+            "extra_info.n_missing_chunks",
+            "peak_rss_mb",
+            "peak_rss_per_byte",
+            "tracemalloc_peak_mb",
+            "tracemalloc_peak_per_byte",
+            "cpu_time",
+            "cpu_utilisation",
+            "throughput_mb_per_core_s",
         ]
+        + [f"phase_{phase}" for phase in PHASES]
         + stats_cols
     ]
     benchmark_df = benchmark_df.rename(
         columns={
+            "params.backend": "backend",
             "params.chunk_size": "chunk_size",
             "params.blosc_shuffle": "blosc_shuffle",
             "params.zarr_spec": "zarr_spec",
+            "params.dtype": "dtype",
+            "params.shard_size": "shard_size",
+            "params.concurrency": "concurrency",
+            "params.write_empty_chunks": "write_empty_chunks",
+            "params.roi_size": "roi_size",
+            "params.roi_alignment": "roi_alignment",
+            "params.slice_plane": "slice_plane",
+            "params.slice_thickness": "slice_thickness",
+            "params.processes": "processes",
+            "params.in_flight": "in_flight",
+            "params.preallocated_out": "preallocated_out",
+            "extra_info.precision": "precision",
+            "extra_info.read_amplification": "read_amplification",
+            "extra_info.nbytes_stored": "nbytes_stored",
+            "extra_info.n_empty_chunks": "n_empty_chunks",
+            "extra_info.n_missing_chunks": "n_missing_chunks",
         }
     )
 
@@ -83,12 +291,14 @@ def prepare_benchmarks_dataframe(json_dict: dict) -> pd.DataFrame:
 
 
 def get_benchmarks_dataframe(package_paths_dict: dict) -> pd.DataFrame:
-    """Combine multiple pytest-benchmark json results into a single dataframe"""
+    """Combine multiple pytest-benchmark json results into a single dataframe. Results run with several backends
+    (--backend) are labelled with the backend name as the package, otherwise with the id from package_paths_dict."""
 
     benchmark_dfs = []
     for id, json_path in package_paths_dict.items():
         benchmark_df = prepare_benchmarks_dataframe(utils.read_json_file(json_path))
-        benchmark_df.insert(0, "package", id)
+        package = benchmark_df.pop("backend").fillna(id)
+        benchmark_df.insert(0, "package", package)
         benchmark_dfs.append(benchmark_df)
 
     return pd.concat(benchmark_dfs, ignore_index=True)
@@ -143,6 +353,575 @@ def create_shuffle_plots(
     )
 
 
+def create_shard_size_plots(benchmarks_df: pd.DataFrame, plots_dir: Path) -> None:
+    """Compare sharded vs un-sharded arrays (sharding is only supported for Zarr format v3)."""
+    shard_size_benchmarks = benchmarks_df[
+        (benchmarks_df.compressor == "blosc-zstd")
+        & (benchmarks_df.compression_level == 3)
+        & (benchmarks_df.blosc_shuffle == "shuffle")
+        & (benchmarks_df.zarr_spec == 3)
+        & (~benchmarks_df.chunk_size.isna())
+        & (benchmarks_df.concurrency.isna())
+        & (benchmarks_df.dtype.isna())
+    ].copy()
+    save_dir = plots_dir / "shard_size" / "format_v3"
+
+    # label un-sharded arrays, so they appear as their own category on the x axis
+    shard_sizes = sorted(shard_size_benchmarks.shard_size.dropna().unique())
+    shard_order = ["none"] + [str(int(shard_size)) for shard_size in shard_sizes]
+    shard_size_benchmarks["shard_size"] = pd.Categorical(
+        shard_size_benchmarks.shard_size.map(
+            lambda shard_size: "none" if pd.isna(shard_size) else str(int(shard_size))
+        ),
+        categories=shard_order,
+        ordered=True,
+    )
+
+    for package in shard_size_benchmarks.package.unique():
+        package_benchmarks = shard_size_benchmarks[
+            shard_size_benchmarks.package == package
+        ]
+        write = package_benchmarks[package_benchmarks.group == "write"]
+        read = package_benchmarks[package_benchmarks.group == "read"]
+
+        if (write.shard_size == "none").all() or (read.shard_size == "none").all():
+            print(f"Skipping shard size plots for {package}, as no data for shards")
+            continue
+
+        plot_catplot_benchmarks(
+            data=read,
+            x_axis="shard_size",
+            y_axis="compression_ratio",
+            hue="chunk_size",
+            plots_dir=save_dir,
+            plot_name=f"{package}_compression_ratio",
+            title=f"Shard size vs. compression ratio (Zarr format v3, {package})",
+        )
+
+        plot_catplot_benchmarks(
+            data=write,
+            x_axis="shard_size",
+            y_axis="stats.mean",
+            hue="chunk_size",
+            plots_dir=save_dir,
+            plot_name=f"{package}_write",
+            title=f"Shard size vs. write time (Zarr format v3, {package})",
+        )
+
+        plot_catplot_benchmarks(
+            data=read,
+            x_axis="shard_size",
+            y_axis="stats.mean",
+            hue="chunk_size",
+            plots_dir=save_dir,
+            plot_name=f"{package}_read",
+            title=f"Shard size vs. read time (Zarr format v3, {package})",
+        )
+
+
+def create_roi_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare region of interest (ROI) read time / throughput for different chunk sizes and ROI alignments."""
+    roi_benchmarks = benchmarks_df[
+        (benchmarks_df.group == "read_roi") & (benchmarks_df.zarr_spec == zarr_format)
+    ]
+    save_dir = plots_dir / "roi" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    for package in roi_benchmarks.package.unique():
+        package_benchmarks = roi_benchmarks[roi_benchmarks.package == package]
+
+        plot_catplot_benchmarks(
+            data=package_benchmarks,
+            x_axis="chunk_size",
+            y_axis="stats.mean",
+            hue="roi_alignment",
+            col="roi_size",
+            plots_dir=save_dir,
+            plot_name=f"{package}_read",
+            title=f"Chunk size vs. ROI read time ({spec_str}, {package})",
+        )
+
+        plot_catplot_benchmarks(
+            data=package_benchmarks,
+            x_axis="chunk_size",
+            y_axis="throughput_mb_s",
+            hue="roi_alignment",
+            col="roi_size",
+            plots_dir=save_dir,
+            plot_name=f"{package}_throughput",
+            title=f"Chunk size vs. ROI read throughput ({spec_str}, {package})",
+        )
+
+
+def create_plane_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare read time / read amplification of orthogonal planes for different chunk sizes."""
+    plane_benchmarks = benchmarks_df[
+        (benchmarks_df.group == "read_plane") & (benchmarks_df.zarr_spec == zarr_format)
+    ]
+    save_dir = plots_dir / "plane" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    for package in plane_benchmarks.package.unique():
+        package_benchmarks = plane_benchmarks[plane_benchmarks.package == package]
+
+        plot_catplot_benchmarks(
+            data=package_benchmarks,
+            x_axis="chunk_size",
+            y_axis="stats.mean",
+            hue="slice_plane",
+            col="slice_thickness",
+            plots_dir=save_dir,
+            plot_name=f"{package}_read",
+            title=f"Chunk size vs. plane read time ({spec_str}, {package})",
+        )
+
+        plot_catplot_benchmarks(
+            data=package_benchmarks,
+            x_axis="chunk_size",
+            y_axis="read_amplification",
+            hue="slice_plane",
+            col="slice_thickness",
+            plots_dir=save_dir,
+            plot_name=f"{package}_read_amplification",
+            title=f"Chunk size vs. plane read amplification ({spec_str}, {package})",
+        )
+
+
+def create_concurrency_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare read / write throughput for different numbers of threads (concurrency limits) in each library."""
+    concurrency_benchmarks = benchmarks_df[
+        (~benchmarks_df.concurrency.isna())
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (benchmarks_df.shard_size.isna())
+        & (benchmarks_df.dtype.isna())
+    ]
+    save_dir = plots_dir / "concurrency" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    for group in ["write", "read"]:
+        group_benchmarks = concurrency_benchmarks[concurrency_benchmarks.group == group]
+        if group_benchmarks.empty:
+            print(
+                f"Skipping {group} concurrency plots, as no data for Zarr format v{zarr_format}"
+            )
+            continue
+
+        plot_relplot_benchmarks(
+            group_benchmarks,
+            x_axis="concurrency",
+            y_axis="throughput_mb_s",
+            hue="package",
+            col="compressor",
+            title=f"Concurrency vs. {group} throughput ({spec_str})",
+            plots_dir=save_dir,
+            plot_name=group,
+        )
+
+
+def create_dtype_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare compression ratio and read / write throughput for the image cast to different dtypes, for each
+    compressor and shuffle."""
+    dtype_benchmarks = benchmarks_df[
+        (~benchmarks_df.dtype.isna())
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (benchmarks_df.shard_size.isna())
+        & (benchmarks_df.concurrency.isna())
+    ].copy()
+    save_dir = plots_dir / "dtype" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    # order dtypes by item size, rather than alphabetically
+    dtype_order = sorted(
+        dtype_benchmarks.dtype.unique(), key=lambda dtype: (dtype[0], len(dtype), dtype)
+    )
+    dtype_benchmarks["dtype"] = pd.Categorical(
+        dtype_benchmarks.dtype, categories=dtype_order, ordered=True
+    )
+    dtype_benchmarks["compressor_shuffle"] = dtype_benchmarks.compressor.str.cat(
+        dtype_benchmarks.blosc_shuffle.fillna(""), sep=" "
+    ).str.strip()
+
+    for group in ["write", "read"]:
+        group_benchmarks = dtype_benchmarks[dtype_benchmarks.group == group]
+        for package in group_benchmarks.package.unique():
+            plot_catplot_benchmarks(
+                data=group_benchmarks[group_benchmarks.package == package],
+                x_axis="dtype",
+                y_axis="throughput_mb_s",
+                hue="compressor_shuffle",
+                plots_dir=save_dir,
+                plot_name=f"{package}_{group}",
+                title=f"Dtype vs. {group} throughput ({spec_str}, {package})",
+            )
+
+    plot_catplot_benchmarks(
+        data=dtype_benchmarks[dtype_benchmarks.group == "read"],
+        x_axis="dtype",
+        y_axis="compression_ratio",
+        hue="compressor_shuffle",
+        plots_dir=save_dir,
+        plot_name="compression_ratio",
+        title=f"Dtype vs. compression ratio ({spec_str})",
+    )
+
+
+def create_write_empty_chunks_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare write time, read time and bytes stored when writing / skipping empty chunks, for each chunk size and
+    library."""
+    write_empty_chunks_benchmarks = benchmarks_df[
+        benchmarks_df.group.isin(["write", "read"])
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (benchmarks_df.shard_size.isna())
+        & (~benchmarks_df.chunk_size.isna())
+        & (benchmarks_df.concurrency.isna())
+        & (benchmarks_df.dtype.isna())
+    ]
+    # only compare settings that were benchmarked both ways
+    param_cols = ["package", "group", "compressor", "compression_level", "chunk_size"]
+    n_settings = write_empty_chunks_benchmarks.groupby(param_cols, dropna=False)[
+        "write_empty_chunks"
+    ].transform("nunique")
+    write_empty_chunks_benchmarks = write_empty_chunks_benchmarks[n_settings == 2]
+    if write_empty_chunks_benchmarks.empty:
+        print(
+            f"Skipping write_empty_chunks plots, as no data for Zarr format v{zarr_format}"
+        )
+        return
+
+    save_dir = plots_dir / "write_empty_chunks" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    for group in ["write", "read"]:
+        for package in write_empty_chunks_benchmarks.package.unique():
+            plot_catplot_benchmarks(
+                data=write_empty_chunks_benchmarks[
+                    (write_empty_chunks_benchmarks.group == group)
+                    & (write_empty_chunks_benchmarks.package == package)
+                ],
+                x_axis="chunk_size",
+                y_axis="stats.mean",
+                hue="write_empty_chunks",
+                col="compressor",
+                plots_dir=save_dir,
+                plot_name=f"{package}_{group}",
+                title=f"{group.capitalize()} time, writing vs. skipping empty chunks ({spec_str}, {package})",
+            )
+
+    # the store is the same for read and write benchmarks, so only use read benchmarks for storage
+    read_benchmarks = write_empty_chunks_benchmarks[
+        write_empty_chunks_benchmarks.group == "read"
+    ]
+    for package in read_benchmarks.package.unique():
+        for y_axis in ["nbytes_stored", "n_missing_chunks"]:
+            plot_catplot_benchmarks(
+                data=read_benchmarks[read_benchmarks.package == package],
+                x_axis="chunk_size",
+                y_axis=y_axis,
+                hue="write_empty_chunks",
+                col="compressor",
+                plots_dir=save_dir,
+                plot_name=f"{package}_{y_axis}",
+                title=f"Chunk size vs. {y_axis}, writing vs. skipping empty chunks ({spec_str}, {package})",
+            )
+
+
+def create_parallel_write_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare aggregate write throughput for different numbers of processes writing into a single array."""
+    parallel_benchmarks = benchmarks_df[
+        (benchmarks_df.group == "write_parallel")
+        & (benchmarks_df.zarr_spec == zarr_format)
+    ]
+    spec_str = f"Zarr format v{zarr_format}"
+
+    plot_relplot_benchmarks(
+        parallel_benchmarks,
+        x_axis="processes",
+        y_axis="throughput_mb_s",
+        hue="package",
+        col="chunk_size",
+        title=f"Processes vs. parallel write throughput ({spec_str})",
+        plots_dir=plots_dir / "write_parallel" / f"format_v{zarr_format}",
+        plot_name="write_parallel",
+    )
+
+
+def create_async_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare throughput of the zarr-python v3 async API (for different numbers of in-flight requests) with the sync
+    API."""
+    zarr_v3_benchmarks = benchmarks_df[
+        (benchmarks_df.package == "zarr_python_3")
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (benchmarks_df.compressor == "blosc-zstd")
+        & (benchmarks_df.compression_level == 3)
+        & (benchmarks_df.blosc_shuffle == "shuffle")
+    ]
+    save_dir = plots_dir / "async" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    for group in ["write", "read"]:
+        async_benchmarks = zarr_v3_benchmarks[
+            zarr_v3_benchmarks.group == f"{group}_async"
+        ]
+        sync_benchmarks = zarr_v3_benchmarks[
+            (zarr_v3_benchmarks.group == group)
+            & (zarr_v3_benchmarks.chunk_size.isin(async_benchmarks.chunk_size))
+        ]
+
+        if async_benchmarks.empty:
+            print(
+                f"Skipping {group} async plots, as no data for Zarr format v{zarr_format}"
+            )
+            continue
+
+        # show the sync API as its own category next to each number of in-flight requests
+        in_flight_values = sorted(async_benchmarks.in_flight.unique())
+        in_flight_order = ["sync"] + [str(int(value)) for value in in_flight_values]
+        comparison = pd.concat([sync_benchmarks, async_benchmarks]).assign(group=group)
+        comparison["in_flight"] = pd.Categorical(
+            comparison.in_flight.map(
+                lambda value: "sync" if pd.isna(value) else str(int(value))
+            ),
+            categories=in_flight_order,
+            ordered=True,
+        )
+
+        plot_catplot_benchmarks(
+            data=comparison,
+            x_axis="in_flight",
+            y_axis="throughput_mb_s",
+            hue="chunk_size",
+            plots_dir=save_dir,
+            plot_name=group,
+            title=f"Async in-flight requests vs. {group} throughput ({spec_str}, zarr_python_3)",
+        )
+
+
+def create_preallocated_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare reading into a newly allocated array vs. a preallocated output array, for each chunk size and
+    library."""
+    preallocated_benchmarks = benchmarks_df[
+        (benchmarks_df.group == "read_preallocated")
+        & (benchmarks_df.zarr_spec == zarr_format)
+    ]
+    save_dir = plots_dir / "preallocated" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    plot_catplot_benchmarks(
+        data=preallocated_benchmarks,
+        x_axis="chunk_size",
+        y_axis="stats.mean",
+        hue="preallocated_out",
+        col="package",
+        plots_dir=save_dir,
+        plot_name="read",
+        title=f"Read time into a new vs. preallocated array ({spec_str})",
+    )
+
+    plot_catplot_benchmarks(
+        data=preallocated_benchmarks,
+        x_axis="chunk_size",
+        y_axis="peak_rss_per_byte",
+        hue="preallocated_out",
+        col="package",
+        plots_dir=save_dir,
+        plot_name="read_peak_rss",
+        title=f"Peak RSS increase per byte of image, reading into a new vs. preallocated array ({spec_str})",
+    )
+
+
+def create_memory_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare peak memory per byte of image, for each compressor and library."""
+    memory_benchmarks = benchmarks_df[
+        (benchmarks_df.chunk_size == 128)
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (~benchmarks_df.blosc_shuffle.isin(["noshuffle", "bitshuffle"]))
+        & (~benchmarks_df.peak_rss_per_byte.isna())
+    ]
+    save_dir = plots_dir / "memory" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    for group in ["write", "read"]:
+        group_benchmarks = memory_benchmarks[memory_benchmarks.group == group]
+
+        plot_catplot_benchmarks(
+            data=group_benchmarks,
+            x_axis="compressor",
+            y_axis="peak_rss_per_byte",
+            hue="package",
+            plots_dir=save_dir,
+            plot_name=f"{group}_peak_rss",
+            title=f"Peak RSS increase per byte of image during {group} ({spec_str})",
+        )
+
+        plot_catplot_benchmarks(
+            data=group_benchmarks,
+            x_axis="compressor",
+            y_axis="tracemalloc_peak_per_byte",
+            hue="package",
+            plots_dir=save_dir,
+            plot_name=f"{group}_tracemalloc_peak",
+            title=f"Peak traced memory per byte of image during {group} ({spec_str})",
+        )
+
+
+def create_cpu_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare CPU utilisation and throughput per core-second of CPU time, for each compressor and library."""
+    cpu_benchmarks = benchmarks_df[
+        (benchmarks_df.chunk_size == 128)
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (~benchmarks_df.blosc_shuffle.isin(["noshuffle", "bitshuffle"]))
+        & (~benchmarks_df.cpu_time.isna())
+    ]
+    save_dir = plots_dir / "cpu" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    for group in ["write", "read"]:
+        group_benchmarks = cpu_benchmarks[cpu_benchmarks.group == group]
+
+        plot_catplot_benchmarks(
+            data=group_benchmarks,
+            x_axis="compressor",
+            y_axis="cpu_utilisation",
+            hue="package",
+            plots_dir=save_dir,
+            plot_name=f"{group}_cpu_utilisation",
+            title=f"CPU utilisation during {group} ({spec_str})",
+        )
+
+        plot_catplot_benchmarks(
+            data=group_benchmarks,
+            x_axis="compressor",
+            y_axis="throughput_mb_per_core_s",
+            hue="package",
+            plots_dir=save_dir,
+            plot_name=f"{group}_throughput_per_core",
+            title=f"{group.capitalize()} throughput per core-second ({spec_str})",
+        )
+
+
+def create_phase_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare the time spent in each phase of a read / write (open, io, codec and other), for each compressor and
+    library. Only available for results run with --phase-timing."""
+    phase_benchmarks = benchmarks_df[
+        (benchmarks_df.chunk_size == 128)
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (~benchmarks_df.blosc_shuffle.isin(["noshuffle", "bitshuffle"]))
+        & (~benchmarks_df.phase_open.isna())
+    ]
+    save_dir = plots_dir / "phases" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    # one row per phase, so phases can be shown side by side
+    phase_benchmarks = phase_benchmarks.melt(
+        id_vars=["group", "package", "compressor", "machine"],
+        value_vars=[f"phase_{phase}" for phase in PHASES],
+        var_name="phase",
+        value_name="phase_time",
+    )
+    phase_benchmarks["phase"] = phase_benchmarks.phase.str.removeprefix("phase_")
+
+    for group in ["write", "read"]:
+        plot_catplot_benchmarks(
+            data=phase_benchmarks[phase_benchmarks.group == group],
+            x_axis="compressor",
+            y_axis="phase_time",
+            hue="phase",
+            col="package",
+            plots_dir=save_dir,
+            plot_name=group,
+            title=f"Time of each {group} phase ({spec_str})",
+        )
+
+
+def create_chunk_shape_plots(
+    benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
+) -> None:
+    """Compare non-cubic chunks (e.g. slabs of 32x256x256) with cubic chunks of the same number of voxels, for
+    reading / writing the whole image and reading planes."""
+    chunk_shape_benchmarks = benchmarks_df[
+        (benchmarks_df.compressor == "blosc-zstd")
+        & (benchmarks_df.compression_level == 3)
+        & (benchmarks_df.blosc_shuffle == "shuffle")
+        & (benchmarks_df.zarr_spec == zarr_format)
+        & (benchmarks_df.shard_size.isna())
+        & (benchmarks_df.concurrency.isna())
+        & (benchmarks_df.dtype.isna())
+    ].copy()
+    save_dir = plots_dir / "chunk_shape" / f"format_v{zarr_format}"
+    spec_str = f"Zarr format v{zarr_format}"
+
+    chunk_voxels = chunk_shape_benchmarks.chunk_shape.map(
+        lambda shape: math.prod(int(length) for length in shape.split("x"))
+    )
+    non_cubic_voxels = chunk_voxels[chunk_shape_benchmarks.chunk_size.isna()].unique()
+    chunk_shape_benchmarks = chunk_shape_benchmarks[
+        chunk_voxels.isin(non_cubic_voxels)
+    ].copy()
+
+    # order chunk shapes from thinnest to thickest along the first (z) axis
+    shape_order = sorted(
+        chunk_shape_benchmarks.chunk_shape.unique(),
+        key=lambda shape: [int(length) for length in shape.split("x")],
+    )
+    chunk_shape_benchmarks["chunk_shape"] = pd.Categorical(
+        chunk_shape_benchmarks.chunk_shape, categories=shape_order, ordered=True
+    )
+
+    plot_catplot_benchmarks(
+        data=chunk_shape_benchmarks[chunk_shape_benchmarks.group == "read"],
+        x_axis="chunk_shape",
+        y_axis="compression_ratio",
+        hue="package",
+        plots_dir=save_dir,
+        plot_name="compression_ratio",
+        title=f"Chunk shape vs. compression ratio ({spec_str})",
+    )
+
+    for group in ["write", "read"]:
+        plot_catplot_benchmarks(
+            data=chunk_shape_benchmarks[chunk_shape_benchmarks.group == group],
+            x_axis="chunk_shape",
+            y_axis="stats.mean",
+            hue="package",
+            plots_dir=save_dir,
+            plot_name=group,
+            title=f"Chunk shape vs. {group} time ({spec_str})",
+        )
+
+    plot_catplot_benchmarks(
+        data=chunk_shape_benchmarks[chunk_shape_benchmarks.group == "read_plane"],
+        x_axis="chunk_shape",
+        y_axis="stats.mean",
+        hue="package",
+        col="slice_plane",
+        plots_dir=save_dir,
+        plot_name="read_plane",
+        title=f"Chunk shape vs. plane read time ({spec_str})",
+    )
+
+
 def create_chunk_size_plots(
     benchmarks_df: pd.DataFrame, plots_dir: Path, zarr_format: Literal[2, 3]
 ) -> None:
@@ -189,6 +968,16 @@ def create_chunk_size_plots(
         plot_name="read",
     )
 
+    plot_relplot_benchmarks(
+        chunk_size_read,
+        y_axis="block_overhead",
+        x_axis="chunk_size",
+        hue="package",
+        title=f"Chunk size vs. disk space allocated / bytes stored ({spec_str})",
+        plots_dir=save_dir,
+        plot_name="block_overhead",
+    )
+
 
 def create_read_write_errorbar_plots_for_package(
     read_write_benchmarks: pd.DataFrame,
@@ -326,6 +1115,12 @@ def create_read_write_plots(
     create_read_write_plots_for_package(
         read_write_benchmarks, "tensorstore", plots_dir, zarr_format
     )
+    create_read_write_plots_for_package(
+        read_write_benchmarks, "numcodecs", plots_dir, zarr_format
+    )
+    create_read_write_plots_for_package(
+        read_write_benchmarks, "h5py", plots_dir, zarr_format
+    )
 
     create_read_write_errorbar_plots_for_package(
         read_write_benchmarks, "zarr_python_2", plots_dir, zarr_format
@@ -336,6 +1131,12 @@ def create_read_write_plots(
     create_read_write_errorbar_plots_for_package(
         read_write_benchmarks, "tensorstore", plots_dir, zarr_format
     )
+    create_read_write_errorbar_plots_for_package(
+        read_write_benchmarks, "numcodecs", plots_dir, zarr_format
+    )
+    create_read_write_errorbar_plots_for_package(
+        read_write_benchmarks, "h5py", plots_dir, zarr_format
+    )
 
     read_chunks_128 = read_write_benchmarks[
         (read_write_benchmarks.group == "read")
@@ -390,34 +1191,73 @@ def create_plots_for_image(image_dir: Path, json_ids: list[str] | None) -> None:
     print(f"📈 Generating plots from results in {results_path}...")
 
     if json_ids is None:
-        # Find the latest 3 json ids in the sub-dir
+        # Find the latest json ids in the sub-dir (one per tox env)
         all_ids = []
         for result_json in results_path.glob("*.json"):
             all_ids.append(result_json.stem.split("_")[0])
 
-        json_ids = sorted(all_ids)[-3:]
+        json_ids = sorted(all_ids)[-len(SAVE_NAME_PACKAGES) :]
 
-    zarr_v2_path = results_path / f"{json_ids[0]}_zarr-python-v2.json"
-    zarr_v3_path = results_path / f"{json_ids[1]}_zarr-python-v3.json"
-    tensorstore_path = results_path / f"{json_ids[2]}_tensorstore.json"
+    package_paths_dict = {}
+    for json_id in json_ids:
+        json_paths = list(results_path.glob(f"{json_id}_*.json"))
+        if len(json_paths) != 1:
+            raise ValueError(
+                f"Expected one json with id {json_id} inside {results_path}"
+            )
 
-    package_paths_dict = {
-        "zarr_python_2": zarr_v2_path,
-        "zarr_python_3": zarr_v3_path,
-        "tensorstore": tensorstore_path,
-    }
+        # package name from the --benchmark-save name of each tox env e.g. 0001_zarr-python-v2.json
+        save_name = json_paths[0].stem.removeprefix(f"{json_id}_")
+        package = SAVE_NAME_PACKAGES.get(save_name, save_name)
+        package_paths_dict[package] = json_paths[0]
 
     benchmarks_df = get_benchmarks_dataframe(
         package_paths_dict,
     )
 
     plots_dir = Path(__file__).parents[2] / "data" / "plots" / image_dir.stem
-    create_read_write_plots(benchmarks_df, plots_dir, zarr_format=2)
-    create_read_write_plots(benchmarks_df, plots_dir, zarr_format=3)
-    create_chunk_size_plots(benchmarks_df, plots_dir, zarr_format=2)
-    create_chunk_size_plots(benchmarks_df, plots_dir, zarr_format=3)
-    create_shuffle_plots(benchmarks_df, plots_dir, zarr_format=2)
-    create_shuffle_plots(benchmarks_df, plots_dir, zarr_format=3)
+    create_shard_size_plots(benchmarks_df, plots_dir)
+
+    create_concurrency_plots(benchmarks_df, plots_dir, zarr_format=2)
+    create_concurrency_plots(benchmarks_df, plots_dir, zarr_format=3)
+    create_dtype_plots(benchmarks_df, plots_dir, zarr_format=2)
+    create_dtype_plots(benchmarks_df, plots_dir, zarr_format=3)
+    create_chunk_shape_plots(benchmarks_df, plots_dir, zarr_format=2)
+    create_chunk_shape_plots(benchmarks_df, plots_dir, zarr_format=3)
+    create_write_empty_chunks_plots(benchmarks_df, plots_dir, zarr_format=2)
+    create_write_empty_chunks_plots(benchmarks_df, plots_dir, zarr_format=3)
+
+    # all other plots compare un-sharded arrays with cubic chunks, of the image's own dtype, with each library's
+    # default concurrency, writing every chunk
+    default_df = benchmarks_df[
+        benchmarks_df.shard_size.isna()
+        & ~benchmarks_df.chunk_size.isna()
+        & benchmarks_df.concurrency.isna()
+        & benchmarks_df.dtype.isna()
+        & benchmarks_df.write_empty_chunks
+    ].astype({"chunk_size": int})
+    create_read_write_plots(default_df, plots_dir, zarr_format=2)
+    create_read_write_plots(default_df, plots_dir, zarr_format=3)
+    create_chunk_size_plots(default_df, plots_dir, zarr_format=2)
+    create_chunk_size_plots(default_df, plots_dir, zarr_format=3)
+    create_shuffle_plots(default_df, plots_dir, zarr_format=2)
+    create_shuffle_plots(default_df, plots_dir, zarr_format=3)
+    create_roi_plots(default_df, plots_dir, zarr_format=2)
+    create_roi_plots(default_df, plots_dir, zarr_format=3)
+    create_plane_plots(default_df, plots_dir, zarr_format=2)
+    create_plane_plots(default_df, plots_dir, zarr_format=3)
+    create_parallel_write_plots(default_df, plots_dir, zarr_format=2)
+    create_parallel_write_plots(default_df, plots_dir, zarr_format=3)
+    create_async_plots(default_df, plots_dir, zarr_format=2)
+    create_async_plots(default_df, plots_dir, zarr_format=3)
+    create_preallocated_plots(default_df, plots_dir, zarr_format=2)
+    create_preallocated_plots(default_df, plots_dir, zarr_format=3)
+    create_memory_plots(default_df, plots_dir, zarr_format=2)
+    create_memory_plots(default_df, plots_dir, zarr_format=3)
+    create_cpu_plots(default_df, plots_dir, zarr_format=2)
+    create_cpu_plots(default_df, plots_dir, zarr_format=3)
+    create_phase_plots(default_df, plots_dir, zarr_format=2)
+    create_phase_plots(default_df, plots_dir, zarr_format=3)
 
     print("Plotting finished 🕺")
     print(f"Plots saved to {plots_dir}")
@@ -429,9 +1269,9 @@ def create_all_plots(
     """Create plots for all images. By default, process the latest benchmark results inside data/results. Set
     example_results to process from the example_results/ directory instead.
     Args:
-        json_ids (list[str] | None, optional): optional list of json ids e.g. ["0001", "0002", "0003"] of the
-            zarr-python-v2, zarr-python-v3 and tensorstore json to process. The same ids will be used for all image
-            sub-directories.
+        json_ids (list[str] | None, optional): optional list of json ids e.g. ["0001", "0002", "0003", "0004", "0005"]
+            of the zarr-python-v2, zarr-python-v3, tensorstore, numcodecs and h5py json to process (or a single id,
+            for results run with several backends). The same ids will be used for all image sub-directories.
         example_results (bool, optional): whether to process jsons from example_results/ rather than data/results.
     """
 
@@ -453,10 +1293,11 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--json_ids",
-        nargs=3,
+        nargs="+",
         metavar="JSON_ID",
-        help="provide the ids of the zarr-python-v2, zarr-python-v3 and tensorstore json files you want to process "
-        "e.g. 0001 0002 0003. This uses the same ids for all image sub-directories.",
+        help="provide the ids of the json files you want to process e.g. 0001 0002 0003 0004 0005 for the "
+        "zarr-python-v2, zarr-python-v3, tensorstore, numcodecs and h5py results, or a single id for results run with "
+        "several backends (--backend). This uses the same ids for all image sub-directories.",
     )
     parser.add_argument(
         "--example_results",
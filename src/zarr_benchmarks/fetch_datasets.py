@@ -1,7 +1,13 @@
+import json
+import os
+import pathlib
+
+import numpy as np
 import numpy.typing as npt
 import pooch
 
 from zarr_benchmarks.read_write_zarr import read_write_zarr
+from zarr_benchmarks.utils import read_json_file
 
 ZENODO = pooch.create(
     # Use the default cache folder for the operating system
@@ -25,16 +31,58 @@ def _fetch_from_zenodo(image_name: str) -> npt.NDArray:
     return image
 
 
+def _get_decoded_image_paths(image_name: str) -> tuple[pathlib.Path, pathlib.Path]:
+    """Paths of the decoded .npy image, and the json file recording which zenodo file it was decoded from"""
+    npy_path = ZENODO.path / f"{image_name}.npy"
+    return npy_path, npy_path.with_name(f"{npy_path.name}.json")
+
+
+def _get_decoded_image(image_name: str) -> npt.NDArray:
+    """Get a zenodo image as a read-only memory map of a .npy file, saved next to the pooch cache. Decoding the zarr
+    image is slow, so it's only done once (rather than in every testing session / tox environment) - and again if the
+    file's checksum in the zenodo registry changes."""
+
+    registry_hash = ZENODO.registry[f"{image_name}.zip"]
+    npy_path, source_path = _get_decoded_image_paths(image_name)
+
+    if npy_path.exists() and source_path.exists():
+        if read_json_file(source_path)["registry_hash"] == registry_hash:
+            return open_npy_image(npy_path)
+
+    image = _fetch_from_zenodo(image_name)
+
+    # save to a temporary file first, so an interrupted save never leaves a partial image
+    temp_path = npy_path.with_name(f".{npy_path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "wb") as f:
+        np.save(f, image)
+    os.replace(temp_path, npy_path)
+    source_path.write_text(json.dumps({"registry_hash": registry_hash}))
+
+    return open_npy_image(npy_path)
+
+
 def get_heart() -> npt.NDArray:
     """Fetch image of a heart from the human organ atlas."""
-    return _fetch_from_zenodo("200.64um_LADAF-2021-17_heart_complete-organ_pag.zarr")
+    return _get_decoded_image("200.64um_LADAF-2021-17_heart_complete-organ_pag.zarr")
 
 
 def get_dense_segmentation() -> npt.NDArray:
     """Fetch small subset of C3 segmentation data from the H01 release"""
-    return _fetch_from_zenodo("H01-c3-subset.zarr")
+    return _get_decoded_image("H01-c3-subset.zarr")
 
 
 def get_sparse_segmentation() -> npt.NDArray:
     """Fetch small subset of '104 proofread cells' segmentation data from the H01 release"""
-    return _fetch_from_zenodo("H01-proofread-104-subset.zarr")
+    return _get_decoded_image("H01-proofread-104-subset.zarr")
+
+
+def open_npy_image(image_path: pathlib.Path) -> npt.NDArray:
+    """Open a 3D image saved with np.save as a read-only memory map. Data is only read from disk as it is accessed, so
+    the image doesn't have to fit in memory."""
+    image = np.load(image_path, mmap_mode="r")
+    if image.ndim != 3:
+        raise ValueError(
+            f"Expected a 3D image, but {image_path} has shape {image.shape}"
+        )
+
+    return image
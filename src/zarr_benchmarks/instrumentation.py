@@ -0,0 +1,283 @@
+import math
+import statistics
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import psutil
+
+from zarr_benchmarks.phase_timing import PhaseTimer
+
+# seconds between samples of the resident set size (RSS), while measuring peak memory
+RSS_SAMPLE_INTERVAL = 0.005
+
+# confidence level of the confidence interval of the mean round time, used for 'precision' in extra_info
+CONFIDENCE_LEVEL = 0.95
+
+# fewest rounds used to estimate the variance of round times, in adaptive mode
+MIN_ADAPTIVE_ROUNDS = 3
+
+
+class PeakMemory:
+    """Context manager that records the peak memory used by the current process, while it is active.
+
+    Two measures are recorded, both relative to the memory in use on entry:
+    - peak_rss: increase in resident set size (RSS), sampled by a background thread. This includes memory allocated
+      by compiled libraries (e.g. tensorstore / blosc), but can miss short-lived peaks between samples.
+    - tracemalloc_peak: peak size of memory blocks traced by tracemalloc. This is exact, but only covers allocations
+      made through Python's allocators (which includes numpy arrays).
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.peak_rss = 0
+        self.tracemalloc_peak = 0
+        self._process = psutil.Process()
+        self._stop_sampling = threading.Event()
+
+    def _sample_rss(self) -> None:
+        while not self._stop_sampling.wait(self.interval):
+            self._max_rss = max(self._max_rss, self._process.memory_info().rss)
+
+    def __enter__(self) -> "PeakMemory":
+        self._start_rss = self._process.memory_info().rss
+        self._max_rss = self._start_rss
+        self._sampler = threading.Thread(target=self._sample_rss, daemon=True)
+        self._sampler.start()
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _, self.tracemalloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self._stop_sampling.set()
+        self._sampler.join()
+        self._max_rss = max(self._max_rss, self._process.memory_info().rss)
+        self.peak_rss = self._max_rss - self._start_rss
+
+
+class CpuTime:
+    """Context manager that records the wall time and CPU time (user + system, summed over all threads) of the current
+    process, while it is active. CPU time of child processes (e.g. parallel write workers) isn't included.
+    """
+
+    def __init__(self) -> None:
+        self.cpu_time = 0.0
+        self.wall_time = 0.0
+
+    def __enter__(self) -> "CpuTime":
+        self._start_cpu_time = time.process_time()
+        self._start_wall_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.wall_time = time.perf_counter() - self._start_wall_time
+        self.cpu_time = time.process_time() - self._start_cpu_time
+
+    @property
+    def cpu_utilisation(self) -> float:
+        """Average number of cores in use i.e. CPU time / wall time"""
+        return self.cpu_time / self.wall_time
+
+
+def get_t_quantile(dof: int, confidence: float = CONFIDENCE_LEVEL) -> float:
+    """Two-sided quantile of Student's t-distribution (e.g. 2.776 for 4 degrees of freedom and 95% confidence), from
+    the Cornish-Fisher expansion around the normal distribution. Accurate to within 4% for 2 degrees of freedom, and
+    0.5% for 4 or more."""
+    if dof < 1:
+        raise ValueError(f"Degrees of freedom must be at least 1, but is {dof}")
+
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    return (
+        z
+        + (z**3 + z) / (4 * dof)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * dof**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * dof**3)
+    )
+
+
+def get_precision(durations: list[float]) -> float | None:
+    """Precision of the mean of durations: the half-width of its confidence interval, relative to the mean (e.g. 0.05
+    means the true mean is within +-5% of the measured mean, with CONFIDENCE_LEVEL confidence). None for fewer than two
+    durations, or durations too short to time."""
+    if len(durations) < 2:
+        return None
+
+    mean = statistics.fmean(durations)
+    if mean == 0:
+        return None
+
+    standard_error = statistics.stdev(durations) / math.sqrt(len(durations))
+    return get_t_quantile(len(durations) - 1) * standard_error / mean
+
+
+@dataclass(frozen=True)
+class AdaptiveRounds:
+    """Settings to choose the number of rounds for each benchmark, rather than using a fixed number.
+
+    Attributes:
+        target_precision: precision of the mean round time to aim for (see get_precision) e.g. 0.05 for +-5%.
+        time_budget: maximum time to spend on each benchmark in seconds (including warmup and setup). Benchmarks stop
+            early, before reaching target_precision, if the budget runs out.
+    """
+
+    target_precision: float
+    time_budget: float
+
+    def get_rounds(
+        self, pilot_durations: list[float], round_time: float, elapsed: float
+    ) -> int:
+        """Number of rounds needed to reach target_precision, estimated from the times of pilot rounds (Stein's
+        two-stage method), but no more than fit in the rest of the time budget.
+
+        Args:
+            pilot_durations (list[float]): time of each pilot round, in seconds.
+            round_time (float): average time of each round so far in seconds, including setup.
+            elapsed (float): time spent on the benchmark so far, in seconds.
+        Returns:
+            int: number of rounds - at least MIN_ADAPTIVE_ROUNDS.
+        """
+        mean = statistics.fmean(pilot_durations)
+        if mean == 0:
+            return MIN_ADAPTIVE_ROUNDS
+
+        t_quantile = get_t_quantile(len(pilot_durations) - 1)
+        relative_stdev = statistics.stdev(pilot_durations) / mean
+        needed_rounds = math.ceil(
+            (t_quantile * relative_stdev / self.target_precision) ** 2
+        )
+
+        affordable_rounds = math.floor((self.time_budget - elapsed) / round_time)
+        return max(min(needed_rounds, affordable_rounds), MIN_ADAPTIVE_ROUNDS)
+
+
+def _run_pilot_rounds(
+    target: Callable,
+    args: tuple,
+    kwargs: dict | None,
+    setup: Callable | None,
+    warmup_rounds: int,
+    pilot_rounds: int,
+) -> list[float]:
+    """Run warmup rounds, then pilot rounds, returning the time of each pilot round in seconds"""
+    durations = []
+    for round_index in range(warmup_rounds + pilot_rounds):
+        round_args, round_kwargs = args, kwargs or {}
+        if setup is not None:
+            setup_result = setup()
+            if setup_result is not None:
+                round_args, round_kwargs = setup_result
+
+        start = time.perf_counter()
+        target(*round_args, **round_kwargs)
+        if round_index >= warmup_rounds:
+            durations.append(time.perf_counter() - start)
+
+    return durations
+
+
+def pedantic(
+    benchmark,
+    target: Callable,
+    *,
+    args: tuple = (),
+    kwargs: dict | None = None,
+    setup: Callable | None = None,
+    rounds: int,
+    warmup_rounds: int,
+    memory_rounds: int = 0,
+    phase_timer: PhaseTimer | None = None,
+    adaptive_rounds: AdaptiveRounds | None = None,
+) -> Any:
+    """Run target via benchmark.pedantic, recording the CPU time of each round (and optionally peak memory) in
+    benchmark.extra_info.
+
+    Takes the same arguments as benchmark.pedantic. CPU time measurements from warmup rounds are discarded, so
+    'cpu_time' (in seconds) and 'cpu_utilisation' in extra_info hold one value per timed round.
+
+    Measuring peak memory slows down every allocation (tracemalloc) and adds a background thread (RSS sampling), so
+    it is never done in timed rounds. Instead, target is run for memory_rounds extra untimed rounds afterwards (each
+    after its own setup), and 'peak_rss' / 'tracemalloc_peak' (in bytes) in extra_info hold one value per memory
+    round.
+
+    If a phase_timer is given (which must also be passed to target), 'phases' in extra_info holds the time (in
+    seconds) of each phase, per timed round.
+
+    'precision' in extra_info holds the precision of the mean round time (see get_precision). If adaptive_rounds is
+    given, rounds is the number of untimed pilot rounds (at least MIN_ADAPTIVE_ROUNDS) run after the warmup rounds.
+    The pilot round times set the number of timed rounds (see AdaptiveRounds.get_rounds), which are run with no further
+    warmup. 'target_precision', 'pilot_rounds' and 'time_budget' are also stored in extra_info.
+    """
+    if adaptive_rounds is not None and benchmark.enabled:
+        start = time.perf_counter()
+        pilot_rounds = max(rounds, MIN_ADAPTIVE_ROUNDS)
+        pilot_durations = _run_pilot_rounds(
+            target, args, kwargs, setup, warmup_rounds, pilot_rounds
+        )
+        elapsed = time.perf_counter() - start
+        rounds = adaptive_rounds.get_rounds(
+            pilot_durations, elapsed / (warmup_rounds + pilot_rounds), elapsed
+        )
+        warmup_rounds = 0
+
+        benchmark.extra_info["target_precision"] = adaptive_rounds.target_precision
+        benchmark.extra_info["pilot_rounds"] = pilot_rounds
+        benchmark.extra_info["time_budget"] = adaptive_rounds.time_budget
+
+    round_cpu = []
+    round_phases = []
+
+    def measured_target(*args, **kwargs):
+        if phase_timer is not None:
+            phase_timer.reset()
+        with CpuTime() as cpu:
+            result = target(*args, **kwargs)
+        round_cpu.append(cpu)
+        if phase_timer is not None:
+            round_phases.append(dict(phase_timer.durations))
+        return result
+
+    result = benchmark.pedantic(
+        measured_target,
+        args=args,
+        kwargs=kwargs,
+        setup=setup,
+        rounds=rounds,
+        warmup_rounds=warmup_rounds,
+    )
+
+    # if benchmarks are disabled (e.g. --benchmark-disable), target is only run once, with no warmup
+    if benchmark.enabled:
+        round_cpu = round_cpu[warmup_rounds : warmup_rounds + rounds]
+        round_phases = round_phases[warmup_rounds : warmup_rounds + rounds]
+    benchmark.extra_info["cpu_time"] = [cpu.cpu_time for cpu in round_cpu]
+    benchmark.extra_info["cpu_utilisation"] = [cpu.cpu_utilisation for cpu in round_cpu]
+    benchmark.extra_info["precision"] = get_precision(
+        [cpu.wall_time for cpu in round_cpu]
+    )
+    if phase_timer is not None:
+        benchmark.extra_info["phases"] = round_phases
+
+    round_memory = []
+    for _ in range(memory_rounds):
+        round_args, round_kwargs = args, kwargs or {}
+        if setup is not None:
+            setup_result = setup()
+            if setup_result is not None:
+                round_args, round_kwargs = setup_result
+
+        with PeakMemory() as peak_memory:
+            target(*round_args, **round_kwargs)
+        round_memory.append(peak_memory)
+
+    if memory_rounds > 0:
+        benchmark.extra_info["peak_rss"] = [memory.peak_rss for memory in round_memory]
+        benchmark.extra_info["tracemalloc_peak"] = [
+            memory.tracemalloc_peak for memory in round_memory
+        ]
+
+    return result
@@ -0,0 +1,259 @@
+"""Run the benchmarks in several pytest processes at once, to get through large parameter matrices faster. The
+collected benchmarks are split between worker processes (see the --shard option in tests/conftest.py), each pinned to
+its own set of CPU cores and writing to its own output directory. Results from all workers are merged into a single
+pytest-benchmark json, as if the benchmarks had been run by one pytest process.
+
+Run inside the environment of one backend (e.g. a tox environment) with:
+
+python -m zarr_benchmarks.parallel_runner --workers=4 --save=tensorstore -- -m tensorstore --benchmark-save-data
+
+All arguments after -- are passed to pytest.
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+
+from pytest_benchmark.storage.file import FileStorage
+from pytest_benchmark.utils import get_machine_id
+
+# pytest exit codes that don't mean a worker failed: all tests passed, or no tests were collected (e.g. a worker with
+# no benchmarks left after splitting a small matrix)
+SUCCESS_EXIT_CODES = (0, 5)
+
+# pytest-benchmark options that save results from each worker - results are saved once, after merging
+SAVE_OPTIONS = ("--benchmark-save", "--benchmark-autosave", "--benchmark-json")
+
+
+def get_available_cpus() -> list[int]:
+    """CPU cores this process is allowed to run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpus(cpus: list[int], n_workers: int) -> list[list[int]]:
+    """Split cpus into n_workers contiguous sets, as evenly as possible. Neighbouring cores are more likely to share
+    caches, so each worker gets a contiguous block rather than every n-th core."""
+    if not 1 <= n_workers <= len(cpus):
+        raise ValueError(
+            f"Number of workers must be between 1 and the number of available cores ({len(cpus)}), but is "
+            f"{n_workers}"
+        )
+
+    cpu_sets = []
+    start = 0
+    for worker in range(n_workers):
+        n_cpus = len(cpus) // n_workers + (worker < len(cpus) % n_workers)
+        cpu_sets.append(cpus[start : start + n_cpus])
+        start += n_cpus
+
+    return cpu_sets
+
+
+def merge_results(worker_results: list[dict]) -> dict:
+    """Merge pytest-benchmark json results from each worker into a single result. Machine / commit info are taken from
+    the first worker, and benchmarks are sorted by name (workers finish in no particular order)."""
+    merged_results = {
+        key: value for key, value in worker_results[0].items() if key != "benchmarks"
+    }
+    merged_results["benchmarks"] = sorted(
+        (
+            benchmark
+            for results in worker_results
+            for benchmark in results["benchmarks"]
+        ),
+        key=lambda benchmark: benchmark["fullname"],
+    )
+
+    return merged_results
+
+
+def _check_pytest_args(pytest_args: list[str]) -> None:
+    for arg in pytest_args:
+        option = arg.split("=")[0]
+        if option in SAVE_OPTIONS:
+            raise ValueError(
+                f"{option} can't be passed to pytest, as results are saved after merging - use --save / --json instead"
+            )
+
+
+def run_workers(
+    pytest_args: list[str],
+    cpu_sets: list[list[int]],
+    output_dir: pathlib.Path,
+    results_dir: pathlib.Path,
+) -> tuple[list[dict], bool]:
+    """Run one pytest process per set of cpus, each running its share of the collected benchmarks.
+
+    Args:
+        pytest_args (list[str]): arguments passed to every pytest process.
+        cpu_sets (list[list[int]]): cores to pin each worker to.
+        output_dir (pathlib.Path): directory for the output of each worker: worker-{i} holds the stores it writes (see
+            --output-dir) and worker-{i}.log its pytest output.
+        results_dir (pathlib.Path): directory to save the json results of each worker in.
+    Returns:
+        tuple[list[dict], bool]: json results of each worker that saved any, and whether every worker succeeded.
+    """
+    n_workers = len(cpu_sets)
+    can_pin = hasattr(os, "sched_setaffinity")
+    if not can_pin:
+        print("Workers can't be pinned to cores on this platform, so aren't pinned")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = []
+    for worker, cpus in enumerate(cpu_sets):
+        results_path = results_dir / f"worker-{worker}.json"
+        command = [
+            sys.executable,
+            "-m",
+            "pytest",
+            *pytest_args,
+            f"--shard={worker}/{n_workers}",
+            f"--output-dir={output_dir / f'worker-{worker}'}",
+            f"--benchmark-json={results_path}",
+        ]
+        # set the affinity in the child before pytest starts, so every thread it creates is pinned too
+        pin_to_cpus = None
+        if can_pin:
+            pin_to_cpus = functools.partial(os.sched_setaffinity, 0, cpus)
+
+        log_file = open(output_dir / f"worker-{worker}.log", "w")
+        process = subprocess.Popen(
+            command, stdout=log_file, stderr=subprocess.STDOUT, preexec_fn=pin_to_cpus
+        )
+        print(f"Started worker {worker} on cores {cpus} (pid {process.pid})")
+        workers.append((process, log_file, results_path))
+
+    worker_results = []
+    succeeded = True
+    for worker, (process, log_file, results_path) in enumerate(workers):
+        exit_code = process.wait()
+        log_file.close()
+        print(f"Worker {worker} finished with exit code {exit_code}")
+        if exit_code not in SUCCESS_EXIT_CODES:
+            succeeded = False
+            print(f"See {log_file.name} for details")
+
+        if results_path.exists():
+            with open(results_path, "r") as f:
+                worker_results.append(json.load(f))
+
+    return worker_results, succeeded
+
+
+def run_parallel_benchmarks(
+    pytest_args: list[str],
+    n_workers: int,
+    output_dir: pathlib.Path,
+    storage: pathlib.Path,
+    save: str | None = None,
+    json_path: pathlib.Path | None = None,
+) -> bool:
+    """Run benchmarks split between n_workers pytest processes, and save the merged results.
+
+    Args:
+        pytest_args (list[str]): arguments passed to every pytest process.
+        n_workers (int): number of worker processes. Available cores are split evenly between them.
+        output_dir (pathlib.Path): directory for the stores / logs of each worker.
+        storage (pathlib.Path): pytest-benchmark storage directory to save merged results in (as --benchmark-storage).
+        save (str | None, optional): name to save merged results with in storage (as --benchmark-save). Defaults to
+            None.
+        json_path (pathlib.Path | None, optional): path to also save merged results to (as --benchmark-json). Defaults
+            to None.
+    Returns:
+        bool: whether every worker succeeded.
+    """
+    _check_pytest_args(pytest_args)
+    cpu_sets = split_cpus(get_available_cpus(), n_workers)
+
+    with tempfile.TemporaryDirectory() as results_dir:
+        worker_results, succeeded = run_workers(
+            pytest_args, cpu_sets, output_dir, pathlib.Path(results_dir)
+        )
+
+    if len(worker_results) == 0:
+        print("No results to save")
+        return succeeded
+
+    merged_results = merge_results(worker_results)
+    # record how the benchmarks were split, as results from parallel runs share memory bandwidth / disks between workers
+    merged_results["machine_info"]["parallel_workers"] = {
+        "n_workers": n_workers,
+        "cpu_sets": cpu_sets,
+    }
+
+    if save is not None:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        file_storage = FileStorage(
+            storage, logging.getLogger(__name__), default_machine_id=get_machine_id()
+        )
+        file_storage.save(merged_results, save)
+    if json_path is not None:
+        json_path.write_text(json.dumps(merged_results, indent=4))
+        print(f"Saved benchmark data in: {json_path}")
+
+    return succeeded
+
+
+def main() -> None:
+    available_cpus = get_available_cpus()
+
+    parser = argparse.ArgumentParser(
+        description="Run benchmarks in several pytest processes, each pinned to its own cores, and merge the results",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(len(available_cpus) // 4, 1),
+        help="Number of worker processes. Defaults to one per 4 available cores.",
+    )
+    parser.add_argument(
+        "--save",
+        type=str,
+        default=None,
+        help="Name to save merged results with (as --benchmark-save) e.g. tensorstore",
+    )
+    parser.add_argument(
+        "--storage",
+        type=pathlib.Path,
+        default=pathlib.Path(".benchmarks"),
+        help="Directory to save merged results in (as --benchmark-storage)",
+    )
+    parser.add_argument(
+        "--json",
+        type=pathlib.Path,
+        default=None,
+        help="Path to also save merged results to (as --benchmark-json)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=pathlib.Path,
+        default=pathlib.Path("data/output/parallel"),
+        help="Directory for the stores and pytest output of each worker",
+    )
+    parser.add_argument(
+        "pytest_args", nargs="*", help="Arguments passed to pytest (after --)"
+    )
+    args = parser.parse_args()
+
+    succeeded = run_parallel_benchmarks(
+        args.pytest_args,
+        args.workers,
+        args.output_dir,
+        args.storage,
+        save=args.save,
+        json_path=args.json,
+    )
+    sys.exit(0 if succeeded else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import mmap
+import multiprocessing
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Literal
+
+import numpy as np
+import numpy.typing as npt
+
+from zarr_benchmarks.read_write_zarr import get_backend
+from zarr_benchmarks.selections import Region
+
+# Image shared with the current worker process, attached once by _attach_shared_image
+_shared_image: npt.NDArray | None = None
+_shared_memory: SharedMemory | None = None
+
+
+def get_chunk_aligned_slabs(
+    shape: tuple[int, ...], chunks: tuple[int, ...], n_slabs: int
+) -> list[Region]:
+    """Split an image along its first axis into (at most) n_slabs contiguous slabs, with boundaries on the chunk grid.
+    Slabs are disjoint, so can be written concurrently without two writers touching the same chunk.
+
+    Args:
+        shape (tuple[int, ...]): shape of the image
+        chunks (tuple[int, ...]): chunk (or shard) shape of the zarr array. Writes must be aligned to shards for
+            sharded arrays, as a shard is stored as a single file.
+        n_slabs (int): number of slabs. Fewer slabs are returned if the first axis has fewer chunks than this.
+    Returns:
+        list[Region]: tuple of slices (one per axis) for each slab
+    """
+    n_chunks = -(-shape[0] // chunks[0])
+    slabs = []
+    for chunk_indices in np.array_split(np.arange(n_chunks), n_slabs):
+        if len(chunk_indices) == 0:
+            continue
+
+        start = int(chunk_indices[0]) * chunks[0]
+        stop = min((int(chunk_indices[-1]) + 1) * chunks[0], shape[0])
+        slabs.append(
+            (slice(start, stop),) + tuple(slice(0, dim_size) for dim_size in shape[1:])
+        )
+
+    return slabs
+
+
+class SharedImage:
+    """Copy of an image in shared memory, so worker processes can read it without it being pickled for every task.
+    Use as a context manager, to free the shared memory afterwards.
+
+    Memory-mapped files (e.g. from np.load(..., mmap_mode="r")) aren't copied - workers map the same file instead, so
+    images larger than memory can be written."""
+
+    def __init__(self, image: npt.NDArray):
+        self.shape = image.shape
+        self.dtype = image.dtype
+        self.shared_memory = None
+
+        if _is_file_mapping(image):
+            order = "F" if image.flags.f_contiguous and image.ndim > 1 else "C"
+            self._attach = _attach_memmap
+            self._attach_args = (image.filename, image.offset, order)
+            return
+
+        self.shared_memory = SharedMemory(create=True, size=max(image.nbytes, 1))
+        shared_image = np.ndarray(
+            image.shape, dtype=image.dtype, buffer=self.shared_memory.buf
+        )
+        shared_image[:] = image
+        self._attach = _attach_shared_image
+        self._attach_args = (self.shared_memory.name,)
+
+    def __enter__(self) -> "SharedImage":
+        return self
+
+    def __exit__(self, *_) -> None:
+        if self.shared_memory is not None:
+            self.shared_memory.close()
+            self.shared_memory.unlink()
+
+    def create_executor(self, processes: int) -> ProcessPoolExecutor:
+        """Create a pool of worker processes, that each attach to this image on start-up. Workers are started with
+        'spawn', as forking a process where zarr / tensorstore have already started threads isn't safe."""
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self._attach,
+            initargs=(*self._attach_args, self.shape, self.dtype),
+        )
+
+
+def _is_file_mapping(image: npt.NDArray) -> bool:
+    """Whether image is a memory map of a whole file (rather than a slice of one, whose offset isn't recorded)"""
+    return (
+        isinstance(image, np.memmap)
+        and isinstance(image.base, mmap.mmap)
+        and image.filename is not None
+    )
+
+
+def _attach_shared_image(
+    shared_memory_name: str, shape: tuple[int, ...], dtype: np.dtype
+) -> None:
+    global _shared_image, _shared_memory
+
+    _shared_memory = SharedMemory(name=shared_memory_name)
+    _shared_image = np.ndarray(shape, dtype=dtype, buffer=_shared_memory.buf)
+
+
+def _attach_memmap(
+    filename: str,
+    offset: int,
+    order: Literal["C", "F"],
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+) -> None:
+    global _shared_image
+
+    _shared_image = np.memmap(
+        filename, dtype=dtype, mode="r", offset=offset, shape=shape, order=order
+    )
+
+
+def _write_region(
+    backend: str,
+    store_path: pathlib.Path,
+    region: Region,
+    write_empty_chunks: bool,
+    zarr_spec: Literal[2, 3],
+) -> None:
+    """Write one region of the shared image (runs inside a worker process)"""
+    read_write_zarr = get_backend(backend).load()
+    read_write_zarr.write_zarr_region(
+        _shared_image[region],
+        store_path,
+        region,
+        write_empty_chunks=write_empty_chunks,
+        zarr_spec=zarr_spec,
+    )
+
+
+def write_regions_in_parallel(
+    executor: ProcessPoolExecutor,
+    backend: str,
+    store_path: pathlib.Path,
+    regions: list[Region],
+    *,
+    write_empty_chunks: bool = True,
+    zarr_spec: Literal[2, 3],
+) -> None:
+    """Write each region of a SharedImage into an existing zarr array from the executor's worker processes (using
+    the named backend), and wait for all writes to finish."""
+    futures = [
+        executor.submit(
+            _write_region, backend, store_path, region, write_empty_chunks, zarr_spec
+        )
+        for region in regions
+    ]
+    for future in futures:
+        future.result()
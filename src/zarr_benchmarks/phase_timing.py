@@ -0,0 +1,76 @@
+import contextlib
+import threading
+import time
+from collections.abc import Iterator
+
+# Phases each round is split into:
+# - open: opening / creating the array, including parsing metadata
+# - io: reading / writing raw bytes from the store
+# - codec: encoding / decoding chunks (compression, plus any other codecs)
+# - other: everything else e.g. copying chunks into / out of the full image, and library overhead
+PHASES = ("open", "io", "codec", "other")
+
+
+class PhaseTimer:
+    """Accumulates time spent in each phase of a benchmark round.
+
+    Nested phases are subtracted from time_remainder blocks using totals over all threads / async tasks, so this is
+    only accurate if chunks are processed one at a time. Backends therefore disable concurrency when given a
+    PhaseTimer - otherwise, time spent waiting for other tasks would be counted towards 'io' / 'codec', and the
+    'other' phase around them would be lost."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.durations = dict.fromkeys(PHASES, 0.0)
+
+    def _add(self, phase: str, duration: float) -> None:
+        with self._lock:
+            self.durations[phase] += duration
+
+    def _total(self) -> float:
+        with self._lock:
+            return sum(self.durations.values())
+
+    @contextlib.contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(phase, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def time_remainder(self, phase: str) -> Iterator[None]:
+        """Time a block, excluding any time recorded for other phases inside it (e.g. io and codec while reading an
+        array)."""
+        start = time.perf_counter()
+        start_total = self._total()
+        try:
+            yield
+        finally:
+            nested_duration = self._total() - start_total
+            duration = time.perf_counter() - start - nested_duration
+            self._add(phase, max(duration, 0.0))
+
+
+def time_phase(
+    phase_timer: PhaseTimer | None, phase: str
+) -> contextlib.AbstractContextManager:
+    """Time a block as phase, if a phase_timer is given"""
+    if phase_timer is None:
+        return contextlib.nullcontext()
+
+    return phase_timer.time(phase)
+
+
+def time_remainder(
+    phase_timer: PhaseTimer | None, phase: str
+) -> contextlib.AbstractContextManager:
+    """Time a block as phase (excluding other phases nested inside it), if a phase_timer is given"""
+    if phase_timer is None:
+        return contextlib.nullcontext()
+
+    return phase_timer.time_remainder(phase)
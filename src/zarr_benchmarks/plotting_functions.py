@@ -5,6 +5,16 @@ import pandas as pd
 import seaborn as sns
 from matplotlib import pyplot as plt
 
+# axis labels for columns where the default (capitalised column name) isn't readable
+CUSTOM_AXIS_LABELS = {
+    "throughput_mb_s": "Throughput (MB/s)",
+    "peak_rss_per_byte": "Peak RSS increase / image size",
+    "tracemalloc_peak_per_byte": "Peak traced memory / image size",
+    "cpu_utilisation": "CPU utilisation (CPU time / wall time)",
+    "throughput_mb_per_core_s": "Throughput (MB per core-second)",
+    "phase_time": "Mean time per round (s, summed over threads)",
+}
+
 
 def get_limits_custom(x_min: int, x_max: int, max_range: int) -> tuple[float, float]:
     central_value = (x_min + x_max) / 2
@@ -71,6 +81,10 @@ def plot_errorbars_benchmarks(
         size (str | None, optional): name of dataframe column to be used for size of datapoints. Defaults to None.
         col (str | None, optional): name of dataframe column to be used for splitting into subplots. Defaults to None.
     """
+    if data.empty:
+        print(f"Skipping plot {plot_name}, as no data")
+        return
+
     x_axis = "stats.mean"
     y_axis = "compression_ratio"
     if col is None:
@@ -149,6 +163,10 @@ def plot_relplot_benchmarks(
         size (str | None, optional): name of dataframe column to be used for size of datapoints. Defaults to None.
         col (str | None, optional): name of dataframe column to be used for splitting into subplots. Defaults to None.
     """
+    if data.empty:
+        print(f"Skipping plot {plot_name}, as no data")
+        return
+
     if col is None:
         facet_kws = {}
         col_wrap = None
@@ -211,7 +229,9 @@ def get_axis_labels(
 
     axis_labels = {}
     for axis in (x_axis, y_axis):
-        if axis.startswith("stats"):
+        if axis in CUSTOM_AXIS_LABELS:
+            axis_label = CUSTOM_AXIS_LABELS[axis]
+        elif axis.startswith("stats"):
             axis_label = f"{axis.split('.')[-1].capitalize()} {group[0]} time (s)"
         else:
             axis_label = axis.capitalize().replace("_", " ")
@@ -244,6 +264,7 @@ def plot_catplot_benchmarks(
     plot_name: str,
     title: str | None = None,
     hue: str | None = None,
+    col: str | None = None,
 ) -> None:
     """Generate a bar plot using seaborn's catplot function with a dataframe as input.
     Calls a function to save the plot as a PNG file.
@@ -257,7 +278,15 @@ def plot_catplot_benchmarks(
         plot_name (str): name of the plot which will be used for the start of the final filename
         title (str | None, optional): title of the plot. Defaults to None.
         hue (str | None, optional): name of dataframe column to be used for the colours in the plot. Defaults to None.
+        col (str | None, optional): name of dataframe column to be used for splitting into subplots. Defaults to None.
     """
+    if data.empty:
+        print(f"Skipping plot {plot_name}, as no data")
+        return
+
+    if col is not None:
+        plot_name = plot_name + "_subplots"
+
     # Before plotting, set the desired order
     if x_axis == "blosc_shuffle":
         data = data.copy()
@@ -271,6 +300,7 @@ def plot_catplot_benchmarks(
         x=x_axis,
         y=y_axis,
         hue=hue,
+        col=col,
         kind="bar",
         height=4,
         aspect=1.5,
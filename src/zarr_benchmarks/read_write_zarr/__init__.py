@@ -1,19 +1,131 @@
-from importlib.metadata import version
+import importlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from importlib.metadata import entry_points
 from importlib.util import find_spec
+from types import ModuleType
 
-# ruff: noqa: F401
+from zarr_benchmarks.utils import is_zarr_python_v2
 
-# Import either zarr-python v3, zarr-python v2 or tensorstore as read_write_zarr depending on available dependencies
-if find_spec("tensorstore"):
-    from zarr_benchmarks.read_write_zarr import (
-        read_write_tensorstore as read_write_zarr,
-    )
-else:
-    if version("zarr").split(".")[0] == "2":
-        from zarr_benchmarks.read_write_zarr import (  # type: ignore[no-redef]
-            read_write_zarr_python_v2 as read_write_zarr,
-        )
-    else:
-        from zarr_benchmarks.read_write_zarr import (  # type: ignore[no-redef]
-            read_write_zarr_python_v3 as read_write_zarr,
+# entry point group that external packages can use to register extra backends. Each entry point should load a Backend.
+BACKEND_ENTRY_POINT_GROUP = "zarr_benchmarks.backends"
+
+
+@dataclass(frozen=True)
+class Backend:
+    """A library that can read / write Zarr arrays.
+
+    Attributes:
+        name: name of the backend, used for the --backend option and in benchmark results.
+        module: import path of a module providing the same functions / parameters as the other backends e.g.
+            read_write_tensorstore (get_*_compressor, get_compression_ratio, read_zarr_array, write_zarr_array...)
+        is_available: returns whether the libraries needed by module are installed in the current environment.
+        zarr_specs: Zarr format versions the backend can read / write.
+        zarr_store: whether the backend writes a Zarr store (rather than e.g. an HDF5 file). Tests that check the
+            layout of chunk files are skipped if not.
+        parallel_writes: whether separate regions of one array can be written from several processes at once.
+    """
+
+    name: str
+    module: str
+    is_available: Callable[[], bool]
+    zarr_specs: tuple[int, ...] = (2, 3)
+    zarr_store: bool = True
+    parallel_writes: bool = True
+
+    def load(self) -> ModuleType:
+        return importlib.import_module(self.module)
+
+
+_backends: dict[str, Backend] = {}
+_entry_points_loaded = False
+
+
+def register_backend(backend: Backend) -> None:
+    """Register a backend, so it can be selected with --backend"""
+    if backend.name in _backends:
+        raise ValueError(f"A backend named {backend.name} is already registered")
+
+    _backends[backend.name] = backend
+
+
+def _load_entry_point_backends() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+
+    _entry_points_loaded = True
+    for entry_point in entry_points(group=BACKEND_ENTRY_POINT_GROUP):
+        register_backend(entry_point.load())
+
+
+def get_backend(name: str) -> Backend:
+    _load_entry_point_backends()
+    if name not in _backends:
+        raise ValueError(
+            f"Unknown backend {name}, expected one of {', '.join(_backends)}"
         )
+
+    return _backends[name]
+
+
+def get_available_backends() -> list[Backend]:
+    """Get all registered backends that are installed in the current environment, in order of registration"""
+    _load_entry_point_backends()
+    return [backend for backend in _backends.values() if backend.is_available()]
+
+
+def get_default_backend() -> Backend:
+    """Get the first available backend - tensorstore, then zarr-python (v2 or v3)"""
+    available_backends = get_available_backends()
+    if len(available_backends) == 0:
+        raise ImportError("No backends available - install tensorstore or zarr")
+
+    return available_backends[0]
+
+
+register_backend(
+    Backend(
+        name="tensorstore",
+        module="zarr_benchmarks.read_write_zarr.read_write_tensorstore",
+        is_available=lambda: find_spec("tensorstore") is not None,
+    )
+)
+register_backend(
+    Backend(
+        name="zarr_python_2",
+        module="zarr_benchmarks.read_write_zarr.read_write_zarr_python_v2",
+        is_available=is_zarr_python_v2,
+        zarr_specs=(2,),
+    )
+)
+register_backend(
+    Backend(
+        name="zarr_python_3",
+        module="zarr_benchmarks.read_write_zarr.read_write_zarr_python_v3",
+        is_available=lambda: find_spec("zarr") is not None and not is_zarr_python_v2(),
+    )
+)
+register_backend(
+    Backend(
+        name="numcodecs",
+        module="zarr_benchmarks.read_write_zarr.read_write_numcodecs",
+        is_available=lambda: find_spec("numcodecs") is not None,
+        zarr_specs=(2,),
+    )
+)
+register_backend(
+    Backend(
+        name="h5py",
+        module="zarr_benchmarks.read_write_zarr.read_write_h5py",
+        is_available=lambda: (
+            find_spec("h5py") is not None and find_spec("hdf5plugin") is not None
+        ),
+        zarr_specs=(2,),
+        zarr_store=False,
+        parallel_writes=False,
+    )
+)
+
+# Alias for the default backend, for code that only needs a single library e.g. fetching datasets
+read_write_zarr = get_default_backend().load()
@@ -0,0 +1,226 @@
+"""HDF5 backend, for comparing Zarr against HDF5 files written with h5py (+ compression filters from hdf5plugin).
+
+Each image is stored as a single chunked dataset, in a file inside store_path. As HDF5 has no equivalent to sharding,
+this runs with the same parameters as Zarr spec v2 (i.e. compression + chunk size only).
+"""
+
+import pathlib
+from collections.abc import Mapping
+from typing import Any, Literal
+
+import h5py
+import hdf5plugin
+import numpy as np
+import numpy.typing as npt
+
+from zarr_benchmarks import utils
+from zarr_benchmarks.phase_timing import PhaseTimer, time_remainder
+from zarr_benchmarks.selections import Region, get_write_slabs
+from zarr_benchmarks.store_scan import scan_store
+
+HDF5_FILE_NAME = "image.h5"
+DATASET_NAME = "image"
+
+# compressors are passed to h5py's create_dataset as keyword arguments i.e. {"compression": ..., "compression_opts": ...}
+Compressor = Mapping[str, Any]
+
+# blosc compressor names, in order of their code in the HDF5 filter settings
+_BLOSC_CNAMES = ["blosclz", "lz4", "lz4hc", "snappy", "zlib", "zstd"]
+_BLOSC_SHUFFLES = {
+    "noshuffle": hdf5plugin.Blosc.NOSHUFFLE,
+    "shuffle": hdf5plugin.Blosc.SHUFFLE,
+    "bitshuffle": hdf5plugin.Blosc.BITSHUFFLE,
+}
+
+
+def _get_file_path(store_path: pathlib.Path) -> pathlib.Path:
+    return store_path / HDF5_FILE_NAME
+
+
+def _get_compressor_config(dataset: h5py.Dataset) -> dict | None:
+    """Get the settings of the compression filter applied to dataset, in the same form as a Zarr v2 compressor"""
+    create_plist = dataset.id.get_create_plist()
+    for filter_index in range(create_plist.get_nfilters()):
+        filter_id, _, values, _ = create_plist.get_filter(filter_index)
+
+        if filter_id == h5py.h5z.FILTER_DEFLATE:
+            return {"id": "gzip", "level": values[0]}
+        if filter_id == hdf5plugin.ZSTD_ID:
+            return {"id": "zstd", "level": values[0]}
+        if filter_id == hdf5plugin.BLOSC_ID:
+            # blosc filter values are (reserved, version, typesize, chunk size, clevel, shuffle, compressor)
+            return {
+                "id": "blosc",
+                "cname": _BLOSC_CNAMES[values[6]],
+                "clevel": values[4],
+                "shuffle": values[5],
+            }
+
+    return None
+
+
+def get_zarr_v2_metadata(store_path: pathlib.Path) -> dict:
+    """Describe the HDF5 dataset in the same form as Zarr v2 metadata (a .zarray file), so it can be validated the
+    same way as arrays from other backends."""
+    with h5py.File(_get_file_path(store_path), "r") as f:
+        dataset = f[DATASET_NAME]
+        return {
+            "zarr_format": 2,
+            "shape": list(dataset.shape),
+            "chunks": list(dataset.chunks),
+            "dtype": dataset.dtype.str,
+            "compressor": _get_compressor_config(dataset),
+        }
+
+
+def get_compression_ratio(store_path: pathlib.Path, **_) -> float:
+    with h5py.File(_get_file_path(store_path), "r") as f:
+        nbytes = f[DATASET_NAME].nbytes
+
+    nbytes_stored = scan_store(store_path).nbytes_stored
+    return nbytes / nbytes_stored
+
+
+def open_zarr_array(store_path: pathlib.Path, **_) -> h5py.Dataset:
+    """Open the HDF5 dataset (read only). The file stays open until the dataset is garbage collected."""
+    return h5py.File(_get_file_path(store_path), "r")[DATASET_NAME]
+
+
+def read_zarr_array(
+    store_path: pathlib.Path,
+    phase_timer: PhaseTimer | None = None,
+    out: npt.NDArray | None = None,
+    **_,
+) -> npt.NDArray:
+    """Read with h5py. HDF5 decompresses chunks on a single thread, so concurrency has no effect. If out is given,
+    the image is read into it (rather than a newly allocated array) and out is returned."""
+    with time_remainder(phase_timer, "open"):
+        f = h5py.File(_get_file_path(store_path), "r")
+
+    with f, time_remainder(phase_timer, "other"):
+        if out is None:
+            return f[DATASET_NAME][:]
+
+        f[DATASET_NAME].read_direct(out)
+        return out
+
+
+def read_zarr_region(dataset: h5py.Dataset, region: Region) -> npt.NDArray:
+    return dataset[region]
+
+
+def create_zarr_array(
+    store_path: pathlib.Path,
+    *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: Compressor | None,
+    shards: None = None,
+    zarr_spec: Literal[2],
+    **_,
+) -> None:
+    """Create an HDF5 file containing an empty chunked dataset"""
+    _create_dataset(
+        store_path,
+        shape=shape,
+        dtype=dtype,
+        overwrite=overwrite,
+        chunks=chunks,
+        compressor=compressor,
+        shards=shards,
+    ).file.close()
+
+
+def _create_dataset(
+    store_path: pathlib.Path,
+    *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: Compressor | None,
+    shards: None,
+) -> h5py.Dataset:
+    if shards is not None:
+        raise ValueError("Sharding is not supported by HDF5")
+
+    if overwrite:
+        utils.remove_output_dir(store_path)
+
+    store_path.mkdir(parents=True)
+    f = h5py.File(_get_file_path(store_path), "w")
+
+    # HDF5 only allows chunks larger than the array for resizable datasets, while Zarr allows them for any array
+    return f.create_dataset(
+        DATASET_NAME,
+        shape=shape,
+        dtype=dtype,
+        chunks=chunks,
+        maxshape=(None,) * len(shape),
+        fillvalue=0,
+        **({} if compressor is None else compressor),
+    )
+
+
+def write_zarr_array(
+    image: npt.NDArray,
+    store_path: pathlib.Path,
+    *,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: Compressor | None,
+    shards: None = None,
+    zarr_spec: Literal[2],
+    write_empty_chunks: bool = True,
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+) -> None:
+    """Write with h5py. HDF5 compresses chunks on a single thread, so concurrency has no effect. HDF5 writes every
+    chunk, so write_empty_chunks also has no effect."""
+    with time_remainder(phase_timer, "open"):
+        dataset = _create_dataset(
+            store_path,
+            shape=image.shape,
+            dtype=image.dtype,
+            overwrite=overwrite,
+            chunks=chunks,
+            compressor=compressor,
+            shards=shards,
+        )
+
+    with dataset.file, time_remainder(phase_timer, "other"):
+        for slab in get_write_slabs(image, chunks):
+            dataset[slab] = image[slab]
+
+
+def write_zarr_region(
+    image_region: npt.NDArray,
+    store_path: pathlib.Path,
+    region: Region,
+    **_,
+) -> None:
+    """Write image_region into the given region of an existing dataset"""
+    with h5py.File(_get_file_path(store_path), "r+") as f:
+        f[DATASET_NAME][region] = image_region
+
+
+def get_blosc_compressor(
+    cname: str,
+    clevel: int,
+    shuffle: Literal["shuffle", "noshuffle", "bitshuffle"],
+    **_,
+) -> Compressor:
+    return hdf5plugin.Blosc(
+        cname=cname, clevel=clevel, shuffle=_BLOSC_SHUFFLES[shuffle]
+    )
+
+
+def get_gzip_compressor(level: int, **_) -> Compressor:
+    # gzip (deflate) is built in to HDF5, so doesn't need a filter from hdf5plugin
+    return {"compression": "gzip", "compression_opts": level}
+
+
+def get_zstd_compressor(level: int, **_) -> Compressor:
+    return hdf5plugin.Zstd(clevel=level)
@@ -0,0 +1,348 @@
+"""Baseline backend that bypasses Zarr libraries: the image is split into chunks with numpy, and each chunk is encoded
+with numcodecs directly and written to its own file. Comparing against this shows the overhead each Zarr library adds
+on top of the codecs themselves.
+
+Arrays are stored with the Zarr spec v2 layout (a .zarray metadata file + one file per chunk named e.g. '0.1.2'), so
+they can also be read by the other backends.
+"""
+
+import itertools
+import json
+import math
+import pathlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import numcodecs
+import numpy as np
+import numpy.typing as npt
+from numcodecs import Blosc, GZip, Zstd
+
+from zarr_benchmarks import utils
+from zarr_benchmarks.phase_timing import PhaseTimer, time_phase, time_remainder
+from zarr_benchmarks.read_write_zarr import read_write_zarr_python_utils
+from zarr_benchmarks.selections import Region, get_write_slabs
+from zarr_benchmarks.store_scan import scan_store
+
+FILL_VALUE = 0
+
+
+@dataclass(frozen=True)
+class ChunkedArray:
+    """An array stored as one file per chunk, opened with open_zarr_array"""
+
+    store_path: pathlib.Path
+    shape: tuple[int, ...]
+    dtype: np.dtype
+    chunks: tuple[int, ...]
+    compressor: numcodecs.abc.Codec | None
+    write_empty_chunks: bool = True
+
+
+def _map(
+    function: Callable,
+    items: Iterable,
+    concurrency: int | None,
+    phase_timer: PhaseTimer | None = None,
+) -> list[Any]:
+    """Apply function to each item - in a pool of concurrency threads, or serially if concurrency is None. If
+    phase_timer is given, items are always processed serially, as phases timed in concurrent threads would add up to
+    more than the wall time (and the 'other' phase around them would be lost)."""
+    if concurrency is None or phase_timer is not None:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(function, items))
+
+
+def _get_chunk_indices(array: ChunkedArray, region: Region) -> list[tuple[int, ...]]:
+    """Indices of all chunks that overlap region"""
+    index_ranges = [
+        range(s.start // chunk, math.ceil(s.stop / chunk))
+        for s, chunk in zip(region, array.chunks)
+    ]
+    return list(itertools.product(*index_ranges))
+
+
+def _get_chunk_path(array: ChunkedArray, chunk_index: tuple[int, ...]) -> pathlib.Path:
+    return array.store_path / ".".join(str(index) for index in chunk_index)
+
+
+def _get_overlap(
+    array: ChunkedArray, chunk_index: tuple[int, ...], region: Region
+) -> tuple[Region, Region]:
+    """Get the overlap of a chunk with region, as a selection within the chunk and a selection within the region"""
+    chunk_selection = []
+    region_selection = []
+    for index, chunk, s in zip(chunk_index, array.chunks, region):
+        start = max(index * chunk, s.start)
+        stop = min((index + 1) * chunk, s.stop)
+        chunk_selection.append(slice(start - index * chunk, stop - index * chunk))
+        region_selection.append(slice(start - s.start, stop - s.start))
+
+    return tuple(chunk_selection), tuple(region_selection)
+
+
+def _read_chunk(
+    array: ChunkedArray,
+    chunk_index: tuple[int, ...],
+    phase_timer: PhaseTimer | None,
+) -> npt.NDArray | None:
+    """Read and decode a single chunk, or None if it doesn't exist (i.e. is all fill value)"""
+    chunk_path = _get_chunk_path(array, chunk_index)
+    with time_phase(phase_timer, "io"):
+        if not chunk_path.exists():
+            return None
+        encoded_chunk = chunk_path.read_bytes()
+
+    with time_phase(phase_timer, "codec"):
+        if array.compressor is None:
+            chunk = np.frombuffer(encoded_chunk, dtype=array.dtype)
+        else:
+            chunk = np.empty(array.chunks, dtype=array.dtype)
+            array.compressor.decode(encoded_chunk, out=chunk)
+
+    return chunk.reshape(array.chunks)
+
+
+def _write_chunk(
+    array: ChunkedArray,
+    chunk_index: tuple[int, ...],
+    chunk: npt.NDArray,
+    phase_timer: PhaseTimer | None,
+) -> None:
+    """Encode and write a single (full size) chunk"""
+    chunk_path = _get_chunk_path(array, chunk_index)
+    if not array.write_empty_chunks and not chunk.any():
+        with time_phase(phase_timer, "io"):
+            chunk_path.unlink(missing_ok=True)
+        return
+
+    with time_phase(phase_timer, "codec"):
+        if array.compressor is None:
+            encoded_chunk = chunk.tobytes()
+        else:
+            encoded_chunk = array.compressor.encode(chunk)
+
+    with time_phase(phase_timer, "io"):
+        chunk_path.write_bytes(encoded_chunk)
+
+
+def _read_region_into(
+    array: ChunkedArray,
+    region: Region,
+    out: npt.NDArray,
+    concurrency: int | None,
+    phase_timer: PhaseTimer | None,
+) -> None:
+    def read_chunk_into(chunk_index: tuple[int, ...]) -> None:
+        chunk = _read_chunk(array, chunk_index, phase_timer)
+        chunk_selection, out_selection = _get_overlap(array, chunk_index, region)
+        if chunk is None:
+            out[out_selection] = FILL_VALUE
+        else:
+            out[out_selection] = chunk[chunk_selection]
+
+    _map(read_chunk_into, _get_chunk_indices(array, region), concurrency, phase_timer)
+
+
+def _write_region_from(
+    array: ChunkedArray,
+    region: Region,
+    image_region: npt.NDArray,
+    concurrency: int | None,
+    phase_timer: PhaseTimer | None,
+) -> None:
+    def write_chunk_from(chunk_index: tuple[int, ...]) -> None:
+        chunk_selection, region_selection = _get_overlap(array, chunk_index, region)
+        chunk_region = _get_overlap(
+            array,
+            chunk_index,
+            tuple(slice(0, dim_size) for dim_size in array.shape),
+        )[0]
+
+        if chunk_selection == chunk_region:
+            # region covers the whole of this chunk (edge chunks are padded with the fill value)
+            chunk = np.full(array.chunks, FILL_VALUE, dtype=array.dtype)
+        else:
+            chunk = _read_chunk(array, chunk_index, phase_timer)
+            if chunk is None:
+                chunk = np.full(array.chunks, FILL_VALUE, dtype=array.dtype)
+            else:
+                chunk = chunk.copy()
+
+        chunk[chunk_selection] = image_region[region_selection]
+        _write_chunk(array, chunk_index, chunk, phase_timer)
+
+    _map(write_chunk_from, _get_chunk_indices(array, region), concurrency, phase_timer)
+
+
+def get_compression_ratio(store_path: pathlib.Path, **_) -> float:
+    array = open_zarr_array(store_path)
+    nbytes = math.prod(array.shape) * array.dtype.itemsize
+    nbytes_stored = scan_store(store_path).nbytes_stored
+    return nbytes / nbytes_stored
+
+
+def open_zarr_array(
+    store_path: pathlib.Path, write_empty_chunks: bool = True, **_
+) -> ChunkedArray:
+    metadata = utils.read_json_file(store_path / ".zarray")
+    if metadata["compressor"] is None:
+        compressor = None
+    else:
+        compressor = numcodecs.get_codec(metadata["compressor"])
+
+    return ChunkedArray(
+        store_path=store_path,
+        shape=tuple(metadata["shape"]),
+        dtype=np.dtype(metadata["dtype"]),
+        chunks=tuple(metadata["chunks"]),
+        compressor=compressor,
+        write_empty_chunks=write_empty_chunks,
+    )
+
+
+def read_zarr_array(
+    store_path: pathlib.Path,
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+    out: npt.NDArray | None = None,
+    **_,
+) -> npt.NDArray:
+    """Read every chunk with numcodecs. concurrency sets the number of threads reading / decoding chunks (None, or
+    timing phases, reads them one at a time). If out is given, the image is read into it (rather than a newly allocated array) and out is
+    returned."""
+    with time_remainder(phase_timer, "open"):
+        array = open_zarr_array(store_path)
+
+    with time_remainder(phase_timer, "other"):
+        if out is None:
+            read_image = np.empty(array.shape, dtype=array.dtype)
+        else:
+            read_image = out
+        region = tuple(slice(0, dim_size) for dim_size in array.shape)
+        _read_region_into(array, region, read_image, concurrency, phase_timer)
+
+    return read_image
+
+
+def read_zarr_region(array: ChunkedArray, region: Region) -> npt.NDArray:
+    region_shape = tuple(s.stop - s.start for s in region)
+    read_region = np.empty(region_shape, dtype=array.dtype)
+    _read_region_into(array, region, read_region, concurrency=None, phase_timer=None)
+    return read_region
+
+
+def create_zarr_array(
+    store_path: pathlib.Path,
+    *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: numcodecs.abc.Codec | None,
+    shards: None = None,
+    write_empty_chunks: bool = True,
+    zarr_spec: Literal[2],
+    **_,
+) -> ChunkedArray:
+    """Create an empty array, by writing its .zarray metadata file"""
+    if shards is not None:
+        raise ValueError("Sharding is not supported by the numcodecs baseline")
+
+    if zarr_spec != 2:
+        raise ValueError("The numcodecs baseline only writes the Zarr spec v2 layout")
+
+    if overwrite:
+        utils.remove_output_dir(store_path)
+
+    store_path.mkdir(parents=True)
+    metadata = {
+        "zarr_format": 2,
+        "shape": list(shape),
+        "chunks": list(chunks),
+        "dtype": np.dtype(dtype).str,
+        "compressor": None if compressor is None else compressor.get_config(),
+        "fill_value": FILL_VALUE,
+        "order": "C",
+        "filters": None,
+        "dimension_separator": ".",
+    }
+    with open(store_path / ".zarray", "w") as f:
+        json.dump(metadata, f, indent=4)
+
+    return ChunkedArray(
+        store_path=store_path,
+        shape=tuple(shape),
+        dtype=np.dtype(dtype),
+        chunks=tuple(chunks),
+        compressor=compressor,
+        write_empty_chunks=write_empty_chunks,
+    )
+
+
+def write_zarr_array(
+    image: npt.NDArray,
+    store_path: pathlib.Path,
+    *,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: numcodecs.abc.Codec | None,
+    shards: None = None,
+    zarr_spec: Literal[2],
+    write_empty_chunks: bool = True,
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+) -> None:
+    """Write every chunk with numcodecs. concurrency sets the number of threads encoding / writing chunks (None, or
+    timing phases, writes them one at a time)."""
+    with time_remainder(phase_timer, "open"):
+        array = create_zarr_array(
+            store_path,
+            shape=image.shape,
+            dtype=image.dtype,
+            overwrite=overwrite,
+            chunks=chunks,
+            compressor=compressor,
+            shards=shards,
+            write_empty_chunks=write_empty_chunks,
+            zarr_spec=zarr_spec,
+        )
+
+    with time_remainder(phase_timer, "other"):
+        for slab in get_write_slabs(image, chunks):
+            _write_region_from(array, slab, image[slab], concurrency, phase_timer)
+
+
+def write_zarr_region(
+    image_region: npt.NDArray,
+    store_path: pathlib.Path,
+    region: Region,
+    *,
+    write_empty_chunks: bool = True,
+    **_,
+) -> None:
+    """Write image_region into the given region of an existing array"""
+    array = open_zarr_array(store_path, write_empty_chunks=write_empty_chunks)
+    _write_region_from(array, region, image_region, concurrency=None, phase_timer=None)
+
+
+def get_blosc_compressor(
+    cname: str,
+    clevel: int,
+    shuffle: Literal["shuffle", "noshuffle", "bitshuffle"],
+    **_,
+) -> numcodecs.abc.Codec:
+    shuffle_int = read_write_zarr_python_utils.get_numcodec_shuffle(shuffle)
+    return Blosc(cname=cname, clevel=clevel, shuffle=shuffle_int)
+
+
+def get_gzip_compressor(level: int, **_) -> numcodecs.abc.Codec:
+    return GZip(level=level)
+
+
+def get_zstd_compressor(level: int, **_) -> numcodecs.abc.Codec:
+    return Zstd(level=level)
@@ -1,22 +1,42 @@
 import pathlib
 from typing import Literal
 
+import numpy as np
 import numpy.typing as npt
 import tensorstore as ts
 
 from zarr_benchmarks import utils
+from zarr_benchmarks.phase_timing import PhaseTimer, time_remainder
+from zarr_benchmarks.selections import get_write_slabs
+from zarr_benchmarks.store_scan import scan_store
 
 
 def get_compression_ratio(store_path: pathlib.Path, zarr_spec: Literal[2, 3]) -> float:
-    zarr_array = _open_zarr_array(store_path, zarr_spec)
+    zarr_array = open_zarr_array(store_path, zarr_spec)
     item_size = zarr_array.dtype.numpy_dtype.itemsize
     nbytes = item_size * zarr_array.size
-    nbytes_stored = utils.get_directory_size(store_path)
+    nbytes_stored = scan_store(store_path).nbytes_stored
     return nbytes / nbytes_stored
 
 
-def _open_zarr_array(
-    store_path: pathlib.Path, zarr_spec: Literal[2, 3]
+def _get_context(concurrency: int | None) -> ts.Context | None:
+    """Get a tensorstore context that limits the number of threads used for copying / encoding / decoding data and
+    for file I/O. None uses tensorstore's default limits."""
+    if concurrency is None:
+        return None
+
+    return ts.Context(
+        {
+            "data_copy_concurrency": {"limit": concurrency},
+            "file_io_concurrency": {"limit": concurrency},
+        }
+    )
+
+
+def open_zarr_array(
+    store_path: pathlib.Path,
+    zarr_spec: Literal[2, 3],
+    concurrency: int | None = None,
 ) -> ts.TensorStore:
     if zarr_spec == 2:
         driver = "zarr"
@@ -31,25 +51,51 @@ def _open_zarr_array(
                 "path": str(store_path.resolve()),
             },
         },
+        context=_get_context(concurrency),
     ).result()
 
 
-def read_zarr_array(store_path: pathlib.Path, zarr_spec: Literal[2, 3]) -> npt.NDArray:
-    """Read the v2/v3 zarr spec with tensorstore"""
-    zarr_read = _open_zarr_array(store_path, zarr_spec)
-    read_image = zarr_read[:].read().result()
+def read_zarr_array(
+    store_path: pathlib.Path,
+    zarr_spec: Literal[2, 3],
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+    out: npt.NDArray | None = None,
+) -> npt.NDArray:
+    """Read the v2/v3 zarr spec with tensorstore. If phase_timer is given, only opening the array can be timed
+    separately - I/O and codecs run inside tensorstore, so are recorded under 'other'. If out is given, the image is
+    read into it (rather than a newly allocated array) and out is returned."""
+    with time_remainder(phase_timer, "open"):
+        zarr_read = open_zarr_array(store_path, zarr_spec, concurrency)
+    with time_remainder(phase_timer, "other"):
+        if out is None:
+            read_image = zarr_read[:].read().result()
+        else:
+            # tensorstore can't read into an existing array, but can write to one wrapped (without a copy) as a
+            # TensorStore
+            ts.array(out, copy=False, write=True).write(zarr_read).result()
+            read_image = out
     return read_image
 
 
-def _write_zarr_array_v2(
-    image: npt.NDArray,
+def read_zarr_region(
+    zarr_array: ts.TensorStore, region: tuple[slice, ...]
+) -> npt.NDArray:
+    """Read a region of an already opened tensorstore array"""
+    return zarr_array[region].read().result()
+
+
+def _create_zarr_array_v2(
     store_path: pathlib.Path,
     *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
     chunks: tuple[int],
     compressor: dict | None,
     write_empty_chunks: bool = True,
-) -> None:
-    dataset = ts.open(
+    concurrency: int | None = None,
+) -> ts.TensorStore:
+    return ts.open(
         {
             "driver": "zarr",
             "kvstore": {
@@ -57,8 +103,8 @@ def _write_zarr_array_v2(
                 "path": str(store_path.resolve()),
             },
             "metadata": {
-                "dtype": image.dtype.str,
-                "shape": image.shape,
+                "dtype": dtype.str,
+                "shape": shape,
                 "chunks": chunks,
                 "compressor": compressor,
                 "fill_value": 0,
@@ -67,21 +113,50 @@ def _write_zarr_array_v2(
             "delete_existing": False,
             "store_data_equal_to_fill_value": write_empty_chunks,
         },
+        context=_get_context(concurrency),
     ).result()
 
-    write_future = dataset[:].write(image)
-    write_future.result()
 
+def _get_codecs_v3(
+    chunks: tuple[int], compressor: dict | None, shards: tuple[int] | None
+) -> list[dict]:
+    """Get the zarr v3 codec chain. If shards are given, the codecs are nested inside a sharding_indexed codec, with
+    chunks as the inner chunk shape."""
+    codecs = [{"name": "bytes", "configuration": {"endian": "little"}}]
+    if compressor is not None:
+        codecs.append(compressor)
 
-def _write_zarr_array_v3(
-    image: npt.NDArray,
+    if shards is None:
+        return codecs
+
+    return [
+        {
+            "name": "sharding_indexed",
+            "configuration": {
+                "chunk_shape": chunks,
+                "codecs": codecs,
+                "index_codecs": [
+                    {"name": "bytes", "configuration": {"endian": "little"}},
+                    {"name": "crc32c"},
+                ],
+                "index_location": "end",
+            },
+        }
+    ]
+
+
+def _create_zarr_array_v3(
     store_path: pathlib.Path,
     *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
     chunks: tuple[int],
     compressor: dict | None,
+    shards: tuple[int] | None = None,
     write_empty_chunks: bool = True,
-) -> None:
-    dataset = ts.open(
+    concurrency: int | None = None,
+) -> ts.TensorStore:
+    return ts.open(
         {
             "driver": "zarr3",
             "kvstore": {
@@ -91,64 +166,136 @@ def _write_zarr_array_v3(
             "metadata": {
                 "zarr_format": 3,
                 "node_type": "array",
-                "data_type": str(image.dtype),
-                "shape": image.shape,
+                "data_type": str(dtype),
+                "shape": shape,
                 "chunk_grid": {
                     "name": "regular",
-                    "configuration": {"chunk_shape": chunks},
+                    "configuration": {
+                        "chunk_shape": chunks if shards is None else shards
+                    },
                 },
-                "codecs": (
-                    [
-                        {"name": "bytes", "configuration": {"endian": "little"}},
-                        compressor,
-                    ]
-                    if compressor is not None
-                    else [{"name": "bytes", "configuration": {"endian": "little"}}]
-                ),
+                "codecs": _get_codecs_v3(chunks, compressor, shards),
                 "fill_value": 0,
             },
             "create": True,
             "delete_existing": False,
             "store_data_equal_to_fill_value": write_empty_chunks,
         },
+        context=_get_context(concurrency),
     ).result()
 
-    write_future = dataset[:].write(image)
-    write_future.result()
-
 
-def write_zarr_array(
-    image: npt.NDArray,
+def create_zarr_array(
     store_path: pathlib.Path,
     *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
     overwrite: bool,
     chunks: tuple[int],
     compressor: dict | None,
+    shards: tuple[int] | None = None,
     write_empty_chunks: bool = True,
     zarr_spec: Literal[2, 3],
-) -> None:
-    """Write the v2/v3 zarr spec with tensorstore"""
+    concurrency: int | None = None,
+) -> ts.TensorStore:
+    """Create an empty v2/v3 zarr array with tensorstore. If shards is given, chunks are stored inside shards of
+    this shape with the sharding_indexed codec (zarr spec v3 only). concurrency limits the threads used for encoding
+    and file I/O (None uses tensorstore's defaults)."""
+    if shards is not None and zarr_spec == 2:
+        raise ValueError("Sharding is not supported by zarr spec v2")
+
     if overwrite:
         utils.remove_output_dir(store_path)
 
     if zarr_spec == 2:
-        _write_zarr_array_v2(
-            image,
+        return _create_zarr_array_v2(
             store_path,
+            shape=shape,
+            dtype=dtype,
             chunks=chunks,
             compressor=compressor,
             write_empty_chunks=write_empty_chunks,
+            concurrency=concurrency,
         )
     else:
-        _write_zarr_array_v3(
-            image,
+        return _create_zarr_array_v3(
             store_path,
+            shape=shape,
+            dtype=dtype,
             chunks=chunks,
             compressor=compressor,
+            shards=shards,
             write_empty_chunks=write_empty_chunks,
+            concurrency=concurrency,
         )
 
 
+def write_zarr_array(
+    image: npt.NDArray,
+    store_path: pathlib.Path,
+    *,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: dict | None,
+    shards: tuple[int] | None = None,
+    write_empty_chunks: bool = True,
+    zarr_spec: Literal[2, 3],
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+) -> None:
+    """Write the v2/v3 zarr spec with tensorstore. See create_zarr_array for details of the parameters. If
+    phase_timer is given, only creating the array can be timed separately (as in read_zarr_array)."""
+    with time_remainder(phase_timer, "open"):
+        dataset = create_zarr_array(
+            store_path,
+            shape=image.shape,
+            dtype=image.dtype,
+            overwrite=overwrite,
+            chunks=chunks,
+            compressor=compressor,
+            shards=shards,
+            write_empty_chunks=write_empty_chunks,
+            zarr_spec=zarr_spec,
+            concurrency=concurrency,
+        )
+
+    with time_remainder(phase_timer, "other"):
+        for slab in get_write_slabs(image, chunks if shards is None else shards):
+            write_future = dataset[slab].write(image[slab])
+            write_future.result()
+
+
+def write_zarr_region(
+    image_region: npt.NDArray,
+    store_path: pathlib.Path,
+    region: tuple[slice, ...],
+    *,
+    write_empty_chunks: bool = True,
+    zarr_spec: Literal[2, 3],
+) -> None:
+    """Write image_region into the given region of an existing v2/v3 zarr array with tensorstore"""
+    if zarr_spec == 2:
+        driver = "zarr"
+    else:
+        driver = "zarr3"
+
+    dataset = ts.open(
+        {
+            "driver": driver,
+            "kvstore": {
+                "driver": "file",
+                "path": str(store_path.resolve()),
+            },
+            "store_data_equal_to_fill_value": write_empty_chunks,
+        },
+        open=True,
+        write=True,
+    ).result()
+
+    write_future = dataset[region].write(image_region)
+    write_future.result()
+
+
 def get_blosc_compressor(
     cname: str,
     clevel: int,
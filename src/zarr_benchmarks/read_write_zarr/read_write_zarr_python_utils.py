@@ -1,6 +1,11 @@
+import contextlib
+from collections.abc import Iterator
 from typing import Literal
 
 import numcodecs
+from numcodecs import blosc
+
+from zarr_benchmarks.store_scan import METADATA_FILE_NAMES
 
 
 def get_numcodec_shuffle(shuffle: Literal["shuffle", "noshuffle", "bitshuffle"]) -> int:
@@ -13,3 +18,22 @@ def get_numcodec_shuffle(shuffle: Literal["shuffle", "noshuffle", "bitshuffle"])
             return numcodecs.Blosc.BITSHUFFLE
         case _:
             raise ValueError(f"invalid shuffle value for blosc {shuffle}")
+
+
+@contextlib.contextmanager
+def blosc_nthreads(nthreads: int | None) -> Iterator[None]:
+    """Temporarily set the number of threads used by blosc inside numcodecs. None leaves the current setting."""
+    if nthreads is None:
+        yield
+        return
+
+    previous_nthreads = blosc.set_nthreads(nthreads)
+    try:
+        yield
+    finally:
+        blosc.set_nthreads(previous_nthreads)
+
+
+def is_metadata_key(key: str) -> bool:
+    """Whether a store key is a metadata file (rather than a chunk), e.g. 'zarr.json' or 'group/.zarray'"""
+    return key.rsplit("/", 1)[-1] in METADATA_FILE_NAMES
@@ -1,13 +1,88 @@
+import contextlib
 import pathlib
-from typing import Literal
+from collections.abc import Iterator, MutableMapping
+from typing import Any, Literal
 
 import numcodecs
+import numpy as np
 import numpy.typing as npt
 import zarr
 from numcodecs import Blosc, GZip, Zstd
 
 from zarr_benchmarks import utils
+from zarr_benchmarks.phase_timing import PhaseTimer, time_remainder
 from zarr_benchmarks.read_write_zarr import read_write_zarr_python_utils
+from zarr_benchmarks.selections import get_write_slabs
+
+
+class _TimedStore(MutableMapping):
+    """Wraps a zarr store, recording time spent reading / writing chunks as the 'io' phase. Metadata files aren't
+    timed, so they count towards the phase around them (i.e. 'open')."""
+
+    def __init__(self, store: MutableMapping, phase_timer: PhaseTimer) -> None:
+        self._store = store
+        self._phase_timer = phase_timer
+
+    def _time(self, key: object) -> contextlib.AbstractContextManager:
+        if isinstance(key, str) and read_write_zarr_python_utils.is_metadata_key(key):
+            return contextlib.nullcontext()
+
+        return self._phase_timer.time("io")
+
+    def __getitem__(self, key: str) -> Any:
+        with self._time(key):
+            return self._store[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._time(key):
+            self._store[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        with self._time(key):
+            del self._store[key]
+
+    def __contains__(self, key: object) -> bool:
+        with self._time(key):
+            return key in self._store
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+
+class _TimedCodec:
+    """Wraps a numcodecs codec, recording time spent encoding / decoding as the 'codec' phase"""
+
+    def __init__(self, codec: numcodecs.abc.Codec, phase_timer: PhaseTimer) -> None:
+        self._codec = codec
+        self._phase_timer = phase_timer
+
+    def encode(self, buf: Any) -> Any:
+        with self._phase_timer.time("codec"):
+            return self._codec.encode(buf)
+
+    def decode(self, buf: Any, out: Any = None) -> Any:
+        with self._phase_timer.time("codec"):
+            return self._codec.decode(buf, out)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._codec, name)
+
+
+def _get_store(
+    store_path: pathlib.Path, phase_timer: PhaseTimer | None
+) -> pathlib.Path | MutableMapping:
+    if phase_timer is None:
+        return store_path
+
+    return _TimedStore(zarr.storage.DirectoryStore(store_path), phase_timer)
+
+
+def _time_compressor(zarr_array: zarr.Array, phase_timer: PhaseTimer | None) -> None:
+    if phase_timer is not None and zarr_array.compressor is not None:
+        zarr_array._compressor = _TimedCodec(zarr_array.compressor, phase_timer)
 
 
 def get_compression_ratio(store_path: pathlib.Path, **_) -> float:
@@ -17,37 +92,121 @@ def get_compression_ratio(store_path: pathlib.Path, **_) -> float:
     return compression_ratio
 
 
-def read_zarr_array(store_path: pathlib.Path, **_) -> npt.NDArray:
-    zarr_read = zarr.open_array(store_path, mode="r")
-    read_image = zarr_read[:]
+def open_zarr_array(
+    store_path: pathlib.Path, phase_timer: PhaseTimer | None = None, **_
+) -> zarr.Array:
+    """Open a zarr array for reading. If phase_timer is given, time spent on io and codecs is recorded."""
+    zarr_array = zarr.open_array(_get_store(store_path, phase_timer), mode="r")
+    _time_compressor(zarr_array, phase_timer)
+    return zarr_array
+
+
+def read_zarr_array(
+    store_path: pathlib.Path,
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+    out: npt.NDArray | None = None,
+    **_,
+) -> npt.NDArray:
+    """Read with zarr-python v2. concurrency sets the number of blosc threads (other codecs are single-threaded). If
+    out is given, the image is read into it (rather than a newly allocated array) and out is returned."""
+    with read_write_zarr_python_utils.blosc_nthreads(concurrency):
+        with time_remainder(phase_timer, "open"):
+            zarr_read = open_zarr_array(store_path, phase_timer)
+        with time_remainder(phase_timer, "other"):
+            if out is None:
+                read_image = zarr_read[:]
+            else:
+                zarr_read.get_basic_selection(Ellipsis, out=out)
+                read_image = out
     return read_image
 
 
-def write_zarr_array(
-    image: npt.NDArray,
+def read_zarr_region(zarr_array: zarr.Array, region: tuple[slice, ...]) -> npt.NDArray:
+    return zarr_array[region]
+
+
+def create_zarr_array(
     store_path: pathlib.Path,
     *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
     overwrite: bool,
     chunks: tuple[int],
     compressor: numcodecs.abc.Codec | None,
+    shards: None = None,
     zarr_spec: Literal[2],
     write_empty_chunks: bool = True,
-) -> None:
+    phase_timer: PhaseTimer | None = None,
+) -> zarr.Array:
+    """Create an empty zarr array. If phase_timer is given, time spent on io and codecs is recorded."""
+    if shards is not None:
+        raise ValueError("Sharding is not supported by zarr-python v2")
+
     if overwrite:
         utils.remove_output_dir(store_path)
 
     zarr_array = zarr.open_array(
-        store=store_path,
+        store=_get_store(store_path, phase_timer),
         mode="w-",
-        shape=image.shape,
+        shape=shape,
         chunks=chunks,
-        dtype=image.dtype,
+        dtype=dtype,
         compressor=compressor,
         zarr_version=zarr_spec,
         fill_value=0,
         write_empty_chunks=write_empty_chunks,
     )
-    zarr_array[:] = image
+    _time_compressor(zarr_array, phase_timer)
+    return zarr_array
+
+
+def write_zarr_array(
+    image: npt.NDArray,
+    store_path: pathlib.Path,
+    *,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: numcodecs.abc.Codec | None,
+    shards: None = None,
+    zarr_spec: Literal[2],
+    write_empty_chunks: bool = True,
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+) -> None:
+    """Write with zarr-python v2. concurrency sets the number of blosc threads (other codecs are single-threaded)."""
+    with time_remainder(phase_timer, "open"):
+        zarr_array = create_zarr_array(
+            store_path,
+            shape=image.shape,
+            dtype=image.dtype,
+            overwrite=overwrite,
+            chunks=chunks,
+            compressor=compressor,
+            shards=shards,
+            zarr_spec=zarr_spec,
+            write_empty_chunks=write_empty_chunks,
+            phase_timer=phase_timer,
+        )
+    with read_write_zarr_python_utils.blosc_nthreads(concurrency):
+        with time_remainder(phase_timer, "other"):
+            for slab in get_write_slabs(image, chunks):
+                zarr_array[slab] = image[slab]
+
+
+def write_zarr_region(
+    image_region: npt.NDArray,
+    store_path: pathlib.Path,
+    region: tuple[slice, ...],
+    *,
+    write_empty_chunks: bool = True,
+    **_,
+) -> None:
+    """Write image_region into the given region of an existing zarr array"""
+    zarr_array = zarr.open_array(
+        store_path, mode="r+", write_empty_chunks=write_empty_chunks
+    )
+    zarr_array[region] = image_region
 
 
 def get_blosc_compressor(
@@ -1,13 +1,100 @@
+import contextlib
 import pathlib
+from dataclasses import dataclass
 from typing import Any, Literal
 
+import numpy as np
 import numpy.typing as npt
 import zarr
 from numcodecs import Blosc, GZip, Zstd
+from zarr.abc.store import ByteRequest, Store
 from zarr.codecs import BloscCodec, GzipCodec, ZstdCodec
+from zarr.core.buffer import Buffer, BufferPrototype, default_buffer_prototype
+from zarr.core.codec_pipeline import BatchedCodecPipeline
+from zarr.storage import LocalStore, WrapperStore
 
 from zarr_benchmarks import utils
+from zarr_benchmarks.phase_timing import PhaseTimer, time_remainder
 from zarr_benchmarks.read_write_zarr import read_write_zarr_python_utils
+from zarr_benchmarks.selections import get_write_slabs
+
+
+class _TimedStore(WrapperStore):
+    """Wraps a zarr store, recording time spent reading / writing chunks as the 'io' phase. Metadata files aren't
+    timed, so they count towards the phase around them (i.e. 'open')."""
+
+    def __init__(self, store: Store, phase_timer: PhaseTimer) -> None:
+        super().__init__(store)
+        self._phase_timer = phase_timer
+
+    def _time(self, key: str) -> contextlib.AbstractContextManager:
+        if read_write_zarr_python_utils.is_metadata_key(key):
+            return contextlib.nullcontext()
+
+        return self._phase_timer.time("io")
+
+    async def get(
+        self,
+        key: str,
+        prototype: BufferPrototype,
+        byte_range: ByteRequest | None = None,
+    ) -> Buffer | None:
+        with self._time(key):
+            return await self._store.get(key, prototype, byte_range)
+
+    async def set(self, key: str, value: Buffer) -> None:
+        with self._time(key):
+            await self._store.set(key, value)
+
+
+@dataclass(frozen=True)
+class _TimedCodecPipeline(BatchedCodecPipeline):
+    """Codec pipeline that records time spent encoding / decoding as the 'codec' phase. Sharded arrays read / write
+    inner chunks from inside the codecs, so time recorded as 'io' is excluded."""
+
+    phase_timer: PhaseTimer | None = None
+
+    async def decode_batch(self, *args, **kwargs) -> Any:
+        with time_remainder(self.phase_timer, "codec"):
+            return await super().decode_batch(*args, **kwargs)
+
+    async def decode_partial_batch(self, *args, **kwargs) -> Any:
+        with time_remainder(self.phase_timer, "codec"):
+            return await super().decode_partial_batch(*args, **kwargs)
+
+    async def encode_batch(self, *args, **kwargs) -> Any:
+        with time_remainder(self.phase_timer, "codec"):
+            return await super().encode_batch(*args, **kwargs)
+
+    async def encode_partial_batch(self, *args, **kwargs) -> Any:
+        with time_remainder(self.phase_timer, "codec"):
+            return await super().encode_partial_batch(*args, **kwargs)
+
+
+def _get_store(
+    store_path: pathlib.Path, phase_timer: PhaseTimer | None, read_only: bool
+) -> pathlib.Path | Store:
+    if phase_timer is None:
+        return store_path
+
+    return _TimedStore(LocalStore(store_path, read_only=read_only), phase_timer)
+
+
+def _time_codecs(zarr_array: zarr.Array, phase_timer: PhaseTimer | None) -> None:
+    if phase_timer is None:
+        return
+
+    async_array = zarr_array._async_array
+    codec_pipeline = async_array.codec_pipeline
+    timed_codec_pipeline = _TimedCodecPipeline(
+        array_array_codecs=codec_pipeline.array_array_codecs,
+        array_bytes_codec=codec_pipeline.array_bytes_codec,
+        bytes_bytes_codecs=codec_pipeline.bytes_bytes_codecs,
+        batch_size=codec_pipeline.batch_size,
+        phase_timer=phase_timer,
+    )
+    # the array is a frozen dataclass, so can't be assigned to normally
+    object.__setattr__(async_array, "codec_pipeline", timed_codec_pipeline)
 
 
 def get_compression_ratio(store_path: pathlib.Path, **_) -> float:
@@ -17,36 +104,138 @@ def get_compression_ratio(store_path: pathlib.Path, **_) -> float:
     return compression_ratio
 
 
-def read_zarr_array(store_path: pathlib.Path, **_) -> npt.NDArray:
-    zarr_read = zarr.open_array(store_path, mode="r")
-    read_image = zarr_read[:]
+def open_zarr_array(
+    store_path: pathlib.Path, phase_timer: PhaseTimer | None = None, **_
+) -> zarr.Array:
+    """Open a zarr array for reading. If phase_timer is given, time spent on io and codecs is recorded."""
+    zarr_array = zarr.open_array(
+        _get_store(store_path, phase_timer, read_only=True), mode="r"
+    )
+    _time_codecs(zarr_array, phase_timer)
+    return zarr_array
+
+
+def _concurrency_config(
+    concurrency: int | None, phase_timer: PhaseTimer | None
+) -> contextlib.AbstractContextManager:
+    """Temporarily set the maximum number of concurrent chunk operations (async.concurrency). None uses zarr's
+    default. Note: the size of zarr's thread pool (threading.max_workers) is fixed once it is created, so isn't set
+    here.
+
+    If phase_timer is given, chunks are processed one at a time: timing concurrent tasks would count time spent
+    waiting for other tasks towards each phase, and the nested phases could add up to more than the wall time."""
+    if phase_timer is not None:
+        concurrency = 1
+
+    if concurrency is None:
+        return contextlib.nullcontext()
+
+    return zarr.config.set({"async.concurrency": concurrency})
+
+
+def read_zarr_array(
+    store_path: pathlib.Path,
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+    out: npt.NDArray | None = None,
+    **_,
+) -> npt.NDArray:
+    """Read with zarr-python v3. If out is given, the image is read into it (rather than a newly allocated array) and
+    out is returned."""
+    with _concurrency_config(concurrency, phase_timer):
+        with time_remainder(phase_timer, "open"):
+            zarr_read = open_zarr_array(store_path, phase_timer)
+        with time_remainder(phase_timer, "other"):
+            if out is None:
+                read_image = zarr_read[:]
+            else:
+                out_buffer = default_buffer_prototype().nd_buffer.from_numpy_array(out)
+                zarr_read.get_basic_selection(Ellipsis, out=out_buffer)
+                read_image = out
     return read_image
 
 
-def write_zarr_array(
-    image: npt.NDArray,
+def read_zarr_region(zarr_array: zarr.Array, region: tuple[slice, ...]) -> npt.NDArray:
+    return zarr_array[region]
+
+
+def create_zarr_array(
     store_path: pathlib.Path,
     *,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
     overwrite: bool,
     chunks: tuple[int],
     compressor: Any = "auto",
+    shards: tuple[int] | None = None,
     zarr_spec: Literal[2, 3],
     write_empty_chunks: bool = True,
-) -> None:
+    phase_timer: PhaseTimer | None = None,
+) -> zarr.Array:
+    """Create an empty zarr array. If phase_timer is given, time spent on io and codecs is recorded."""
     if overwrite:
         utils.remove_output_dir(store_path)
 
     zarr_array = zarr.create_array(
-        store=store_path,
-        shape=image.shape,
+        store=_get_store(store_path, phase_timer, read_only=False),
+        shape=shape,
         chunks=chunks,
-        dtype=image.dtype,
+        shards=shards,
+        dtype=dtype,
         compressors=compressor,
         zarr_format=zarr_spec,
         fill_value=0,
         config={"write_empty_chunks": write_empty_chunks},
     )
-    zarr_array[:] = image
+    _time_codecs(zarr_array, phase_timer)
+    return zarr_array
+
+
+def write_zarr_array(
+    image: npt.NDArray,
+    store_path: pathlib.Path,
+    *,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: Any = "auto",
+    shards: tuple[int] | None = None,
+    zarr_spec: Literal[2, 3],
+    write_empty_chunks: bool = True,
+    concurrency: int | None = None,
+    phase_timer: PhaseTimer | None = None,
+) -> None:
+    with time_remainder(phase_timer, "open"):
+        zarr_array = create_zarr_array(
+            store_path,
+            shape=image.shape,
+            dtype=image.dtype,
+            overwrite=overwrite,
+            chunks=chunks,
+            compressor=compressor,
+            shards=shards,
+            zarr_spec=zarr_spec,
+            write_empty_chunks=write_empty_chunks,
+            phase_timer=phase_timer,
+        )
+    with _concurrency_config(concurrency, phase_timer):
+        with time_remainder(phase_timer, "other"):
+            for slab in get_write_slabs(image, chunks if shards is None else shards):
+                zarr_array[slab] = image[slab]
+
+
+def write_zarr_region(
+    image_region: npt.NDArray,
+    store_path: pathlib.Path,
+    region: tuple[slice, ...],
+    *,
+    write_empty_chunks: bool = True,
+    **_,
+) -> None:
+    """Write image_region into the given region of an existing zarr array"""
+    zarr_array = zarr.open_array(
+        store_path, mode="r+", config={"write_empty_chunks": write_empty_chunks}
+    )
+    zarr_array[region] = image_region
 
 
 def get_blosc_compressor(
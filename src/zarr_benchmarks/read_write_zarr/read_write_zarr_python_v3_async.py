@@ -0,0 +1,139 @@
+import asyncio
+import itertools
+import pathlib
+from collections.abc import Coroutine, Iterable, Iterator
+from typing import Any, Literal
+
+import numpy as np
+import numpy.typing as npt
+import zarr.api.asynchronous
+from zarr.core.array import AsyncArray
+
+from zarr_benchmarks import utils
+
+# Compressors, compression ratio and the remaining (open / create / region) functions are shared with the sync API
+from zarr_benchmarks.read_write_zarr.read_write_zarr_python_v3 import (  # noqa: F401
+    create_zarr_array,
+    get_blosc_compressor,
+    get_compression_ratio,
+    get_gzip_compressor,
+    get_zstd_compressor,
+    open_zarr_array,
+    read_zarr_region,
+    write_zarr_region,
+)
+
+# Default number of in-flight chunk requests - matches zarr's default async.concurrency
+DEFAULT_IN_FLIGHT = 10
+
+
+def _iter_grid_regions(
+    shape: tuple[int, ...], grid: tuple[int, ...]
+) -> Iterator[tuple[slice, ...]]:
+    """Iterate over the regions of each cell of a regular grid (e.g. chunks) covering an array."""
+    ranges = [range(0, dim_size, grid_size) for dim_size, grid_size in zip(shape, grid)]
+    for starts in itertools.product(*ranges):
+        yield tuple(
+            slice(start, min(start + grid_size, dim_size))
+            for start, grid_size, dim_size in zip(starts, grid, shape)
+        )
+
+
+async def _gather_limited(coroutines: Iterable[Coroutine], in_flight: int) -> None:
+    """Run coroutines concurrently, with at most in_flight running at once. in_flight worker tasks each take the next
+    coroutine from the iterable when their previous one finishes, so coroutines are only created as they are needed
+    (rather than creating one task per chunk up front)."""
+    coroutines = iter(coroutines)
+
+    async def worker() -> None:
+        # workers share the iterator - this is safe, as next() doesn't await
+        for coroutine in coroutines:
+            await coroutine
+
+    await asyncio.gather(*(worker() for _ in range(in_flight)))
+
+
+async def read_zarr_array_async(
+    store_path: pathlib.Path, in_flight: int = DEFAULT_IN_FLIGHT
+) -> npt.NDArray:
+    """Read a zarr array with one request per chunk, keeping in_flight requests running concurrently."""
+    zarr_array = await zarr.api.asynchronous.open_array(store=store_path, mode="r")
+    read_image = np.empty(zarr_array.shape, dtype=zarr_array.dtype)
+
+    async def read_region(region: tuple[slice, ...]) -> None:
+        read_image[region] = await zarr_array.getitem(region)
+
+    regions = _iter_grid_regions(zarr_array.shape, zarr_array.chunks)
+    await _gather_limited((read_region(region) for region in regions), in_flight)
+    return read_image
+
+
+async def write_zarr_array_async(
+    image: npt.NDArray,
+    store_path: pathlib.Path,
+    *,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: Any = "auto",
+    shards: tuple[int] | None = None,
+    zarr_spec: Literal[2, 3],
+    write_empty_chunks: bool = True,
+    in_flight: int = DEFAULT_IN_FLIGHT,
+) -> None:
+    """Write a zarr array with one request per chunk (or per shard, for sharded arrays, so concurrent writes never
+    touch the same file), keeping in_flight requests running concurrently."""
+    if overwrite:
+        utils.remove_output_dir(store_path)
+
+    zarr_array: AsyncArray = await zarr.api.asynchronous.create_array(
+        store=store_path,
+        shape=image.shape,
+        chunks=chunks,
+        shards=shards,
+        dtype=image.dtype,
+        compressors=compressor,
+        zarr_format=zarr_spec,
+        fill_value=0,
+        config={"write_empty_chunks": write_empty_chunks},
+    )
+
+    regions = _iter_grid_regions(image.shape, chunks if shards is None else shards)
+    await _gather_limited(
+        (zarr_array.setitem(region, image[region]) for region in regions), in_flight
+    )
+
+
+def read_zarr_array(
+    store_path: pathlib.Path, in_flight: int = DEFAULT_IN_FLIGHT, **_
+) -> npt.NDArray:
+    """Read with the zarr-python v3 async API, from a new event loop."""
+    return asyncio.run(read_zarr_array_async(store_path, in_flight))
+
+
+def write_zarr_array(
+    image: npt.NDArray,
+    store_path: pathlib.Path,
+    *,
+    overwrite: bool,
+    chunks: tuple[int],
+    compressor: Any = "auto",
+    shards: tuple[int] | None = None,
+    zarr_spec: Literal[2, 3],
+    write_empty_chunks: bool = True,
+    in_flight: int = DEFAULT_IN_FLIGHT,
+    **_,
+) -> None:
+    """Write with the zarr-python v3 async API, from a new event loop."""
+    asyncio.run(
+        write_zarr_array_async(
+            image,
+            store_path,
+            overwrite=overwrite,
+            chunks=chunks,
+            compressor=compressor,
+            shards=shards,
+            zarr_spec=zarr_spec,
+            write_empty_chunks=write_empty_chunks,
+            in_flight=in_flight,
+        )
+    )
@@ -0,0 +1,182 @@
+from typing import Any, Literal
+
+import numpy as np
+
+Region = tuple[slice, ...]
+
+# Images that aren't in memory (e.g. memory-mapped files) are written in slabs of at most this many bytes, so
+# memory use is bounded however large the image is
+DEFAULT_MAX_SLAB_BYTES = 512 * 1024**2
+
+# axis held fixed for each orthogonal plane, for images with axes ordered (z, y, x)
+PLANE_AXES = {"xy": 0, "xz": 1, "yz": 2}
+
+
+def _get_aligned_start(
+    rng: np.random.Generator, dim_size: int, chunk_size: int, roi_size: int
+) -> int:
+    """Random start position that lies on a chunk boundary, and keeps the ROI inside the image."""
+    n_starts = (dim_size - roi_size) // chunk_size + 1
+    return int(rng.integers(0, n_starts)) * chunk_size
+
+
+def _get_misaligned_start(
+    rng: np.random.Generator, dim_size: int, chunk_size: int, roi_size: int
+) -> int:
+    """Random start position that is offset from a chunk boundary (where the image / chunk size allows)."""
+    max_start = dim_size - roi_size
+    if chunk_size == 1 or max_start == 0:
+        return 0
+
+    start = int(rng.integers(0, max_start + 1))
+    if start % chunk_size == 0:
+        # shift off the chunk boundary, staying within the image
+        start = start + 1 if start < max_start else start - 1
+    return start
+
+
+def _get_straddling_start(
+    rng: np.random.Generator, dim_size: int, chunk_size: int, roi_size: int
+) -> int:
+    """Start position that centres the ROI on a random internal chunk boundary. Applied along all three axes, the ROI
+    is centred on a chunk corner so straddles (at least) 8 chunks."""
+    n_chunks = -(-dim_size // chunk_size)
+    if n_chunks == 1:
+        return 0
+
+    boundary = int(rng.integers(1, n_chunks)) * chunk_size
+    start = boundary - roi_size // 2
+    return min(max(start, 0), dim_size - roi_size)
+
+
+def get_random_regions(
+    shape: tuple[int, ...],
+    chunks: tuple[int, ...],
+    roi_size: int,
+    alignment: Literal["aligned", "misaligned", "straddle"],
+    n_regions: int,
+    seed: int = 0,
+) -> list[Region]:
+    """Get random cubic regions of interest (ROI) of the given size inside an image, relative to its chunk grid.
+
+    Args:
+        shape (tuple[int, ...]): shape of the image
+        chunks (tuple[int, ...]): chunk shape of the zarr array
+        roi_size (int): side length of the ROI. This is clipped to the image shape along each axis.
+        alignment (Literal["aligned", "misaligned", "straddle"]): 'aligned' ROIs start on a chunk boundary,
+            'misaligned' ROIs start at an offset from a chunk boundary and 'straddle' ROIs are centred on a chunk
+            corner.
+        n_regions (int): number of regions to generate
+        seed (int, optional): seed for the random number generator, so each benchmark reads the same regions.
+    Returns:
+        list[Region]: tuple of slices (one per axis) for each region
+    """
+    match alignment:
+        case "aligned":
+            get_start = _get_aligned_start
+        case "misaligned":
+            get_start = _get_misaligned_start
+        case "straddle":
+            get_start = _get_straddling_start
+        case _:
+            raise ValueError(f"invalid ROI alignment {alignment}")
+
+    rng = np.random.default_rng(seed)
+    regions = []
+    for _ in range(n_regions):
+        region = []
+        for dim_size, chunk_size in zip(shape, chunks):
+            size = min(roi_size, dim_size)
+            start = get_start(rng, dim_size, chunk_size, size)
+            region.append(slice(start, start + size))
+        regions.append(tuple(region))
+
+    return regions
+
+
+def get_region_nbytes(region: Region, itemsize: int) -> int:
+    """Number of bytes in a region of an image with the given item size."""
+    return int(np.prod([s.stop - s.start for s in region])) * itemsize
+
+
+def get_random_planes(
+    shape: tuple[int, ...],
+    plane: Literal["xy", "xz", "yz"],
+    thickness: int,
+    n_regions: int,
+    seed: int = 0,
+) -> list[Region]:
+    """Get full 2D planes (or thin slabs) at random positions along the axis normal to the plane.
+
+    Args:
+        shape (tuple[int, ...]): shape of the image, with axes ordered (z, y, x)
+        plane (Literal["xy", "xz", "yz"]): orientation of the plane
+        thickness (int): number of voxels along the axis normal to the plane (1 for a single plane). This is clipped
+            to the image shape.
+        n_regions (int): number of regions to generate
+        seed (int, optional): seed for the random number generator, so each benchmark reads the same planes.
+    Returns:
+        list[Region]: tuple of slices (one per axis) for each plane
+    """
+    if plane not in PLANE_AXES:
+        raise ValueError(f"invalid plane {plane}")
+
+    axis = PLANE_AXES[plane]
+    thickness = min(thickness, shape[axis])
+
+    rng = np.random.default_rng(seed)
+    regions = []
+    for _ in range(n_regions):
+        start = int(rng.integers(0, shape[axis] - thickness + 1))
+        region = [slice(0, dim_size) for dim_size in shape]
+        region[axis] = slice(start, start + thickness)
+        regions.append(tuple(region))
+
+    return regions
+
+
+def get_n_chunks_touched(region: Region, chunks: tuple[int, ...]) -> int:
+    """Number of chunks that must be read / decoded to read a region."""
+    n_chunks = 1
+    for s, chunk_size in zip(region, chunks):
+        n_chunks *= (s.stop - 1) // chunk_size - s.start // chunk_size + 1
+    return n_chunks
+
+
+def is_in_memory(image: Any) -> bool:
+    """Whether image is a numpy array held in memory (rather than e.g. a memory-mapped file, or a lazily read array
+    from zarr / h5py)."""
+    return isinstance(image, np.ndarray) and not isinstance(image, np.memmap)
+
+
+def get_write_slabs(
+    image: Any,
+    grid: tuple[int, ...],
+    max_slab_bytes: int | None = None,
+) -> list[Region]:
+    """Get the regions to write an image in. Images in memory are written in one go, while other images (e.g. memory
+    maps) are split along their first axis into slabs, so only one slab has to be read into memory at a time.
+
+    Args:
+        image (Any): numpy array, memory map, or other array-like with shape / dtype / slicing (e.g. a zarr array)
+        grid (tuple[int, ...]): chunk (or shard) shape of the array being written. Slabs start on this grid, so no
+            chunk is written by two slabs.
+        max_slab_bytes (int | None, optional): maximum size of each slab, or None for DEFAULT_MAX_SLAB_BYTES. Slabs
+            are always at least one grid cell thick, so may be larger than this for very large chunks.
+    Returns:
+        list[Region]: tuple of slices (one per axis) for each slab
+    """
+    if max_slab_bytes is None:
+        max_slab_bytes = DEFAULT_MAX_SLAB_BYTES
+
+    shape = image.shape
+    if is_in_memory(image) or len(shape) == 0 or shape[0] == 0:
+        return [tuple(slice(0, dim_size) for dim_size in shape)]
+
+    grid_row_nbytes = grid[0] * int(np.prod(shape[1:])) * np.dtype(image.dtype).itemsize
+    thickness = max(max_slab_bytes // max(grid_row_nbytes, 1), 1) * grid[0]
+    return [
+        (slice(start, min(start + thickness, shape[0])),)
+        + tuple(slice(0, dim_size) for dim_size in shape[1:])
+        for start in range(0, shape[0], thickness)
+    ]
@@ -0,0 +1,143 @@
+"""Cache of stores written for read benchmarks, so the same image written with the same backend / settings is only
+written once - even across benchmark runs. Stores are kept in a directory on disk, each named by a hash of the image
+and every setting used to write it (i.e. content-addressed). Once the cache grows above a maximum size, the least
+recently used stores are removed."""
+
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import uuid
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from zarr_benchmarks.store_scan import scan_store
+
+# images are hashed in slabs of (up to) this many bytes along the first axis, so memory-mapped images larger than
+# memory can be hashed
+HASH_SLAB_NBYTES = 2**26
+
+
+def hash_image(image: npt.NDArray) -> str:
+    """Hash of an image's shape, dtype and values"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(json.dumps([image.shape, image.dtype.str]).encode())
+
+    plane_nbytes = max(image[:1].nbytes, 1)
+    slab_depth = max(HASH_SLAB_NBYTES // plane_nbytes, 1)
+    for start in range(0, image.shape[0], slab_depth):
+        hasher.update(np.ascontiguousarray(image[start : start + slab_depth]).data)
+
+    return hasher.hexdigest()
+
+
+def get_cache_key(params: dict) -> str:
+    """Key of the store written with the given params (e.g. image hash, backend, zarr spec, chunks and codec params).
+    Params must be json serializable - tuples (e.g. chunk shapes) are stored the same as lists."""
+    params_json = json.dumps(params, sort_keys=True)
+    return hashlib.blake2b(params_json.encode(), digest_size=16).hexdigest()
+
+
+class StoreCache:
+    """A directory of cached stores. Each store is saved in a sub-directory named by its key, next to a '<key>.json'
+    file holding the params it was written with and its size. A store is only used once its json file exists, and the
+    json's modification time records when the store was last used (for least recently used eviction).
+
+    Stores are written to a temporary directory and then renamed, so several processes can share a cache - if two
+    processes write the same store at once, one copy is kept."""
+
+    def __init__(self, cache_dir: pathlib.Path, max_nbytes: int):
+        """
+        Args:
+            cache_dir (pathlib.Path): directory to store cached stores in. Created if it doesn't exist.
+            max_nbytes (int): maximum total size of the cached stores, in bytes. The most recently used store is always
+                kept, even if it is larger than this.
+        """
+        self.cache_dir = cache_dir
+        self.max_nbytes = max_nbytes
+
+    def _get_entry_paths(self, key: str) -> tuple[pathlib.Path, pathlib.Path]:
+        return self.cache_dir / key, self.cache_dir / f"{key}.json"
+
+    def get_store(
+        self, params: dict, write_store: Callable[[pathlib.Path], None]
+    ) -> pathlib.Path:
+        """Get the path of the store written with params, calling write_store(path) to write it if it isn't cached.
+
+        Args:
+            params (dict): every setting that affects the contents of the store (see get_cache_key).
+            write_store (Callable[[pathlib.Path], None]): writes the store to the given path.
+        Returns:
+            pathlib.Path: path of the cached store. Stores may be shared by several benchmarks, so must not be modified.
+        """
+        key = get_cache_key(params)
+        store_path, entry_path = self._get_entry_paths(key)
+
+        if entry_path.exists() and store_path.exists():
+            # mark as recently used
+            os.utime(entry_path)
+            return store_path
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cache_dir / f".{key}-{uuid.uuid4().hex}.tmp"
+        try:
+            write_store(temp_path)
+            try:
+                os.rename(temp_path, store_path)
+            except OSError:
+                # already written by another process
+                if not store_path.exists():
+                    raise
+        finally:
+            if temp_path.exists():
+                shutil.rmtree(temp_path)
+
+        entry = {"params": params, "nbytes": scan_store(store_path).nbytes_stored}
+        temp_entry_path = entry_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        temp_entry_path.write_text(json.dumps(entry))
+        os.replace(temp_entry_path, entry_path)
+
+        self.evict(keep=key)
+        return store_path
+
+    def get_nbytes(self) -> int:
+        """Total size of all cached stores, in bytes"""
+        return sum(
+            json.loads(entry_path.read_text())["nbytes"]
+            for entry_path in self.cache_dir.glob("*.json")
+        )
+
+    def evict(self, keep: str | None = None) -> None:
+        """Remove the least recently used stores until the cache is no larger than max_nbytes.
+
+        Args:
+            keep (str | None, optional): key of a store that is never removed. Defaults to None.
+        """
+        if not self.cache_dir.exists():
+            return
+
+        entries = []
+        for entry_path in self.cache_dir.glob("*.json"):
+            try:
+                last_used = entry_path.stat().st_mtime
+                nbytes = json.loads(entry_path.read_text())["nbytes"]
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+            entries.append((last_used, entry_path.stem, nbytes))
+
+        total_nbytes = sum(nbytes for _, _, nbytes in entries)
+        for _, key, nbytes in sorted(entries):
+            if total_nbytes <= self.max_nbytes:
+                break
+            if key == keep:
+                continue
+
+            store_path, entry_path = self._get_entry_paths(key)
+            # remove the json first, so the store is no longer used
+            entry_path.unlink(missing_ok=True)
+            shutil.rmtree(store_path, ignore_errors=True)
+            total_nbytes -= nbytes
@@ -0,0 +1,179 @@
+"""Scan the files of a directory store in parallel, to measure the bytes stored, how they are spread over chunk files
+and how much disk space the filesystem allocates for them (whole blocks, so small chunks waste space)."""
+
+import math
+import os
+import pathlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+# names of the files holding array / group metadata (zarr spec v3 and v2), rather than chunks
+METADATA_FILE_NAMES = ("zarr.json", ".zarray", ".zattrs", ".zgroup", ".zmetadata")
+
+# files in a directory are stat-ed in batches of this size, so large flat directories (e.g. zarr v2 stores with one file
+# per chunk) are also scanned in parallel
+STAT_BATCH_SIZE = 512
+
+# quantiles of the chunk file sizes stored in extra_info
+CHUNK_NBYTES_QUANTILES = (0, 0.25, 0.5, 0.75, 1)
+
+
+@dataclass(frozen=True)
+class StoreScan:
+    """Summary of the files in a store.
+
+    Attributes:
+        nbytes_stored: total (logical) size of all files, in bytes.
+        allocated_bytes: disk space allocated to all files by the filesystem, in bytes.
+        chunk_nbytes: size of each chunk file (every file apart from metadata files) in bytes, in no particular order.
+            For sharded arrays, each file is a shard.
+        n_chunks: number of chunk files a store would have if every chunk was written, if known.
+    """
+
+    nbytes_stored: int
+    allocated_bytes: int
+    chunk_nbytes: npt.NDArray[np.int64]
+    n_chunks: int | None = None
+
+    @property
+    def n_empty_chunks(self) -> int:
+        """Number of chunk files with no data"""
+        return int(np.count_nonzero(self.chunk_nbytes == 0))
+
+    @property
+    def n_missing_chunks(self) -> int | None:
+        """Number of chunks that have no file (e.g. empty chunks that weren't written), if n_chunks is known"""
+        if self.n_chunks is None:
+            return None
+        return self.n_chunks - len(self.chunk_nbytes)
+
+    def get_chunk_nbytes_histogram(self) -> dict[str, list[int]]:
+        """Histogram of chunk file sizes, with bins of increasing powers of two: [0, 1), [1, 2), [2, 4), [4, 8)..."""
+        max_nbytes = int(self.chunk_nbytes.max(initial=0))
+        bin_edges = [0] + [2**power for power in range(max_nbytes.bit_length() + 1)]
+        counts, _ = np.histogram(self.chunk_nbytes, bins=bin_edges)
+        return {"bin_edges": bin_edges, "counts": counts.tolist()}
+
+    def to_extra_info(self) -> dict:
+        """Summary of the scan, for a benchmark's extra_info"""
+        if len(self.chunk_nbytes) == 0:
+            quantiles = []
+        else:
+            quantiles = np.quantile(self.chunk_nbytes, CHUNK_NBYTES_QUANTILES).tolist()
+
+        return {
+            "nbytes_stored": self.nbytes_stored,
+            "allocated_bytes": self.allocated_bytes,
+            "n_chunk_files": len(self.chunk_nbytes),
+            "n_empty_chunks": self.n_empty_chunks,
+            "n_missing_chunks": self.n_missing_chunks,
+            "chunk_nbytes_quantiles": quantiles,
+            "chunk_nbytes_histogram": self.get_chunk_nbytes_histogram(),
+        }
+
+
+def _get_allocated_bytes(stat_result: os.stat_result) -> int:
+    """Disk space allocated to a file. st_blocks is in units of 512 bytes (whatever the filesystem block size), and
+    isn't available on Windows - where the logical size is used instead."""
+    blocks = getattr(stat_result, "st_blocks", None)
+    if blocks is None:
+        return stat_result.st_size
+    return blocks * 512
+
+
+def _list_directory(path: str) -> tuple[list[str], list[os.DirEntry]]:
+    """List the sub-directories and files of a directory"""
+    sub_directories = []
+    files = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                sub_directories.append(entry.path)
+            else:
+                files.append(entry)
+
+    return sub_directories, files
+
+
+def _stat_files(files: list[os.DirEntry]) -> list[tuple[str, int, int]]:
+    """Get the name, logical size and allocated size of each file"""
+    file_stats = []
+    for entry in files:
+        stat_result = entry.stat(follow_symlinks=False)
+        file_stats.append(
+            (entry.name, stat_result.st_size, _get_allocated_bytes(stat_result))
+        )
+
+    return file_stats
+
+
+def scan_store(
+    store_path: pathlib.Path,
+    n_chunks: int | None = None,
+    max_workers: int | None = None,
+) -> StoreScan:
+    """Scan every file in a directory store, listing directories and stat-ing files from a pool of threads.
+
+    Args:
+        store_path (pathlib.Path): path of the store directory.
+        n_chunks (int | None, optional): number of chunk files in a full store (e.g. from get_n_chunks), to count
+            missing chunks. Defaults to None.
+        max_workers (int | None, optional): number of threads. None uses ThreadPoolExecutor's default.
+    Returns:
+        StoreScan: summary of the files in the store.
+    """
+    if not store_path.is_dir():
+        raise ValueError(f"Path not a directory: {store_path}")
+
+    stat_futures: list[Future] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_list_directory, os.fspath(store_path))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                sub_directories, files = future.result()
+                pending.update(
+                    executor.submit(_list_directory, path) for path in sub_directories
+                )
+                stat_futures.extend(
+                    executor.submit(_stat_files, files[start : start + STAT_BATCH_SIZE])
+                    for start in range(0, len(files), STAT_BATCH_SIZE)
+                )
+
+    file_stats = [file_stat for future in stat_futures for file_stat in future.result()]
+    chunk_nbytes = [
+        nbytes for name, nbytes, _ in file_stats if name not in METADATA_FILE_NAMES
+    ]
+    return StoreScan(
+        nbytes_stored=sum(nbytes for _, nbytes, _ in file_stats),
+        allocated_bytes=sum(allocated for _, _, allocated in file_stats),
+        chunk_nbytes=np.array(chunk_nbytes, dtype=np.int64),
+        n_chunks=n_chunks,
+    )
+
+
+def get_n_chunks(shape: tuple[int, ...], chunks: tuple[int, ...]) -> int:
+    """Number of chunks (or shards) covering an array of the given shape"""
+    return math.prod(
+        math.ceil(dim_size / chunk_size) for dim_size, chunk_size in zip(shape, chunks)
+    )
+
+
+def scan_array_store(
+    store_path: pathlib.Path,
+    shape: tuple[int, ...],
+    chunks: tuple[int, ...],
+    shards: tuple[int, ...] | None = None,
+    zarr_store: bool = True,
+) -> StoreScan:
+    """Scan the store of an array with the given shape / chunks / shards. For Zarr stores, chunks (or shards, for
+    sharded arrays) with no file e.g. empty chunks skipped with write_empty_chunks=False are counted as missing. Other
+    stores (e.g. a HDF5 file) have no file per chunk, so missing chunks aren't counted."""
+    n_chunks = None
+    if zarr_store:
+        n_chunks = get_n_chunks(shape, chunks if shards is None else shards)
+
+    return scan_store(store_path, n_chunks)
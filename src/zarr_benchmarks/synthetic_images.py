@@ -0,0 +1,361 @@
+"""Seeded synthetic 3D images, for benchmarking without downloading the datasets in fetch_datasets.py. Three kinds of
+image are available:
+
+- smooth: a smoothly varying intensity field (a sum of random low frequency waves)
+- microscopy: blob-like cells on a smooth background, with shot / read noise
+- labels: a label volume, where each object (a random Voronoi cell) has its own integer id. Objects can be made
+  sparse by setting a fraction of them to background (0).
+
+Every voxel depends only on the seed and its position (random values come from hashing voxel / cell indices, rather
+than a sequential random number generator), so the image doesn't depend on the order it's generated in. Images are
+generated chunk by chunk, so large images can be written straight to a memory-mapped .npy file (see save_image).
+"""
+
+import argparse
+import itertools
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+import numpy.typing as npt
+
+from zarr_benchmarks.selections import Region
+
+ImageKind = Literal["smooth", "microscopy", "labels"]
+IMAGE_KINDS = ("smooth", "microscopy", "labels")
+
+# dtype for each kind of image, if none is given: raw microscopy data is usually uint16, and segmentations uint64
+DEFAULT_DTYPES = {"smooth": "uint16", "microscopy": "uint16", "labels": "uint64"}
+
+# shape of the blocks images are generated in - this doesn't affect the generated image, only peak memory use
+GENERATION_CHUNKS = (64, 256, 256)
+
+# number of random waves summed to make the smooth field
+_N_WAVES = 8
+
+
+def _splitmix64(values: npt.NDArray[np.uint64]) -> npt.NDArray[np.uint64]:
+    """Scramble 64-bit integers with the splitmix64 finaliser"""
+    with np.errstate(over="ignore"):
+        values = values + np.uint64(0x9E3779B97F4A7C15)
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+
+def _hash_uniform(seed: int, stream: int, *indices: npt.ArrayLike) -> npt.NDArray:
+    """Uniform random floats in [0, 1), that depend only on seed, stream and the (broadcast) integer indices. This is
+    a counter-based random number generator, so values don't depend on the order they're generated in."""
+    hashed = _splitmix64(np.array([seed, stream], dtype=np.int64).astype(np.uint64))
+    values = hashed[0] ^ hashed[1]
+    for index in indices:
+        values = _splitmix64(
+            values ^ np.asarray(index, dtype=np.int64).astype(np.uint64)
+        )
+
+    return (values >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+def _get_coordinates(region: Region) -> tuple[npt.NDArray, ...]:
+    """Integer coordinates of each voxel in region, as one array per axis that broadcast against each other"""
+    return tuple(
+        np.arange(s.start, s.stop).reshape([-1 if axis == i else 1 for i in range(3)])
+        for axis, s in enumerate(region)
+    )
+
+
+def _smooth_field(region: Region, shape: tuple[int, ...], seed: int) -> npt.NDArray:
+    """Sum of random low frequency waves (0.5 - 3 cycles across the image along each axis), scaled to [0, 1]"""
+    rng = np.random.default_rng(seed)
+    frequencies = rng.uniform(0.5, 3, size=(_N_WAVES, 3)) / np.array(shape)
+    phases = rng.uniform(0, 2 * np.pi, size=_N_WAVES)
+    amplitudes = rng.uniform(0.5, 1, size=_N_WAVES)
+
+    coordinates = _get_coordinates(region)
+    field = np.zeros(tuple(s.stop - s.start for s in region), dtype=np.float32)
+    for frequency, phase, amplitude in zip(frequencies, phases, amplitudes):
+        wave_phase = sum(f * c for f, c in zip(frequency, coordinates))
+        field += amplitude * np.sin(2 * np.pi * wave_phase + phase).astype(np.float32)
+
+    return (field / amplitudes.sum() + 1) / 2
+
+
+def _nearest_cells(
+    region: Region, object_size: int, seed: int
+) -> tuple[npt.NDArray, npt.NDArray]:
+    """Split the image into cubic cells of side object_size, with one random point inside each cell. For each voxel in
+    region, find the nearest point (searching the voxel's cell and its neighbours i.e. Worley / cellular noise).
+
+    Returns:
+        tuple[npt.NDArray, npt.NDArray]: the distance to the nearest point (in voxels), and the index (z, y, x) of
+            its cell, stacked along the first axis.
+    """
+    # work on the cells covering region, with voxels arranged as (cell z, z in cell, cell y, y in cell, ...), so the
+    # distance along each axis can be computed separately and broadcast
+    cell_ranges = [
+        range(s.start // object_size, -(-s.stop // object_size)) for s in region
+    ]
+    n_cells = [len(cell_range) for cell_range in cell_ranges]
+    # random point in each cell (plus a border of neighbouring cells), relative to the cell's corner
+    border_cells = np.meshgrid(
+        *[np.arange(r.start - 1, r.stop + 1) for r in cell_ranges], indexing="ij"
+    )
+    points = [_hash_uniform(seed, axis, *border_cells) for axis in range(3)]
+
+    # position of each voxel's centre within its cell (in units of cells)
+    in_cell = (np.arange(object_size) + 0.5) / object_size
+    blocked_shape = (
+        n_cells[0],
+        object_size,
+        n_cells[1],
+        object_size,
+        n_cells[2],
+        object_size,
+    )
+    offsets = list(itertools.product([-1, 0, 1], repeat=3))
+
+    nearest_squared = np.full(blocked_shape, np.inf, dtype=np.float32)
+    nearest_offset = np.zeros(blocked_shape, dtype=np.int8)
+    for offset_index, offset in enumerate(offsets):
+        neighbours = tuple(slice(1 + o, 1 + o + n) for o, n in zip(offset, n_cells))
+        squared_distance = np.float32(0)
+        for axis in range(3):
+            point = points[axis][neighbours].reshape(
+                n_cells[0], 1, n_cells[1], 1, n_cells[2], 1
+            )
+            position = in_cell.reshape(
+                [-1 if i == 2 * axis + 1 else 1 for i in range(6)]
+            )
+            squared_distance = squared_distance + (
+                (position - offset[axis] - point) ** 2
+            ).astype(np.float32)
+
+        is_nearer = squared_distance < nearest_squared
+        np.copyto(nearest_squared, squared_distance, where=is_nearer)
+        nearest_offset[is_nearer] = offset_index
+
+    # back to (z, y, x), cropped from the covering cells to region
+    padded_shape = [n * object_size for n in n_cells]
+    crop = tuple(
+        slice(s.start - r.start * object_size, s.stop - r.start * object_size)
+        for s, r in zip(region, cell_ranges)
+    )
+    distance = np.sqrt(nearest_squared.reshape(padded_shape)[crop]) * object_size
+    nearest_offset = nearest_offset.reshape(padded_shape)[crop]
+
+    voxel_cells = [c // object_size for c in _get_coordinates(region)]
+    nearest_cell = np.stack(
+        [
+            voxel_cells[axis] + np.array(offsets)[:, axis][nearest_offset]
+            for axis in range(3)
+        ]
+    )
+    return distance, nearest_cell
+
+
+def _to_dtype(values: npt.NDArray, dtype: np.dtype) -> npt.NDArray:
+    """Round / clip values to fit dtype (floats are unchanged)"""
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        values = np.clip(np.rint(values), info.min, float(info.max))
+    return values.astype(dtype)
+
+
+def _generate_smooth(
+    region: Region, shape: tuple[int, ...], dtype: np.dtype, seed: int
+) -> npt.NDArray:
+    field = _smooth_field(region, shape, seed)
+    if np.issubdtype(dtype, np.integer):
+        # use the full range of the dtype
+        field = field * float(np.iinfo(dtype).max)
+    return _to_dtype(field, dtype)
+
+
+def _generate_microscopy(
+    region: Region,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+    seed: int,
+    object_size: int,
+    photons: float,
+) -> npt.NDArray:
+    distance, _ = _nearest_cells(region, object_size, seed)
+    # bright gaussian blobs (one per cell) on a dimmer, smoothly varying background
+    blobs = np.exp(-((distance / (object_size / 4)) ** 2) / 2)
+    intensity = 0.2 + 0.3 * _smooth_field(region, shape, seed) + blobs
+
+    # photon counts, with shot noise (approximated as gaussian) and read noise
+    expected_counts = photons * intensity
+    coordinates = _get_coordinates(region)
+    uniform_1 = np.maximum(_hash_uniform(seed, 3, *coordinates), 2.0**-53)
+    uniform_2 = _hash_uniform(seed, 4, *coordinates)
+    normal = np.sqrt(-2 * np.log(uniform_1)) * np.cos(2 * np.pi * uniform_2)
+    counts = expected_counts + np.sqrt(expected_counts + 4) * normal
+    return _to_dtype(np.maximum(counts, 0), dtype)
+
+
+def _generate_labels(
+    region: Region,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+    seed: int,
+    object_size: int,
+    sparsity: float,
+) -> npt.NDArray:
+    _, cell = _nearest_cells(region, object_size, seed)
+
+    # unique id for every cell (including those just outside the image, whose points may be nearest to edge voxels)
+    n_cells = [-(-dim_size // object_size) + 2 for dim_size in shape]
+    labels = np.ravel_multi_index(tuple(cell + 1), n_cells) + 1
+
+    is_background = _hash_uniform(seed, 5, *cell) < sparsity
+    labels[is_background] = 0
+    return labels.astype(dtype)
+
+
+def _check_parameters(
+    kind: ImageKind,
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+    object_size: int,
+    sparsity: float,
+) -> None:
+    if kind not in IMAGE_KINDS:
+        raise ValueError(f"Invalid synthetic image kind {kind}")
+    if len(shape) != 3:
+        raise ValueError(f"Synthetic images must be 3D, but shape is {shape}")
+    if object_size < 1:
+        raise ValueError(f"object_size must be at least 1, but is {object_size}")
+    if not 0 <= sparsity <= 1:
+        raise ValueError(f"sparsity must be between 0 and 1, but is {sparsity}")
+
+    if kind == "labels" and np.issubdtype(dtype, np.integer):
+        max_label = np.prod([-(-dim_size // object_size) + 2 for dim_size in shape])
+        if max_label > np.iinfo(dtype).max:
+            raise ValueError(
+                f"{dtype} can't hold {max_label} labels - use a larger object_size or dtype"
+            )
+
+
+def generate_image(
+    kind: ImageKind,
+    shape: tuple[int, ...],
+    dtype: npt.DTypeLike | None = None,
+    *,
+    seed: int = 0,
+    object_size: int = 32,
+    sparsity: float = 0.0,
+    photons: float = 200.0,
+    out: npt.NDArray | None = None,
+) -> npt.NDArray:
+    """Generate a synthetic 3D image, chunk by chunk.
+
+    Args:
+        kind (ImageKind): 'smooth', 'microscopy' or 'labels' (see the module docstring)
+        shape (tuple[int, ...]): shape of the image
+        dtype (npt.DTypeLike | None, optional): dtype of the image. None uses DEFAULT_DTYPES for this kind of image.
+            Integer smooth images use the full range of the dtype.
+        seed (int, optional): seed for all random values, so the same seed always gives the same image.
+        object_size (int, optional): mean spacing (in voxels) between cells in microscopy images / objects in label
+            images. Smaller values give more objects.
+        sparsity (float, optional): fraction of objects in label images that are set to background (0). 0 gives a
+            dense segmentation, and values close to 1 a sparse segmentation.
+        photons (float, optional): mean photon count of the brightest parts of microscopy images. Lower values give
+            noisier images.
+        out (npt.NDArray | None, optional): array to write the image into (e.g. a memory map), rather than allocating
+            a new array. Must have the given shape and dtype.
+    Returns:
+        npt.NDArray: the image (out, if given)
+    """
+    dtype = np.dtype(DEFAULT_DTYPES[kind] if dtype is None else dtype)
+    shape = tuple(shape)
+    _check_parameters(kind, shape, dtype, object_size, sparsity)
+
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape or out.dtype != dtype:
+        raise ValueError(f"out must have shape {shape} and dtype {dtype}")
+
+    ranges = [
+        range(0, dim_size, chunk_size)
+        for dim_size, chunk_size in zip(shape, GENERATION_CHUNKS)
+    ]
+    for starts in itertools.product(*ranges):
+        region = tuple(
+            slice(start, min(start + chunk_size, dim_size))
+            for start, chunk_size, dim_size in zip(starts, GENERATION_CHUNKS, shape)
+        )
+        match kind:
+            case "smooth":
+                out[region] = _generate_smooth(region, shape, dtype, seed)
+            case "microscopy":
+                out[region] = _generate_microscopy(
+                    region, shape, dtype, seed, object_size, photons
+                )
+            case "labels":
+                out[region] = _generate_labels(
+                    region, shape, dtype, seed, object_size, sparsity
+                )
+
+    return out
+
+
+def save_image(
+    path: Path,
+    kind: ImageKind,
+    shape: tuple[int, ...],
+    dtype: npt.DTypeLike | None = None,
+    **kwargs,
+) -> None:
+    """Generate a synthetic image straight into a .npy file (which can be larger than memory), for use with
+    --image-file. Takes the same keyword arguments as generate_image."""
+    dtype = np.dtype(DEFAULT_DTYPES[kind] if dtype is None else dtype)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=tuple(shape))
+    generate_image(kind, shape, dtype, out=out, **kwargs)
+    out.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic image, and save it as a .npy file that can be benchmarked with "
+        "--image-file. Images are generated chunk by chunk into a memory map, so can be larger than memory."
+    )
+    parser.add_argument("kind", choices=IMAGE_KINDS, help="kind of image to generate")
+    parser.add_argument("output", type=Path, help="path of the .npy file to write")
+    parser.add_argument(
+        "--shape",
+        nargs=3,
+        type=int,
+        default=[256, 256, 256],
+        metavar=("Z", "Y", "X"),
+        help="shape of the image",
+    )
+    parser.add_argument(
+        "--dtype",
+        help="dtype of the image e.g. uint16. Defaults to uint16 for smooth / microscopy images and uint64 for labels.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "--object_size",
+        type=int,
+        default=32,
+        help="mean spacing (in voxels) between cells / objects in microscopy / label images",
+    )
+    parser.add_argument(
+        "--sparsity",
+        type=float,
+        default=0.0,
+        help="fraction of objects in label images set to background",
+    )
+    args = parser.parse_args()
+
+    save_image(
+        args.output,
+        args.kind,
+        tuple(args.shape),
+        args.dtype,
+        seed=args.seed,
+        object_size=args.object_size,
+        sparsity=args.sparsity,
+    )
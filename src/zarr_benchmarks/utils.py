@@ -1,10 +1,13 @@
 import json
-import os
 import pathlib
 import shutil
+from collections.abc import Sequence
 from importlib.metadata import version
 from importlib.util import find_spec
 
+import numpy as np
+import numpy.typing as npt
+
 
 def is_zarr_python_v2() -> bool:
     """
@@ -21,21 +24,68 @@ def remove_output_dir(output_dir: pathlib.Path) -> None:
         shutil.rmtree(output_dir)
 
 
-def get_directory_size(path: pathlib.Path) -> int:
+def get_chunk_shape(chunk_size: int | Sequence[int]) -> tuple[int, int, int]:
+    """
+    Get the 3D chunk shape for a chunk size: a single int for cubic chunks, or an explicit (z, y, x) shape.
+    """
+    if isinstance(chunk_size, int):
+        return (chunk_size, chunk_size, chunk_size)
+
+    return tuple(chunk_size)
+
+
+def is_valid_shard_size(
+    shard_size: int | None, chunk_size: int | Sequence[int]
+) -> bool:
     """
-    Get total size of a directory in bytes.
+    Check the shard size is a multiple of the chunk shape along every axis (un-sharded arrays are always valid).
     """
-    total_size = 0
-    if not path.is_dir():
-        raise ValueError(f"Path not a directory: {path}")
-    for dirpath, dirnames, filenames in path.walk():
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            total_size += os.path.getsize(fp)
+    if shard_size is None:
+        return True
+
+    return all(
+        shard_size % chunk_length == 0 for chunk_length in get_chunk_shape(chunk_size)
+    )
 
-    return total_size
+
+def get_shard_shape(shard_size: int | None) -> tuple[int, int, int] | None:
+    """
+    Get the 3D shard shape for a shard size, or None for un-sharded arrays.
+    """
+    if shard_size is None:
+        return None
+
+    return (shard_size, shard_size, shard_size)
 
 
 def read_json_file(path_to_file: pathlib.Path) -> dict:
     with open(path_to_file, "r") as f:
         return json.load(f)
+
+
+def cast_image(image: npt.NDArray, dtype: npt.DTypeLike) -> npt.NDArray:
+    """
+    Cast an image to dtype. Integer images whose values fit in dtype (e.g. labels cast to a wider integer type) are
+    cast unchanged. Otherwise, casting to an integer dtype rescales the image's range to [0, max of dtype], so e.g. a
+    float image in [0, 1] doesn't become all zeros. Rescaling label images merges neighbouring labels.
+    """
+    dtype = np.dtype(dtype)
+    if image.dtype == dtype:
+        return image
+
+    if not np.issubdtype(dtype, np.integer):
+        return image.astype(dtype)
+
+    info = np.iinfo(dtype)
+    image_min, image_max = image.min(), image.max()
+    if (
+        np.issubdtype(image.dtype, np.integer)
+        and image_min >= info.min
+        and image_max <= info.max
+    ):
+        return image.astype(dtype)
+
+    scale = float(info.max) / max(float(image_max) - float(image_min), 1e-300)
+    rescaled = (image.astype(np.float64) - float(image_min)) * scale
+    # clip to the largest float64 that fits in dtype (float(info.max) of uint64 rounds up to 2**64, which overflows)
+    return np.rint(np.clip(rescaled, 0, np.nextafter(float(info.max), 0))).astype(dtype)
@@ -0,0 +1,171 @@
+from importlib.util import find_spec
+
+import pytest
+
+import tests.benchmarks.validate_zarr as validate_zarr
+from zarr_benchmarks import instrumentation
+from zarr_benchmarks.utils import (
+    get_chunk_shape,
+    get_shard_shape,
+    is_valid_shard_size,
+    is_zarr_python_v2,
+    remove_output_dir,
+)
+
+if find_spec("zarr") is None or is_zarr_python_v2():
+    pytest.skip(
+        "The async API benchmarks require zarr-python v3", allow_module_level=True
+    )
+
+from zarr_benchmarks.read_write_zarr import read_write_zarr_python_v3_async  # noqa: E402
+
+pytestmark = [pytest.mark.zarr_python]
+
+# the async API is part of zarr-python v3, so results are labelled with (and only run for) its backend
+ASYNC_BACKEND = "zarr_python_3"
+
+
+@pytest.mark.benchmark(group="read_async")
+def test_read_async_blosc(
+    benchmark,
+    backend,
+    image,
+    rounds,
+    warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
+    store_path,
+    chunk_size,
+    blosc_clevel,
+    blosc_shuffle,
+    blosc_cname,
+    zarr_spec,
+    dtype,
+    shard_size,
+    in_flight,
+):
+    if backend != ASYNC_BACKEND:
+        pytest.skip(
+            f"The async API benchmarks only run with the {ASYNC_BACKEND} backend"
+        )
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
+    blosc_compressor = read_write_zarr_python_v3_async.get_blosc_compressor(
+        blosc_cname, blosc_clevel, blosc_shuffle, zarr_spec=zarr_spec
+    )
+
+    read_write_zarr_python_v3_async.write_zarr_array(
+        image=image,
+        store_path=store_path,
+        overwrite=True,
+        chunks=get_chunk_shape(chunk_size),
+        shards=get_shard_shape(shard_size),
+        compressor=blosc_compressor,
+        zarr_spec=zarr_spec,
+    )
+
+    compression_ratio = read_write_zarr_python_v3_async.get_compression_ratio(
+        store_path, zarr_spec=zarr_spec
+    )
+    benchmark.extra_info["compression_ratio"] = compression_ratio
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    instrumentation.pedantic(
+        benchmark,
+        read_write_zarr_python_v3_async.read_zarr_array,
+        args=(store_path,),
+        kwargs={"in_flight": in_flight},
+        rounds=rounds,
+        warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+    )
+
+    validate_zarr.validate_blosc_zarr_metadata(
+        image,
+        store_path,
+        chunk_size,
+        shard_size,
+        blosc_clevel,
+        blosc_shuffle,
+        blosc_cname,
+        zarr_spec,
+        dtype,
+    )
+
+
+@pytest.mark.benchmark(group="write_async")
+def test_write_async_blosc(
+    benchmark,
+    backend,
+    image,
+    rounds,
+    warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
+    store_path,
+    chunk_size,
+    blosc_clevel,
+    blosc_shuffle,
+    blosc_cname,
+    zarr_spec,
+    dtype,
+    shard_size,
+    in_flight,
+):
+    if backend != ASYNC_BACKEND:
+        pytest.skip(
+            f"The async API benchmarks only run with the {ASYNC_BACKEND} backend"
+        )
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
+    blosc_compressor = read_write_zarr_python_v3_async.get_blosc_compressor(
+        blosc_cname, blosc_clevel, blosc_shuffle, zarr_spec=zarr_spec
+    )
+
+    def setup():
+        remove_output_dir(store_path)
+        return (), {
+            "image": image,
+            "store_path": store_path,
+            "overwrite": False,
+            "chunks": get_chunk_shape(chunk_size),
+            "shards": get_shard_shape(shard_size),
+            "compressor": blosc_compressor,
+            "zarr_spec": zarr_spec,
+            "in_flight": in_flight,
+        }
+
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    instrumentation.pedantic(
+        benchmark,
+        read_write_zarr_python_v3_async.write_zarr_array,
+        setup=setup,
+        rounds=rounds,
+        warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+    )
+
+    validate_zarr.validate_blosc_zarr_metadata(
+        image,
+        store_path,
+        chunk_size,
+        shard_size,
+        blosc_clevel,
+        blosc_shuffle,
+        blosc_cname,
+        zarr_spec,
+        dtype,
+    )
@@ -0,0 +1,120 @@
+import math
+
+import numpy as np
+import pytest
+
+import tests.benchmarks.validate_zarr as validate_zarr
+from zarr_benchmarks import instrumentation
+from zarr_benchmarks.parallel_write import (
+    SharedImage,
+    get_chunk_aligned_slabs,
+    write_regions_in_parallel,
+)
+from zarr_benchmarks.read_write_zarr import get_backend
+from zarr_benchmarks.selections import DEFAULT_MAX_SLAB_BYTES, is_in_memory
+from zarr_benchmarks.utils import (
+    get_chunk_shape,
+    get_shard_shape,
+    is_valid_shard_size,
+    remove_output_dir,
+)
+
+pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
+
+
+@pytest.mark.benchmark(group="write_parallel")
+def test_write_parallel_blosc(
+    benchmark,
+    backend,
+    read_write_zarr,
+    image,
+    rounds,
+    warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
+    store_path,
+    chunk_size,
+    blosc_clevel,
+    blosc_shuffle,
+    blosc_cname,
+    zarr_spec,
+    dtype,
+    shard_size,
+    processes,
+):
+    """Write disjoint, chunk-aligned slabs of the image into a single zarr array from multiple worker processes. The
+    array is created in setup, so each round only times the region writes. Worker processes (and their copy of the
+    image in shared memory) are started before benchmarking - use warmup rounds to exclude worker start-up / imports
+    from the results."""
+
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if not get_backend(backend).parallel_writes:
+        pytest.skip(f"Parallel writes are not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
+    blosc_compressor = read_write_zarr.get_blosc_compressor(
+        blosc_cname, blosc_clevel, blosc_shuffle, zarr_spec=zarr_spec
+    )
+    chunks = get_chunk_shape(chunk_size)
+    shards = get_shard_shape(shard_size)
+
+    # Images that aren't in memory are split into more slabs than processes, so each worker only reads part of the
+    # image into memory at a time
+    n_slabs = processes
+    if not is_in_memory(image):
+        n_slabs = max(processes, math.ceil(image.nbytes / DEFAULT_MAX_SLAB_BYTES))
+
+    # writes must be aligned to shards for sharded arrays, as each shard is a single file
+    regions = get_chunk_aligned_slabs(
+        image.shape, chunks if shards is None else shards, n_slabs
+    )
+    benchmark.extra_info["nbytes"] = image.nbytes
+    benchmark.extra_info["n_regions"] = len(regions)
+
+    def setup():
+        remove_output_dir(store_path)
+        read_write_zarr.create_zarr_array(
+            store_path,
+            shape=image.shape,
+            dtype=image.dtype,
+            overwrite=False,
+            chunks=chunks,
+            shards=shards,
+            compressor=blosc_compressor,
+            zarr_spec=zarr_spec,
+        )
+        return (executor, backend, store_path, regions), {"zarr_spec": zarr_spec}
+
+    with SharedImage(image) as shared_image:
+        with shared_image.create_executor(processes) as executor:
+            instrumentation.pedantic(
+                benchmark,
+                write_regions_in_parallel,
+                setup=setup,
+                rounds=rounds,
+                warmup_rounds=warmup_rounds,
+                memory_rounds=memory_rounds,
+                adaptive_rounds=adaptive_rounds,
+            )
+
+    validate_zarr.validate_blosc_zarr_metadata(
+        image,
+        store_path,
+        chunk_size,
+        shard_size,
+        blosc_clevel,
+        blosc_shuffle,
+        blosc_cname,
+        zarr_spec,
+        dtype,
+    )
+    np.testing.assert_array_equal(
+        read_write_zarr.read_zarr_array(store_path, zarr_spec=zarr_spec), image
+    )
@@ -0,0 +1,106 @@
+import itertools
+
+import pytest
+
+import tests.benchmarks.validate_zarr as validate_zarr
+from zarr_benchmarks import instrumentation
+from zarr_benchmarks.read_write_zarr import get_backend
+from zarr_benchmarks.selections import get_random_regions, get_region_nbytes
+from zarr_benchmarks.utils import get_chunk_shape, get_shard_shape, is_valid_shard_size
+
+pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
+
+
+@pytest.mark.benchmark(group="read_roi")
+def test_read_roi_blosc(
+    benchmark,
+    backend,
+    read_write_zarr,
+    image,
+    rounds,
+    warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
+    write_cached_store,
+    chunk_size,
+    blosc_clevel,
+    blosc_shuffle,
+    blosc_cname,
+    zarr_spec,
+    dtype,
+    shard_size,
+    roi_size,
+    roi_alignment,
+):
+    """Read a different random region of interest (ROI) in each round. Each round times a single ROI read from an
+    already opened array."""
+
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
+    blosc_compressor = read_write_zarr.get_blosc_compressor(
+        blosc_cname, blosc_clevel, blosc_shuffle, zarr_spec=zarr_spec
+    )
+    chunks = get_chunk_shape(chunk_size)
+
+    store_path = write_cached_store(
+        {
+            "blosc_cname": blosc_cname,
+            "blosc_clevel": blosc_clevel,
+            "blosc_shuffle": blosc_shuffle,
+        },
+        chunks=chunks,
+        shards=get_shard_shape(shard_size),
+        compressor=blosc_compressor,
+        zarr_spec=zarr_spec,
+    )
+
+    compression_ratio = read_write_zarr.get_compression_ratio(
+        store_path, zarr_spec=zarr_spec
+    )
+    benchmark.extra_info["compression_ratio"] = compression_ratio
+
+    regions = get_random_regions(
+        image.shape,
+        chunks,
+        roi_size,
+        roi_alignment,
+        n_regions=rounds + warmup_rounds,
+    )
+    # ROIs are clipped to the same size along each axis, so all read the same number of bytes
+    benchmark.extra_info["nbytes"] = get_region_nbytes(regions[0], image.itemsize)
+
+    zarr_array = read_write_zarr.open_zarr_array(store_path, zarr_spec=zarr_spec)
+    # memory rounds (untimed) run after the timed rounds, re-reading regions from the start
+    regions_iter = itertools.cycle(regions)
+
+    def setup():
+        return (zarr_array, next(regions_iter)), {}
+
+    instrumentation.pedantic(
+        benchmark,
+        read_write_zarr.read_zarr_region,
+        setup=setup,
+        rounds=rounds,
+        warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+    )
+
+    validate_zarr.validate_blosc_zarr_metadata(
+        image,
+        store_path,
+        chunk_size,
+        shard_size,
+        blosc_clevel,
+        blosc_shuffle,
+        blosc_cname,
+        zarr_spec,
+        dtype,
+    )
@@ -1,8 +1,11 @@
+import numpy as np
 import pytest
 
 import tests.benchmarks.validate_zarr as validate_zarr
-from zarr_benchmarks.read_write_zarr import read_write_zarr
-from zarr_benchmarks.utils import is_zarr_python_v2
+from zarr_benchmarks import instrumentation
+from zarr_benchmarks.read_write_zarr import get_backend
+from zarr_benchmarks.store_scan import scan_array_store
+from zarr_benchmarks.utils import get_chunk_shape, get_shard_shape, is_valid_shard_size
 
 pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
 
@@ -10,185 +13,406 @@ pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
 @pytest.mark.benchmark(group="read")
 def test_read_blosc(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
-    store_path,
+    memory_rounds,
+    adaptive_rounds,
+    write_cached_store,
     chunk_size,
     blosc_clevel,
     blosc_shuffle,
     blosc_cname,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
 
     blosc_compressor = read_write_zarr.get_blosc_compressor(
         blosc_cname, blosc_clevel, blosc_shuffle, zarr_spec=zarr_spec
     )
 
-    read_write_zarr.write_zarr_array(
-        image=image,
-        store_path=store_path,
-        overwrite=True,
-        chunks=(chunk_size, chunk_size, chunk_size),
+    store_path = write_cached_store(
+        {
+            "blosc_cname": blosc_cname,
+            "blosc_clevel": blosc_clevel,
+            "blosc_shuffle": blosc_shuffle,
+        },
+        chunks=get_chunk_shape(chunk_size),
+        shards=get_shard_shape(shard_size),
         compressor=blosc_compressor,
         zarr_spec=zarr_spec,
+        write_empty_chunks=write_empty_chunks,
     )
 
     compression_ratio = read_write_zarr.get_compression_ratio(
         store_path, zarr_spec=zarr_spec
     )
     benchmark.extra_info["compression_ratio"] = compression_ratio
+    benchmark.extra_info["nbytes"] = image.nbytes
 
-    benchmark.pedantic(
+    # chunk files written to the store (and chunks skipped as empty), and the disk space they use
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
+    )
+    benchmark.extra_info.update(store_scan.to_extra_info())
+
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.read_zarr_array,
         args=(store_path,),
-        kwargs={"zarr_spec": zarr_spec},
+        kwargs={
+            "zarr_spec": zarr_spec,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
+        },
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
     )
 
     validate_zarr.validate_blosc_zarr_metadata(
         image,
         store_path,
         chunk_size,
+        shard_size,
         blosc_clevel,
         blosc_shuffle,
         blosc_cname,
         zarr_spec,
+        dtype,
     )
 
 
 @pytest.mark.benchmark(group="read")
 def test_read_gzip(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
-    store_path,
+    memory_rounds,
+    adaptive_rounds,
+    write_cached_store,
     chunk_size,
     gzip_level,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
 
     gzip_compressor = read_write_zarr.get_gzip_compressor(
         gzip_level, zarr_spec=zarr_spec
     )
 
-    read_write_zarr.write_zarr_array(
-        image=image,
-        store_path=store_path,
-        overwrite=True,
-        chunks=(chunk_size, chunk_size, chunk_size),
+    store_path = write_cached_store(
+        {"gzip_level": gzip_level},
+        chunks=get_chunk_shape(chunk_size),
+        shards=get_shard_shape(shard_size),
         compressor=gzip_compressor,
         zarr_spec=zarr_spec,
+        write_empty_chunks=write_empty_chunks,
     )
 
     compression_ratio = read_write_zarr.get_compression_ratio(
         store_path, zarr_spec=zarr_spec
     )
     benchmark.extra_info["compression_ratio"] = compression_ratio
+    benchmark.extra_info["nbytes"] = image.nbytes
 
-    benchmark.pedantic(
+    # chunk files written to the store (and chunks skipped as empty), and the disk space they use
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
+    )
+    benchmark.extra_info.update(store_scan.to_extra_info())
+
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.read_zarr_array,
         args=(store_path,),
-        kwargs={"zarr_spec": zarr_spec},
+        kwargs={
+            "zarr_spec": zarr_spec,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
+        },
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
     )
 
     validate_zarr.validate_gzip_zarr_metadata(
-        image, store_path, chunk_size, gzip_level, zarr_spec
+        image, store_path, chunk_size, shard_size, gzip_level, zarr_spec, dtype
     )
 
 
 @pytest.mark.benchmark(group="read")
 def test_read_zstd(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
-    store_path,
+    memory_rounds,
+    adaptive_rounds,
+    write_cached_store,
     chunk_size,
     zstd_level,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
 
     zstd_compressor = read_write_zarr.get_zstd_compressor(
         zstd_level, zarr_spec=zarr_spec
     )
 
-    read_write_zarr.write_zarr_array(
-        image=image,
-        store_path=store_path,
-        overwrite=True,
-        chunks=(chunk_size, chunk_size, chunk_size),
+    store_path = write_cached_store(
+        {"zstd_level": zstd_level},
+        chunks=get_chunk_shape(chunk_size),
+        shards=get_shard_shape(shard_size),
         compressor=zstd_compressor,
         zarr_spec=zarr_spec,
+        write_empty_chunks=write_empty_chunks,
     )
 
     compression_ratio = read_write_zarr.get_compression_ratio(
         store_path, zarr_spec=zarr_spec
     )
     benchmark.extra_info["compression_ratio"] = compression_ratio
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    # chunk files written to the store (and chunks skipped as empty), and the disk space they use
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
+    )
+    benchmark.extra_info.update(store_scan.to_extra_info())
 
-    benchmark.pedantic(
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.read_zarr_array,
         args=(store_path,),
-        kwargs={"zarr_spec": zarr_spec},
+        kwargs={
+            "zarr_spec": zarr_spec,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
+        },
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
     )
 
     validate_zarr.validate_zstd_zarr_metadata(
-        image, store_path, chunk_size, zstd_level, zarr_spec
+        image, store_path, chunk_size, shard_size, zstd_level, zarr_spec, dtype
     )
 
 
 @pytest.mark.benchmark(group="read")
 def test_read_no_compressor(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
-    store_path,
+    memory_rounds,
+    adaptive_rounds,
+    write_cached_store,
     chunk_size,
     no_compressor,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
     if not no_compressor:
         pytest.skip("config didn't include no compressor")
 
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
 
-    read_write_zarr.write_zarr_array(
-        image=image,
-        store_path=store_path,
-        overwrite=True,
-        chunks=(chunk_size, chunk_size, chunk_size),
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
+    store_path = write_cached_store(
+        {"no_compressor": True},
+        chunks=get_chunk_shape(chunk_size),
+        shards=get_shard_shape(shard_size),
         compressor=None,
         zarr_spec=zarr_spec,
+        write_empty_chunks=write_empty_chunks,
     )
 
     compression_ratio = read_write_zarr.get_compression_ratio(
         store_path, zarr_spec=zarr_spec
     )
     benchmark.extra_info["compression_ratio"] = compression_ratio
+    benchmark.extra_info["nbytes"] = image.nbytes
 
-    benchmark.pedantic(
+    # chunk files written to the store (and chunks skipped as empty), and the disk space they use
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
+    )
+    benchmark.extra_info.update(store_scan.to_extra_info())
+
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.read_zarr_array,
         args=(store_path,),
-        kwargs={"zarr_spec": zarr_spec},
+        kwargs={
+            "zarr_spec": zarr_spec,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
+        },
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
     )
 
     validate_zarr.validate_no_compressor_zarr_metadata(
-        image, store_path, chunk_size, zarr_spec
+        image, store_path, chunk_size, shard_size, zarr_spec, dtype
+    )
+
+
+@pytest.mark.benchmark(group="read_preallocated")
+def test_read_blosc_preallocated(
+    benchmark,
+    backend,
+    read_write_zarr,
+    image,
+    rounds,
+    warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
+    write_cached_store,
+    chunk_size,
+    blosc_clevel,
+    blosc_shuffle,
+    blosc_cname,
+    zarr_spec,
+    shard_size,
+    concurrency,
+    preallocated_out,
+):
+    """Read into a newly allocated array each round (preallocated_out=False), or into a single output array that is
+    reused every round (preallocated_out=True). The output array is filled before benchmarking, so its pages are
+    already mapped - the difference between the two shows the cost of allocating / page-faulting a new array."""
+
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
+    blosc_compressor = read_write_zarr.get_blosc_compressor(
+        blosc_cname, blosc_clevel, blosc_shuffle, zarr_spec=zarr_spec
+    )
+
+    store_path = write_cached_store(
+        {
+            "blosc_cname": blosc_cname,
+            "blosc_clevel": blosc_clevel,
+            "blosc_shuffle": blosc_shuffle,
+        },
+        chunks=get_chunk_shape(chunk_size),
+        shards=get_shard_shape(shard_size),
+        compressor=blosc_compressor,
+        zarr_spec=zarr_spec,
+    )
+
+    compression_ratio = read_write_zarr.get_compression_ratio(
+        store_path, zarr_spec=zarr_spec
+    )
+    benchmark.extra_info["compression_ratio"] = compression_ratio
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    out = None
+    if preallocated_out:
+        out = np.zeros_like(image)
+
+    read_image = instrumentation.pedantic(
+        benchmark,
+        read_write_zarr.read_zarr_array,
+        args=(store_path,),
+        kwargs={
+            "zarr_spec": zarr_spec,
+            "concurrency": concurrency,
+            "out": out,
+        },
+        rounds=rounds,
+        warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
     )
+
+    if preallocated_out:
+        assert read_image is out
+    np.testing.assert_array_equal(read_image, image)
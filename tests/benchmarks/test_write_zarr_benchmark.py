@@ -1,8 +1,15 @@
 import pytest
 
 import tests.benchmarks.validate_zarr as validate_zarr
-from zarr_benchmarks.read_write_zarr import read_write_zarr
-from zarr_benchmarks.utils import is_zarr_python_v2, remove_output_dir
+from zarr_benchmarks import instrumentation
+from zarr_benchmarks.read_write_zarr import get_backend
+from zarr_benchmarks.store_scan import scan_array_store
+from zarr_benchmarks.utils import (
+    get_chunk_shape,
+    get_shard_shape,
+    is_valid_shard_size,
+    remove_output_dir,
+)
 
 pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
 
@@ -10,18 +17,34 @@ pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
 @pytest.mark.benchmark(group="write")
 def test_write_blosc(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
     store_path,
     chunk_size,
     blosc_clevel,
     blosc_shuffle,
     blosc_cname,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
     blosc_compressor = read_write_zarr.get_blosc_compressor(
         blosc_cname, blosc_clevel, blosc_shuffle, zarr_spec=zarr_spec
     )
@@ -32,42 +55,80 @@ def test_write_blosc(
             "image": image,
             "store_path": store_path,
             "overwrite": False,
-            "chunks": (chunk_size, chunk_size, chunk_size),
+            "chunks": get_chunk_shape(chunk_size),
+            "shards": get_shard_shape(shard_size),
             "compressor": blosc_compressor,
             "zarr_spec": zarr_spec,
+            "write_empty_chunks": write_empty_chunks,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
         }
 
-    benchmark.pedantic(
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.write_zarr_array,
         setup=setup,
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
+    )
+
+    # chunks skipped as empty (with write_empty_chunks=False) have no file in the store
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
     )
+    benchmark.extra_info.update(store_scan.to_extra_info())
 
     validate_zarr.validate_blosc_zarr_metadata(
         image,
         store_path,
         chunk_size,
+        shard_size,
         blosc_clevel,
         blosc_shuffle,
         blosc_cname,
         zarr_spec,
+        dtype,
     )
 
 
 @pytest.mark.benchmark(group="write")
 def test_write_gzip(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
     store_path,
     chunk_size,
     gzip_level,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
     gzip_compressor = read_write_zarr.get_gzip_compressor(
         gzip_level, zarr_spec=zarr_spec
     )
@@ -78,36 +139,72 @@ def test_write_gzip(
             "image": image,
             "store_path": store_path,
             "overwrite": False,
-            "chunks": (chunk_size, chunk_size, chunk_size),
+            "chunks": get_chunk_shape(chunk_size),
+            "shards": get_shard_shape(shard_size),
             "compressor": gzip_compressor,
             "zarr_spec": zarr_spec,
+            "write_empty_chunks": write_empty_chunks,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
         }
 
-    benchmark.pedantic(
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.write_zarr_array,
         setup=setup,
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
+    )
+
+    # chunks skipped as empty (with write_empty_chunks=False) have no file in the store
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
     )
+    benchmark.extra_info.update(store_scan.to_extra_info())
 
     validate_zarr.validate_gzip_zarr_metadata(
-        image, store_path, chunk_size, gzip_level, zarr_spec
+        image, store_path, chunk_size, shard_size, gzip_level, zarr_spec, dtype
     )
 
 
 @pytest.mark.benchmark(group="write")
 def test_write_zstd(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
     store_path,
     chunk_size,
     zstd_level,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
+
     zstd_compressor = read_write_zarr.get_zstd_compressor(
         zstd_level, zarr_spec=zarr_spec
     )
@@ -118,39 +215,74 @@ def test_write_zstd(
             "image": image,
             "store_path": store_path,
             "overwrite": False,
-            "chunks": (chunk_size, chunk_size, chunk_size),
+            "chunks": get_chunk_shape(chunk_size),
+            "shards": get_shard_shape(shard_size),
             "compressor": zstd_compressor,
             "zarr_spec": zarr_spec,
+            "write_empty_chunks": write_empty_chunks,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
         }
 
-    benchmark.pedantic(
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.write_zarr_array,
         setup=setup,
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
+    )
+
+    # chunks skipped as empty (with write_empty_chunks=False) have no file in the store
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
     )
+    benchmark.extra_info.update(store_scan.to_extra_info())
 
     validate_zarr.validate_zstd_zarr_metadata(
-        image, store_path, chunk_size, zstd_level, zarr_spec
+        image, store_path, chunk_size, shard_size, zstd_level, zarr_spec, dtype
     )
 
 
 @pytest.mark.benchmark(group="write")
 def test_write_no_compressor(
     benchmark,
+    backend,
+    read_write_zarr,
     image,
     rounds,
     warmup_rounds,
+    memory_rounds,
+    adaptive_rounds,
     store_path,
     chunk_size,
     no_compressor,
     zarr_spec,
+    dtype,
+    shard_size,
+    concurrency,
+    write_empty_chunks,
+    phase_timer,
 ):
     if not no_compressor:
         pytest.skip("config didn't include no compressor")
 
-    if zarr_spec == 3 and is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if zarr_spec not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_spec} is not supported by {backend}")
+
+    if shard_size is not None and zarr_spec == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    if not is_valid_shard_size(shard_size, chunk_size):
+        pytest.skip("Shard size must be a multiple of chunk size")
 
     def setup():
         remove_output_dir(store_path)
@@ -158,18 +290,38 @@ def test_write_no_compressor(
             "image": image,
             "store_path": store_path,
             "overwrite": False,
-            "chunks": (chunk_size, chunk_size, chunk_size),
+            "chunks": get_chunk_shape(chunk_size),
+            "shards": get_shard_shape(shard_size),
             "compressor": None,
             "zarr_spec": zarr_spec,
+            "write_empty_chunks": write_empty_chunks,
+            "concurrency": concurrency,
+            "phase_timer": phase_timer,
         }
 
-    benchmark.pedantic(
+    benchmark.extra_info["nbytes"] = image.nbytes
+
+    instrumentation.pedantic(
+        benchmark,
         read_write_zarr.write_zarr_array,
         setup=setup,
         rounds=rounds,
         warmup_rounds=warmup_rounds,
+        memory_rounds=memory_rounds,
+        adaptive_rounds=adaptive_rounds,
+        phase_timer=phase_timer,
+    )
+
+    # chunks skipped as empty (with write_empty_chunks=False) have no file in the store
+    store_scan = scan_array_store(
+        store_path,
+        image.shape,
+        get_chunk_shape(chunk_size),
+        get_shard_shape(shard_size),
+        zarr_store=get_backend(backend).zarr_store,
     )
+    benchmark.extra_info.update(store_scan.to_extra_info())
 
     validate_zarr.validate_no_compressor_zarr_metadata(
-        image, store_path, chunk_size, zarr_spec
+        image, store_path, chunk_size, shard_size, zarr_spec, dtype
     )
@@ -1,9 +1,10 @@
 from pathlib import Path
 from typing import Literal
 
+import numpy as np
 import numpy.typing as npt
 
-from zarr_benchmarks.utils import read_json_file
+from zarr_benchmarks.utils import get_chunk_shape, get_shard_shape, read_json_file
 
 
 def _read_zarr_metadata_file(store_path: Path, zarr_spec: Literal[2, 3]) -> dict:
@@ -12,41 +13,85 @@ def _read_zarr_metadata_file(store_path: Path, zarr_spec: Literal[2, 3]) -> dict
     else:
         metadata_file = store_path / "zarr.json"
 
+    if not metadata_file.exists():
+        # Not a Zarr store - should be an HDF5 file from the h5py backend, which can describe its settings in the same
+        # form as Zarr v2 metadata
+        from zarr_benchmarks.read_write_zarr import read_write_h5py
+
+        return read_write_h5py.get_zarr_v2_metadata(store_path)
+
     return read_json_file(metadata_file)
 
 
 def _validate_overall_settings(
-    zarr_metadata: dict, image: npt.NDArray, chunk_size: int, zarr_spec: Literal[2, 3]
+    zarr_metadata: dict,
+    image: npt.NDArray,
+    chunk_size: int | tuple[int, int, int],
+    shard_size: int | None,
+    zarr_spec: Literal[2, 3],
+    dtype: str | None,
 ) -> None:
+    # dtype=None benchmarks the image's own dtype
+    if dtype is not None:
+        assert image.dtype == np.dtype(dtype)
+
     if zarr_spec == 2:
-        assert zarr_metadata["chunks"] == [chunk_size, chunk_size, chunk_size]
+        assert shard_size is None
+        assert zarr_metadata["chunks"] == list(get_chunk_shape(chunk_size))
         assert zarr_metadata["zarr_format"] == 2
         assert zarr_metadata["shape"] == list(image.shape)
         assert zarr_metadata["dtype"] == image.dtype.str
     else:
-        assert zarr_metadata["chunk_grid"]["configuration"]["chunk_shape"] == [
-            chunk_size,
-            chunk_size,
-            chunk_size,
-        ]
+        # with sharding, the outer chunk grid is the shard shape
+        grid_shape = get_chunk_shape(chunk_size)
+        if shard_size is not None:
+            grid_shape = get_shard_shape(shard_size)
+        assert zarr_metadata["chunk_grid"]["configuration"]["chunk_shape"] == list(
+            grid_shape
+        )
         assert zarr_metadata["zarr_format"] == 3
         assert zarr_metadata["shape"] == list(image.shape)
         assert zarr_metadata["data_type"] == str(image.dtype)
 
 
+def _get_codecs(
+    zarr_metadata: dict,
+    chunk_size: int | tuple[int, int, int],
+    shard_size: int | None,
+) -> list[dict]:
+    """Get the codecs applied to each chunk of a zarr spec v3 array. For sharded arrays, check the sharding_indexed
+    codec settings and return its inner codecs."""
+
+    if shard_size is None:
+        return zarr_metadata["codecs"]
+
+    assert len(zarr_metadata["codecs"]) == 1
+    sharding_codec = zarr_metadata["codecs"][0]
+
+    assert sharding_codec["name"] == "sharding_indexed"
+    assert sharding_codec["configuration"]["chunk_shape"] == list(
+        get_chunk_shape(chunk_size)
+    )
+    return sharding_codec["configuration"]["codecs"]
+
+
 def validate_blosc_zarr_metadata(
     image: npt.NDArray,
     store_path: Path,
-    chunk_size: int,
+    chunk_size: int | tuple[int, int, int],
+    shard_size: int | None,
     blosc_clevel: int,
     blosc_shuffle: Literal["shuffle", "noshuffle", "bitshuffle"],
     blosc_cname: str,
     zarr_spec: Literal[2, 3],
+    dtype: str | None,
 ) -> None:
     """Check JSON metadata of Zarr (saved at store_path) matches given image / blosc settings."""
 
     zarr_metadata = _read_zarr_metadata_file(store_path, zarr_spec)
-    _validate_overall_settings(zarr_metadata, image, chunk_size, zarr_spec)
+    _validate_overall_settings(
+        zarr_metadata, image, chunk_size, shard_size, zarr_spec, dtype
+    )
 
     # Validate specific blosc compression settings
     if zarr_spec == 2:
@@ -58,8 +103,9 @@ def validate_blosc_zarr_metadata(
         assert compressor["cname"] == blosc_cname
         assert compressor["shuffle"] == shuffle_values[blosc_shuffle]
     else:
-        assert len(zarr_metadata["codecs"]) == 2
-        compressor_codec = zarr_metadata["codecs"][1]
+        codecs = _get_codecs(zarr_metadata, chunk_size, shard_size)
+        assert len(codecs) == 2
+        compressor_codec = codecs[1]
 
         assert compressor_codec["name"] == "blosc"
         assert compressor_codec["configuration"]["clevel"] == blosc_clevel
@@ -70,14 +116,18 @@ def validate_blosc_zarr_metadata(
 def validate_gzip_zarr_metadata(
     image: npt.NDArray,
     store_path: Path,
-    chunk_size: int,
+    chunk_size: int | tuple[int, int, int],
+    shard_size: int | None,
     gzip_level: int,
     zarr_spec: Literal[2, 3],
+    dtype: str | None,
 ) -> None:
     """Check JSON metadata of Zarr (saved at store_path) matches given image / gzip settings."""
 
     zarr_metadata = _read_zarr_metadata_file(store_path, zarr_spec)
-    _validate_overall_settings(zarr_metadata, image, chunk_size, zarr_spec)
+    _validate_overall_settings(
+        zarr_metadata, image, chunk_size, shard_size, zarr_spec, dtype
+    )
 
     # Validate specific gzip compression settings
     if zarr_spec == 2:
@@ -85,8 +135,9 @@ def validate_gzip_zarr_metadata(
         assert compressor["id"] == "gzip"
         assert compressor["level"] == gzip_level
     else:
-        assert len(zarr_metadata["codecs"]) == 2
-        compressor_codec = zarr_metadata["codecs"][1]
+        codecs = _get_codecs(zarr_metadata, chunk_size, shard_size)
+        assert len(codecs) == 2
+        compressor_codec = codecs[1]
 
         assert compressor_codec["name"] == "gzip"
         assert compressor_codec["configuration"]["level"] == gzip_level
@@ -95,14 +146,18 @@ def validate_gzip_zarr_metadata(
 def validate_zstd_zarr_metadata(
     image: npt.NDArray,
     store_path: Path,
-    chunk_size: int,
+    chunk_size: int | tuple[int, int, int],
+    shard_size: int | None,
     zstd_level: int,
     zarr_spec: Literal[2, 3],
+    dtype: str | None,
 ) -> None:
     """Check JSON metadata of Zarr (saved at store_path) matches given image / zstd settings."""
 
     zarr_metadata = _read_zarr_metadata_file(store_path, zarr_spec)
-    _validate_overall_settings(zarr_metadata, image, chunk_size, zarr_spec)
+    _validate_overall_settings(
+        zarr_metadata, image, chunk_size, shard_size, zarr_spec, dtype
+    )
 
     # Validate specific zstd compression settings
     if zarr_spec == 2:
@@ -110,28 +165,37 @@ def validate_zstd_zarr_metadata(
         assert compressor["id"] == "zstd"
         assert compressor["level"] == zstd_level
     else:
-        assert len(zarr_metadata["codecs"]) == 2
-        compressor_codec = zarr_metadata["codecs"][1]
+        codecs = _get_codecs(zarr_metadata, chunk_size, shard_size)
+        assert len(codecs) == 2
+        compressor_codec = codecs[1]
 
         assert compressor_codec["name"] == "zstd"
         assert compressor_codec["configuration"]["level"] == zstd_level
 
 
 def validate_no_compressor_zarr_metadata(
-    image: npt.NDArray, store_path: Path, chunk_size: int, zarr_spec: Literal[2, 3]
+    image: npt.NDArray,
+    store_path: Path,
+    chunk_size: int | tuple[int, int, int],
+    shard_size: int | None,
+    zarr_spec: Literal[2, 3],
+    dtype: str | None,
 ) -> None:
     """Check JSON metadata of Zarr (saved at store_path) matches given image / settings. There should be no metadata
     relating to compression stored in this case."""
 
     zarr_metadata = _read_zarr_metadata_file(store_path, zarr_spec)
-    _validate_overall_settings(zarr_metadata, image, chunk_size, zarr_spec)
+    _validate_overall_settings(
+        zarr_metadata, image, chunk_size, shard_size, zarr_spec, dtype
+    )
 
     # Validate that there are no compression settings
     if zarr_spec == 2:
         assert zarr_metadata["compressor"] is None
     else:
-        assert len(zarr_metadata["codecs"]) == 1
-        assert zarr_metadata["codecs"][0] == {
+        codecs = _get_codecs(zarr_metadata, chunk_size, shard_size)
+        assert len(codecs) == 1
+        assert codecs[0] == {
             "configuration": {"endian": "little"},
             "name": "bytes",
         }
@@ -1,5 +1,7 @@
 import itertools
 import pathlib
+from collections.abc import Callable
+from types import ModuleType
 
 import numpy as np
 import pytest
@@ -8,8 +10,27 @@ from zarr_benchmarks.fetch_datasets import (
     get_dense_segmentation,
     get_heart,
     get_sparse_segmentation,
+    open_npy_image,
 )
-from zarr_benchmarks.utils import read_json_file
+from zarr_benchmarks.instrumentation import AdaptiveRounds
+from zarr_benchmarks.phase_timing import PhaseTimer
+from zarr_benchmarks.read_write_zarr import (
+    get_available_backends,
+    get_backend,
+    get_default_backend,
+)
+from zarr_benchmarks.store_cache import StoreCache, hash_image
+from zarr_benchmarks.synthetic_images import IMAGE_KINDS, generate_image
+from zarr_benchmarks.utils import cast_image, read_json_file
+
+
+def _parse_shard(shard: str) -> tuple[int, int]:
+    """Parse a --shard option of the form 'index/count'"""
+    index, count = (int(value) for value in shard.split("/"))
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be between 0 and {count - 1}")
+
+    return index, count
 
 
 def pytest_addoption(parser):
@@ -26,11 +47,83 @@ def pytest_addoption(parser):
         action="store",
         default="dev",
         type=str,
-        choices=["dev", "heart", "dense", "sparse"],
+        choices=["dev", "heart", "dense", "sparse", *IMAGE_KINDS],
         help="Type of image to run benchmarks with: 'dev' is a small 128x128x128 numpy array for testing purposes, "
         "'heart' is an image of a heart from the human organ atlas, 'dense' is a dense segmentation (small subset of "
         "C3 segmentation data from the H01 release) and 'sparse' is a sparse segmentation (small subset of '104 "
-        "proofread cells' from the H01 release).",
+        "proofread cells' from the H01 release). 'smooth', 'microscopy' and 'labels' are seeded synthetic images (see "
+        "zarr_benchmarks.synthetic_images), with shape --synthetic-shape.",
+    )
+
+    parser.addoption(
+        "--synthetic-shape",
+        action="store",
+        default=(256, 256, 256),
+        type=lambda shape: tuple(int(dim_size) for dim_size in shape.split(",")),
+        help="Shape of synthetic images (--image=smooth / microscopy / labels), as comma-separated sizes e.g. "
+        "'512,512,512'",
+    )
+
+    parser.addoption(
+        "--synthetic-seed",
+        action="store",
+        default=0,
+        type=int,
+        help="Random seed for synthetic images",
+    )
+
+    parser.addoption(
+        "--image-file",
+        action="store",
+        default=None,
+        type=pathlib.Path,
+        help="Path to a 3D image saved as a .npy file, to run benchmarks with instead of --image. The file is opened as "
+        "a memory map and written in slabs, so images larger than memory can be benchmarked.",
+    )
+
+    parser.addoption(
+        "--output-dir",
+        action="store",
+        default=pathlib.Path("data/output"),
+        type=pathlib.Path,
+        help="Directory to write stores to from benchmarks",
+    )
+
+    parser.addoption(
+        "--shard",
+        action="store",
+        default=None,
+        type=_parse_shard,
+        help="Only run one share of the collected tests, given as 'index/count' e.g. '0/4' runs the first of 4 shares. "
+        "Used by zarr_benchmarks.parallel_runner to split benchmarks between worker processes.",
+    )
+
+    parser.addoption(
+        "--store-cache-dir",
+        action="store",
+        default=pathlib.Path("data/store_cache"),
+        type=pathlib.Path,
+        help="Directory to cache stores written by read benchmarks in, so each store is only written once (and reused "
+        "by later runs with the same image / settings)",
+    )
+
+    parser.addoption(
+        "--store-cache-size",
+        action="store",
+        default=10.0,
+        type=float,
+        help="Maximum size of the store cache in GB - the least recently used stores are removed once it grows larger "
+        "than this. 0 disables the cache, so stores are re-written for every read benchmark.",
+    )
+
+    parser.addoption(
+        "--backend",
+        action="store",
+        default="default",
+        type=str,
+        help="Backends to run benchmarks with: 'default' uses the first installed of tensorstore / zarr-python, 'all' "
+        "runs every backend installed in the current environment, or give a comma-separated list of backend names "
+        "e.g. 'tensorstore,zarr_python_3'.",
     )
 
     parser.addoption(
@@ -49,6 +142,43 @@ def pytest_addoption(parser):
         help="Number of warmup rounds for each benchmark",
     )
 
+    parser.addoption(
+        "--target-precision",
+        action="store",
+        default=None,
+        type=float,
+        help="Run each benchmark for as many rounds as needed to measure its mean time to this precision (the half-width "
+        "of the mean's 95%% confidence interval, relative to the mean) e.g. 0.05 for +-5%%. --rounds untimed pilot "
+        "rounds (at least 3) are run first, to estimate how many rounds are needed. If not set, every benchmark runs "
+        "for --rounds rounds.",
+    )
+
+    parser.addoption(
+        "--time-budget",
+        action="store",
+        default=60.0,
+        type=float,
+        help="With --target-precision, the maximum time in seconds to spend on each benchmark. Benchmarks that can't "
+        "reach the target precision within this time run for as many rounds as fit (but at least 3).",
+    )
+
+    parser.addoption(
+        "--memory-rounds",
+        action="store",
+        default=1,
+        type=int,
+        help="Number of extra, untimed rounds to run for each benchmark to measure peak memory (stored in "
+        "extra_info). Memory is never measured in timed rounds, as tracing allocations slows them down. 0 disables "
+        "memory measurement.",
+    )
+
+    parser.addoption(
+        "--phase-timing",
+        action="store_true",
+        help="Split the time of each read / write round into phases (opening the array, I/O, codecs and other), "
+        "stored in extra_info. This adds some overhead to every chunk read / written.",
+    )
+
 
 @pytest.fixture
 def rounds(request):
@@ -60,11 +190,48 @@ def warmup_rounds(request):
     return request.config.getoption("--warmup-rounds")
 
 
+@pytest.fixture
+def memory_rounds(request):
+    return request.config.getoption("--memory-rounds")
+
+
+@pytest.fixture
+def adaptive_rounds(request) -> AdaptiveRounds | None:
+    """Settings to choose the number of rounds of each benchmark (see --target-precision), or None to run --rounds
+    rounds."""
+    target_precision = request.config.getoption("--target-precision")
+    if target_precision is None:
+        return None
+
+    return AdaptiveRounds(
+        target_precision, time_budget=request.config.getoption("--time-budget")
+    )
+
+
+@pytest.fixture
+def read_write_zarr(backend: str) -> ModuleType:
+    """Read / write module of the backend this test is parametrized with (see --backend)"""
+    return get_backend(backend).load()
+
+
+@pytest.fixture
+def phase_timer(request) -> PhaseTimer | None:
+    """PhaseTimer to record the time of each phase of a read / write, or None if --phase-timing isn't set."""
+    if request.config.getoption("--phase-timing"):
+        return PhaseTimer()
+    return None
+
+
 @pytest.fixture(scope="session")
-def image(request):
+def source_image(request):
     """Return image selected via --image option as a numpy array. If --image=dev, a small 128x128x128 numpy array is
-    used, otherwise the relevant image is fetched from zenodo (or the cache if already downloaded). Reading the full
-    size images are quite slow, so we only do it once per testing session."""
+    used, synthetic images are generated from --synthetic-seed, otherwise the relevant image is fetched from zenodo (or
+    the cache if already downloaded) and opened as a read-only memory map of its decoded .npy file. If --image-file is
+    given, that file is opened as a read-only memory map instead."""
+
+    image_file = request.config.getoption("--image-file")
+    if image_file is not None:
+        return open_npy_image(image_file)
 
     image_type = request.config.getoption("--image")
 
@@ -77,14 +244,115 @@ def image(request):
             return get_dense_segmentation()
         case "sparse":
             return get_sparse_segmentation()
+        case "smooth" | "microscopy" | "labels":
+            return generate_image(
+                image_type,
+                request.config.getoption("--synthetic-shape"),
+                seed=request.config.getoption("--synthetic-seed"),
+            )
         case _:
             raise ValueError(f"Invalid --image option {image_type}")
 
 
+@pytest.fixture(scope="session")
+def image_casts() -> dict[str, np.ndarray]:
+    """Cache of the source image cast to each dtype, so each cast is only made once per testing session."""
+    return {}
+
+
+@pytest.fixture
+def image(source_image, dtype, image_casts):
+    """Source image (see --image) cast to the dtype this test is parametrized with, or unchanged if dtype is None."""
+    if dtype is None:
+        return source_image
+
+    if dtype not in image_casts:
+        image_casts[dtype] = cast_image(source_image, dtype)
+    return image_casts[dtype]
+
+
 @pytest.fixture()
-def store_path():
+def store_path(request):
     """Path to store zarr images written from benchmarks"""
-    return pathlib.Path("data/output/temp-benchmarks.zarr")
+    return request.config.getoption("--output-dir") / "temp-benchmarks.zarr"
+
+
+@pytest.fixture(scope="session")
+def store_cache(request) -> StoreCache | None:
+    """Cache of stores written for read benchmarks (see --store-cache-dir / --store-cache-size), or None if disabled"""
+    max_gb = request.config.getoption("--store-cache-size")
+    if max_gb <= 0:
+        return None
+
+    return StoreCache(
+        request.config.getoption("--store-cache-dir"), max_nbytes=int(max_gb * 1e9)
+    )
+
+
+@pytest.fixture(scope="session")
+def image_hashes() -> dict[str | None, str]:
+    """Cache of the hash of the image cast to each dtype, so each image is only hashed once per testing session."""
+    return {}
+
+
+@pytest.fixture
+def write_cached_store(
+    backend, read_write_zarr, image, dtype, image_hashes, store_path, store_cache
+) -> Callable[..., pathlib.Path]:
+    """Function to write the image to a store for read benchmarks, returning the store's path. Call with the
+    benchmark's codec params (a dict, e.g. {"zstd_level": 3}) followed by keyword arguments for write_zarr_array.
+
+    If the store cache is enabled, the store is only written if the image hasn't already been written with the same
+    backend, codec params and write_zarr_array arguments - otherwise the cached store is returned. Cached stores may be
+    shared by several benchmarks, so must not be modified. If the cache is disabled, the store is written to
+    store_path."""
+
+    def write(codec_params: dict, **write_kwargs) -> pathlib.Path:
+        if store_cache is None:
+            read_write_zarr.write_zarr_array(
+                image=image, store_path=store_path, overwrite=True, **write_kwargs
+            )
+            return store_path
+
+        if dtype not in image_hashes:
+            image_hashes[dtype] = hash_image(image)
+
+        # compressor objects are specific to each backend, so the codec params identify the compressor instead
+        params = {
+            "image": image_hashes[dtype],
+            "backend": backend,
+            **codec_params,
+            **{
+                name: value
+                for name, value in write_kwargs.items()
+                if name != "compressor"
+            },
+        }
+        return store_cache.get_store(
+            params,
+            lambda path: read_write_zarr.write_zarr_array(
+                image=image, store_path=path, overwrite=True, **write_kwargs
+            ),
+        )
+
+    return write
+
+
+def _expand_range(values: dict) -> range | list[tuple[int, ...]]:
+    """Expand a min/max (and optional step) range to a list of values. Ranges given per axis, as (z, y, x) lists,
+    expand to every combination of the values along each axis."""
+    bounds = [values["min"], values["max"], values.get("step", 1)]
+    if all(isinstance(bound, int) for bound in bounds):
+        return range(values["min"], values["max"] + 1, values.get("step", 1))
+
+    min_shape, max_shape, step_shape = [
+        [bound] * 3 if isinstance(bound, int) else bound for bound in bounds
+    ]
+    axis_ranges = [
+        range(axis_min, axis_max + 1, axis_step)
+        for axis_min, axis_max, axis_step in zip(min_shape, max_shape, step_shape)
+    ]
+    return list(itertools.product(*axis_ranges))
 
 
 def _expand_min_max(config: dict) -> dict:
@@ -93,7 +361,14 @@ def _expand_min_max(config: dict) -> dict:
     for key in ["chunk_size", "blosc_clevel", "gzip_level", "zstd_level"]:
         values = config[key]
         if "min" in values and "max" in values:
-            config[key] = range(values["min"], values["max"] + 1)
+            config[key] = _expand_range(values)
+
+    # chunk sizes are either an int (for cubic chunks) or an explicit (z, y, x) shape - make shapes tuples, so they can
+    # be compared / hashed like other parameters
+    config["chunk_size"] = [
+        chunk_size if isinstance(chunk_size, int) else tuple(chunk_size)
+        for chunk_size in config["chunk_size"]
+    ]
 
     return config
 
@@ -127,18 +402,70 @@ def _parse_config_files(config_name: str) -> list[dict]:
     return configs
 
 
+def _get_backend_names(backend_option: str) -> list[str]:
+    match backend_option:
+        case "default":
+            return [get_default_backend().name]
+        case "all":
+            return [backend.name for backend in get_available_backends()]
+        case _:
+            backend_names = backend_option.split(",")
+            for name in backend_names:
+                if not get_backend(name).is_available():
+                    raise pytest.UsageError(
+                        f"Backend {name} is not installed in the current environment"
+                    )
+            return backend_names
+
+
+def _sort_key(parameter_combination: tuple) -> tuple:
+    """Sort key for a combination of parameters, that places None values (e.g. shard_size=None) first and ints before
+    tuples (e.g. chunk_size=128 before chunk_size=(32, 256, 256)), rather than comparing them to other types."""
+    return tuple(
+        (value is not None, isinstance(value, tuple), value)
+        for value in parameter_combination
+    )
+
+
+def _get_parameter_id(value) -> str | None:
+    """Readable test ids for chunk shapes e.g. 32x256x256 (other values use pytest's default ids)"""
+    if isinstance(value, tuple):
+        return "x".join(str(axis_value) for axis_value in value)
+    return None
+
+
+def _applies_to(config: dict, metafunc: pytest.Metafunc) -> bool:
+    """Whether config applies to the given function. Configs with 'benchmark_groups' only apply to benchmarks in those
+    groups, so e.g. the chunk sizes in roi.json aren't added to the standard read / write benchmarks."""
+    if "benchmark_groups" not in config:
+        return True
+
+    benchmark_marker = metafunc.definition.get_closest_marker("benchmark")
+    if benchmark_marker is None:
+        return True
+
+    return benchmark_marker.kwargs.get("group") in config["benchmark_groups"]
+
+
 def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
-    """Parse the config file, and parametrize the given function with these values. pytest_generate_tests is called
-    once per test function, during the collection stage."""
+    """Parse the config file, and parametrize the given function with these values (plus the selected backends, for
+    functions that use them). pytest_generate_tests is called once per test function, during the collection stage."""
+
+    if "backend" in metafunc.fixturenames:
+        backend_names = _get_backend_names(metafunc.config.getoption("backend"))
+        metafunc.parametrize("backend", backend_names)
 
     config_name = metafunc.config.getoption("config")
-    configs = _parse_config_files(config_name)
+    all_configs = _parse_config_files(config_name)
 
     # keys from the config, that are used as arguments for this function
-    used_config_keys = [key for key in configs[0] if key in metafunc.fixturenames]
+    used_config_keys = [key for key in all_configs[0] if key in metafunc.fixturenames]
     if len(used_config_keys) == 0:
         return
 
+    # if no configs apply, the function is parametrized with no values (so is skipped)
+    configs = [config for config in all_configs if _applies_to(config, metafunc)]
+
     # generate all combinations of parameters for each config, and add to a set to remove any duplicate combos
     parametrize_values: set[tuple] = set()
     for config in configs:
@@ -147,6 +474,29 @@ def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
         parametrize_values.update(parameter_combinations)
 
     # sort values for parametrize, so they are more readable in pytest output
-    parametrize_values_list = sorted(list(parametrize_values))
+    parametrize_values_list = sorted(list(parametrize_values), key=_sort_key)
+
+    metafunc.parametrize(
+        used_config_keys, parametrize_values_list, ids=_get_parameter_id
+    )
 
-    metafunc.parametrize(used_config_keys, parametrize_values_list)
+
+def _select_shard(items: list, shard: tuple[int, int]) -> list:
+    """Every count-th item, starting at index. Parameter combinations are collected in sorted order, so taking every
+    count-th item (rather than a contiguous block) gives each shard a similar mix of small / large parameters."""
+    index, count = shard
+    return items[index::count]
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list) -> None:
+    """Only keep the share of tests selected by --shard"""
+    shard = config.getoption("shard")
+    if shard is None:
+        return
+
+    selected = _select_shard(items, shard)
+    selected_ids = {id(item) for item in selected}
+    config.hook.pytest_deselected(
+        items=[item for item in items if id(item) not in selected_ids]
+    )
+    items[:] = selected
@@ -0,0 +1,99 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("seaborn")
+
+from zarr_benchmarks.compare_results import (  # noqa: E402
+    CASE_COLUMNS,
+    adjust_p_values,
+    compare_results,
+    mann_whitney_u_test,
+)
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+
+def _results_df(data_by_chunk_size: dict[int, list[float] | None]) -> pd.DataFrame:
+    """Results dataframe (as from get_benchmarks_dataframe) with one read benchmark per chunk size"""
+    rows = []
+    for chunk_size, data in data_by_chunk_size.items():
+        row = {col: None for col in CASE_COLUMNS}
+        row.update(
+            {
+                "package": "tensorstore",
+                "group": "read",
+                "chunk_size": chunk_size,
+                "stats.data": data,
+            }
+        )
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def test_mann_whitney_u_test():
+    u_statistic, p_value = mann_whitney_u_test([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u_statistic == 25
+    assert p_value == pytest.approx(0.01219, abs=1e-5)
+
+    # the test is symmetric
+    u_statistic, p_value = mann_whitney_u_test([6, 7, 8, 9, 10], [1, 2, 3, 4, 5])
+    assert u_statistic == 0
+    assert p_value == pytest.approx(0.01219, abs=1e-5)
+
+    # ties count as half
+    u_statistic, _ = mann_whitney_u_test([1, 1, 2], [1, 2, 2])
+    assert u_statistic == 6
+
+    assert mann_whitney_u_test([1, 1], [1, 1]) == (2, 1.0)
+
+
+def test_adjust_p_values():
+    assert adjust_p_values([0.01, 0.04, 0.03, 0.5]) == pytest.approx(
+        [0.04, 0.04 * 4 / 3, 0.04 * 4 / 3, 0.5]
+    )
+    assert adjust_p_values([]) == []
+
+
+def test_compare_results():
+    baseline_df = _results_df(
+        {
+            32: [1.0, 1.1, 1.2, 1.0, 1.1, 1.2, 1.0, 1.1],
+            64: [1.0, 1.1, 1.2, 1.0, 1.1, 1.2, 1.0, 1.1],
+            128: [1.0, 1.1, 1.2, 1.0, 1.1, 1.2, 1.0, 1.1],
+            256: [1.0, 1.1, 1.2],
+            512: None,
+        }
+    )
+    contender_df = _results_df(
+        {
+            # regression
+            32: [2.0, 2.1, 2.2, 2.0, 2.1, 2.2, 2.0, 2.1],
+            # speedup
+            64: [0.5, 0.6, 0.5, 0.6, 0.5, 0.6, 0.5, 0.6],
+            # no change
+            128: [1.1, 1.0, 1.2, 1.1, 1.0, 1.2, 1.1, 1.0],
+            256: [1.0, 1.1, 1.2],
+            512: [1.0, 1.1, 1.2],
+            # not in baseline
+            1024: [1.0, 1.1, 1.2],
+        }
+    )
+
+    comparison_df = compare_results(baseline_df, contender_df)
+
+    assert list(comparison_df.chunk_size) == [32, 64, 128, 256]
+    assert list(comparison_df.change) == ["regression", "speedup", None, None]
+    assert comparison_df.ratio[0] == pytest.approx(2.1 / 1.1)
+    assert list(comparison_df.cliffs_delta[:2]) == [1, -1]
+
+    # changes smaller than min_change aren't reported
+    comparison_df = compare_results(baseline_df, contender_df, min_change=0.9)
+    assert list(comparison_df.change) == ["regression", None, None, None]
+
+
+def test_compare_results_duplicate_cases():
+    baseline_df = _results_df({32: [1.0, 1.1]})
+    with pytest.raises(ValueError, match="more than one benchmark"):
+        compare_results(pd.concat([baseline_df, baseline_df]), baseline_df)
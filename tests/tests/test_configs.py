@@ -1,8 +1,10 @@
+import re
 from pathlib import Path
 
 import jsonschema
 import pytest
 
+from tests.conftest import _expand_min_max
 from zarr_benchmarks import utils
 
 # mark as tensorstore, so tests in this file are only run once and not for every tox environment
@@ -18,3 +20,42 @@ def test_schemas_valid():
     for config_file in configs_dir.glob("*.json"):
         json_to_validate = utils.read_json_file(config_file)
         jsonschema.validate(schema=schema, instance=json_to_validate)
+
+
+def test_benchmark_groups_exist():
+    """Check the 'benchmark_groups' of each config name groups used by benchmarks under tests/benchmarks"""
+
+    benchmarks_dir = Path(__file__).parent.parent / "benchmarks"
+    groups = set()
+    for benchmark_file in benchmarks_dir.glob("test_*.py"):
+        groups.update(
+            re.findall(r'benchmark\(group="(\w+)"\)', benchmark_file.read_text())
+        )
+
+    for config_file in (benchmarks_dir / "benchmark_configs").glob("*.json"):
+        config = utils.read_json_file(config_file)
+        assert set(config.get("benchmark_groups", [])) <= groups, config_file.name
+
+
+@pytest.mark.parametrize(
+    "config_chunk_size, expected",
+    [
+        ([64, [1, 1024, 1024]], [64, (1, 1024, 1024)]),
+        ({"min": 62, "max": 64}, [62, 63, 64]),
+        ({"min": 32, "max": 128, "step": 32}, [32, 64, 96, 128]),
+        (
+            {"min": [8, 128, 128], "max": [16, 256, 128], "step": [8, 128, 1]},
+            [(8, 128, 128), (8, 256, 128), (16, 128, 128), (16, 256, 128)],
+        ),
+    ],
+)
+def test_expand_chunk_size(config_chunk_size, expected):
+    """Check chunk sizes / shapes (and ranges of them) expand to the expected values"""
+    config = {
+        "chunk_size": config_chunk_size,
+        "blosc_clevel": [3],
+        "gzip_level": [],
+        "zstd_level": [],
+    }
+
+    assert list(_expand_min_max(config)["chunk_size"]) == expected
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from zarr_benchmarks import fetch_datasets
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+IMAGE_NAME = "test-image.zarr"
+
+
+@pytest.fixture
+def decoded_images(tmp_path, monkeypatch) -> list[str]:
+    """Use a temporary zenodo cache with a single image, recording the name of each image decoded from zarr"""
+    monkeypatch.setattr(fetch_datasets.ZENODO, "path", tmp_path)
+    monkeypatch.setitem(fetch_datasets.ZENODO.registry, f"{IMAGE_NAME}.zip", "md5:1")
+
+    decoded_images = []
+
+    def fetch_from_zenodo(image_name):
+        decoded_images.append(image_name)
+        return np.arange(4 * 5 * 6, dtype=np.uint16).reshape(4, 5, 6)
+
+    monkeypatch.setattr(fetch_datasets, "_fetch_from_zenodo", fetch_from_zenodo)
+    return decoded_images
+
+
+def test_decoded_image_is_reused(decoded_images):
+    image = fetch_datasets._get_decoded_image(IMAGE_NAME)
+
+    assert isinstance(image, np.memmap)
+    assert image.shape == (4, 5, 6)
+    assert image.dtype == np.uint16
+    assert image[-1, -1, -1] == 4 * 5 * 6 - 1
+
+    np.testing.assert_array_equal(fetch_datasets._get_decoded_image(IMAGE_NAME), image)
+    assert decoded_images == [IMAGE_NAME]
+
+
+def test_decoded_image_updated_with_registry(decoded_images, monkeypatch):
+    fetch_datasets._get_decoded_image(IMAGE_NAME)
+    monkeypatch.setitem(fetch_datasets.ZENODO.registry, f"{IMAGE_NAME}.zip", "md5:2")
+    fetch_datasets._get_decoded_image(IMAGE_NAME)
+
+    assert decoded_images == [IMAGE_NAME, IMAGE_NAME]
+
+    # no temporary files are left behind
+    assert sorted(path.name for path in fetch_datasets.ZENODO.path.iterdir()) == [
+        f"{IMAGE_NAME}.npy",
+        f"{IMAGE_NAME}.npy.json",
+    ]
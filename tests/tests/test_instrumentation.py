@@ -0,0 +1,177 @@
+import itertools
+import math
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from zarr_benchmarks.instrumentation import (
+    MIN_ADAPTIVE_ROUNDS,
+    AdaptiveRounds,
+    CpuTime,
+    PeakMemory,
+    get_precision,
+    get_t_quantile,
+    pedantic,
+)
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+NBYTES = 64 * 1024 * 1024
+
+
+def test_peak_memory_of_allocation():
+    """Check both peak measures include a temporary array that is freed before exit"""
+    with PeakMemory() as peak_memory:
+        array = np.ones(NBYTES, dtype=np.uint8)
+        # give the background thread time to sample RSS
+        time.sleep(0.1)
+        del array
+
+    assert peak_memory.tracemalloc_peak >= NBYTES
+    assert peak_memory.peak_rss >= NBYTES / 2
+
+
+def test_peak_memory_excludes_existing_memory():
+    """Check memory allocated before entry isn't counted"""
+    array = np.ones(NBYTES, dtype=np.uint8)
+
+    with PeakMemory() as peak_memory:
+        array.sum()
+
+    assert peak_memory.tracemalloc_peak < NBYTES / 2
+    assert peak_memory.peak_rss < NBYTES / 2
+
+
+def test_tracemalloc_stopped_on_exit():
+    with PeakMemory():
+        assert tracemalloc.is_tracing()
+
+    assert not tracemalloc.is_tracing()
+
+
+def test_cpu_time_of_busy_loop():
+    """Check a loop that keeps a single core busy has CPU time close to its wall time"""
+    with CpuTime() as cpu:
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.2:
+            pass
+
+    assert cpu.wall_time >= 0.2
+    assert 0.5 < cpu.cpu_utilisation <= 1.1
+
+
+def test_cpu_time_of_sleep():
+    with CpuTime() as cpu:
+        time.sleep(0.2)
+
+    assert cpu.wall_time >= 0.2
+    assert cpu.cpu_utilisation < 0.5
+
+
+def test_pedantic_only_measures_memory_in_untimed_rounds(benchmark):
+    """Check tracemalloc is never running during timed rounds, and memory is only recorded for the extra memory
+    rounds"""
+    is_tracing = []
+
+    pedantic(
+        benchmark,
+        lambda: is_tracing.append(tracemalloc.is_tracing()),
+        rounds=3,
+        warmup_rounds=1,
+        memory_rounds=2,
+    )
+
+    # if benchmarks are disabled, there is only one timed round
+    n_timed_rounds = 4 if benchmark.enabled else 1
+    assert is_tracing == [False] * n_timed_rounds + [True] * 2
+    assert len(benchmark.extra_info["cpu_time"]) == (3 if benchmark.enabled else 1)
+    assert len(benchmark.extra_info["peak_rss"]) == 2
+    assert len(benchmark.extra_info["tracemalloc_peak"]) == 2
+
+
+def test_pedantic_cpu_time_excludes_memory_sampling(benchmark):
+    """Check the RSS sampling thread (which uses CPU time of its own) isn't running while CPU time is measured"""
+    active_threads = []
+
+    def target():
+        active_threads.append(threading.active_count())
+        time.sleep(0.05)
+
+    pedantic(benchmark, target, rounds=2, warmup_rounds=0, memory_rounds=1)
+
+    n_timed_rounds = len(benchmark.extra_info["cpu_time"])
+    assert active_threads[:n_timed_rounds] == [active_threads[0]] * n_timed_rounds
+    # the memory round runs with one more thread: the RSS sampler
+    assert active_threads[-1] == active_threads[0] + 1
+    assert all(
+        utilisation < 0.5 for utilisation in benchmark.extra_info["cpu_utilisation"]
+    )
+
+
+@pytest.mark.parametrize(
+    "dof,expected_quantile", [(2, 4.303), (4, 2.776), (10, 2.228), (100, 1.984)]
+)
+def test_get_t_quantile(dof, expected_quantile):
+    assert get_t_quantile(dof) == pytest.approx(expected_quantile, rel=0.04)
+
+
+def test_get_precision():
+    # mean 10, standard deviation 2
+    durations = [8, 10, 12]
+    assert get_precision(durations) == pytest.approx(
+        get_t_quantile(2) * 2 / math.sqrt(3) / 10
+    )
+    assert get_precision([1.0]) is None
+
+
+@pytest.mark.parametrize(
+    "relative_stdev,time_budget,expected_rounds",
+    [
+        # precise rounds only need the minimum number of rounds
+        (0, 100, MIN_ADAPTIVE_ROUNDS),
+        # noisy rounds need (t * relative stdev / target precision) ** 2 rounds
+        (0.1, 100, 23),
+        # ... unless the time budget runs out first (10 rounds of 1s already took 10s)
+        (0.1, 25, 15),
+        (0.1, 5, MIN_ADAPTIVE_ROUNDS),
+    ],
+)
+def test_adaptive_rounds(relative_stdev, time_budget, expected_rounds):
+    pilot_durations = [1 - relative_stdev, 1 + relative_stdev] * 5
+    adaptive_rounds = AdaptiveRounds(target_precision=0.05, time_budget=time_budget)
+    rounds = adaptive_rounds.get_rounds(pilot_durations, round_time=1, elapsed=10)
+
+    assert rounds == expected_rounds
+
+
+def test_pedantic_adaptive_rounds(benchmark):
+    """Check rounds are chosen from pilot rounds, and the target / achieved precision are recorded"""
+    durations = itertools.cycle([0.01, 0.02])
+    calls = []
+
+    def target():
+        calls.append(1)
+        time.sleep(next(durations))
+
+    pedantic(
+        benchmark,
+        target,
+        rounds=4,
+        warmup_rounds=1,
+        adaptive_rounds=AdaptiveRounds(target_precision=0.2, time_budget=60),
+    )
+
+    if not benchmark.enabled:
+        return
+
+    n_timed_rounds = len(benchmark.extra_info["cpu_time"])
+    # 1 warmup round and 4 pilot rounds, followed by enough timed rounds to measure the mean to +-20%
+    assert len(calls) == 5 + n_timed_rounds
+    assert n_timed_rounds > 4
+    assert benchmark.extra_info["pilot_rounds"] == 4
+    assert benchmark.extra_info["target_precision"] == 0.2
+    assert benchmark.extra_info["precision"] < 0.3
@@ -0,0 +1,75 @@
+import pytest
+
+from tests.conftest import _parse_shard, _select_shard
+from zarr_benchmarks.parallel_runner import (
+    _check_pytest_args,
+    merge_results,
+    split_cpus,
+)
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+
+@pytest.mark.parametrize(
+    "cpus,n_workers,expected_cpu_sets",
+    [
+        ([0, 1, 2, 3], 2, [[0, 1], [2, 3]]),
+        ([0, 1, 2, 3, 4], 2, [[0, 1, 2], [3, 4]]),
+        ([2, 3, 5], 3, [[2], [3], [5]]),
+        ([0, 1, 2, 3], 1, [[0, 1, 2, 3]]),
+    ],
+)
+def test_split_cpus(cpus, n_workers, expected_cpu_sets):
+    assert split_cpus(cpus, n_workers) == expected_cpu_sets
+
+
+@pytest.mark.parametrize("n_workers", [0, 5])
+def test_split_cpus_invalid_workers(n_workers):
+    with pytest.raises(ValueError, match="Number of workers"):
+        split_cpus([0, 1, 2, 3], n_workers)
+
+
+def test_merge_results():
+    worker_results = [
+        {
+            "machine_info": {"node": "a"},
+            "benchmarks": [{"fullname": "test_b"}, {"fullname": "test_d"}],
+        },
+        {"machine_info": {"node": "a"}, "benchmarks": [{"fullname": "test_a"}]},
+        {"machine_info": {"node": "a"}, "benchmarks": []},
+    ]
+
+    merged_results = merge_results(worker_results)
+
+    assert merged_results["machine_info"] == {"node": "a"}
+    assert [benchmark["fullname"] for benchmark in merged_results["benchmarks"]] == [
+        "test_a",
+        "test_b",
+        "test_d",
+    ]
+
+
+@pytest.mark.parametrize(
+    "pytest_args",
+    [["--benchmark-save=tensorstore"], ["--benchmark-json", "results.json"]],
+)
+def test_check_pytest_args(pytest_args):
+    with pytest.raises(ValueError, match="saved after merging"):
+        _check_pytest_args(pytest_args)
+
+    # saving per-round data is still allowed
+    _check_pytest_args(["--benchmark-save-data"])
+
+
+def test_select_shard():
+    items = list(range(10))
+    shards = [_select_shard(items, (index, 3)) for index in range(3)]
+
+    assert shards == [[0, 3, 6, 9], [1, 4, 7], [2, 5, 8]]
+
+
+@pytest.mark.parametrize("shard", ["3/3", "-1/3"])
+def test_parse_invalid_shard(shard):
+    with pytest.raises(ValueError, match="Shard index"):
+        _parse_shard(shard)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from zarr_benchmarks.parallel_write import (
+    SharedImage,
+    get_chunk_aligned_slabs,
+    write_regions_in_parallel,
+)
+from zarr_benchmarks.read_write_zarr import get_backend
+
+pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
+
+
+@pytest.mark.parametrize("n_slabs", [1, 2, 3, 10])
+def test_chunk_aligned_slabs(n_slabs):
+    """Check slabs are disjoint, cover the whole image and start on chunk boundaries"""
+    shape = (100, 20, 30)
+    slabs = get_chunk_aligned_slabs(shape, (16, 16, 16), n_slabs)
+
+    # 100 / 16 -> 7 chunks along the first axis
+    assert len(slabs) == min(n_slabs, 7)
+
+    covered = np.zeros(shape, dtype=int)
+    for slab in slabs:
+        assert slab[0].start % 16 == 0
+        covered[slab] += 1
+    assert (covered == 1).all()
+
+
+@pytest.mark.parametrize("memmap", [False, True])
+def test_write_regions_in_parallel(tmp_path, memmap, backend, read_write_zarr):
+    """Check writing slabs from multiple processes gives the same array as a single write. Memory-mapped images are
+    mapped by each worker, rather than copied into shared memory."""
+    if not get_backend(backend).parallel_writes:
+        pytest.skip(f"Parallel writes are not supported by {backend}")
+
+    image = np.arange(32 * 8 * 8, dtype=np.uint16).reshape((32, 8, 8))
+    if memmap:
+        np.save(tmp_path / "image.npy", image)
+        image = np.load(tmp_path / "image.npy", mmap_mode="r")
+    store_path = tmp_path / "image.zarr"
+
+    read_write_zarr.create_zarr_array(
+        store_path,
+        shape=image.shape,
+        dtype=image.dtype,
+        overwrite=True,
+        chunks=(4, 4, 4),
+        compressor=None,
+        zarr_spec=2,
+    )
+    regions = get_chunk_aligned_slabs(image.shape, (4, 4, 4), 3)
+
+    with SharedImage(image) as shared_image:
+        assert (shared_image.shared_memory is None) == memmap
+        with shared_image.create_executor(processes=2) as executor:
+            write_regions_in_parallel(
+                executor, backend, store_path, regions, zarr_spec=2
+            )
+
+    np.testing.assert_array_equal(
+        read_write_zarr.read_zarr_array(store_path, zarr_spec=2), image
+    )
@@ -0,0 +1,84 @@
+import time
+
+import numpy as np
+import pytest
+
+from zarr_benchmarks.phase_timing import PHASES, PhaseTimer
+from zarr_benchmarks.read_write_zarr import get_backend
+
+pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
+
+
+def test_time_remainder_excludes_nested_phases():
+    phase_timer = PhaseTimer()
+
+    with phase_timer.time_remainder("other"):
+        with phase_timer.time("io"):
+            time.sleep(0.1)
+
+    assert phase_timer.durations["io"] >= 0.1
+    assert phase_timer.durations["other"] < 0.05
+
+
+@pytest.mark.parametrize("zarr_format", [2, 3])
+def test_read_write_phases(tmp_path, zarr_format, backend, read_write_zarr):
+    """Check reads / writes with a phase_timer give the original image, and record time for each phase. io and codec
+    can only be timed separately for zarr-python and the numcodecs baseline."""
+    if zarr_format not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_format} is not supported by {backend}")
+
+    image = np.random.rand(64, 64, 64)
+    store_path = tmp_path / "image.zarr"
+    phase_timer = PhaseTimer()
+
+    read_write_zarr.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(32, 32, 32),
+        compressor=read_write_zarr.get_zstd_compressor(3, zarr_spec=zarr_format),
+        zarr_spec=zarr_format,
+        phase_timer=phase_timer,
+    )
+    write_durations = phase_timer.durations
+
+    phase_timer.reset()
+    read_image = read_write_zarr.read_zarr_array(
+        store_path, zarr_spec=zarr_format, phase_timer=phase_timer
+    )
+    read_durations = phase_timer.durations
+
+    np.testing.assert_array_equal(read_image, image)
+    for durations in [write_durations, read_durations]:
+        assert tuple(durations) == PHASES
+        assert durations["open"] > 0
+        if backend not in ["tensorstore", "h5py"]:
+            assert durations["io"] > 0
+            assert durations["codec"] > 0
+
+
+def test_phases_add_up_to_wall_time_with_concurrency(
+    tmp_path, backend, read_write_zarr
+):
+    """Check phases don't overlap when a backend is asked to read chunks concurrently: as chunks are then processed
+    one at a time, the phases should add up to (at most) the wall time, leaving time for the 'other' phase."""
+    image = np.random.rand(64, 64, 64)
+    store_path = tmp_path / "image.zarr"
+    read_write_zarr.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(16, 16, 16),
+        compressor=read_write_zarr.get_zstd_compressor(3, zarr_spec=2),
+        zarr_spec=2,
+    )
+
+    phase_timer = PhaseTimer()
+    start = time.perf_counter()
+    read_write_zarr.read_zarr_array(
+        store_path, zarr_spec=2, concurrency=8, phase_timer=phase_timer
+    )
+    wall_time = time.perf_counter() - start
+
+    assert sum(phase_timer.durations.values()) <= wall_time
+    assert phase_timer.durations["other"] > 0
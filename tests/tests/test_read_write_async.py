@@ -0,0 +1,72 @@
+import asyncio
+from importlib.util import find_spec
+
+import numpy as np
+import pytest
+
+from zarr_benchmarks.utils import is_zarr_python_v2
+
+if find_spec("zarr") is None or is_zarr_python_v2():
+    pytest.skip("The async API requires zarr-python v3", allow_module_level=True)
+
+from zarr_benchmarks.read_write_zarr import (  # noqa: E402
+    read_write_zarr_python_v3,
+    read_write_zarr_python_v3_async,
+)
+
+pytestmark = [pytest.mark.zarr_python]
+
+
+@pytest.mark.parametrize("shards", [None, (4, 4, 4)])
+@pytest.mark.parametrize("zarr_format", [2, 3])
+def test_async_round_trip(tmp_path, shards, zarr_format):
+    """Check arrays written with the async API match the sync API, and read back the original image"""
+    if shards is not None and zarr_format == 2:
+        pytest.skip("Sharding is not supported by zarr spec v2")
+
+    image = np.arange(10 * 9 * 8, dtype=np.uint16).reshape((10, 9, 8))
+    store_path = tmp_path / "image.zarr"
+
+    read_write_zarr_python_v3_async.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(2, 2, 2),
+        compressor=None,
+        shards=shards,
+        zarr_spec=zarr_format,
+        in_flight=3,
+    )
+
+    np.testing.assert_array_equal(
+        read_write_zarr_python_v3.read_zarr_array(store_path), image
+    )
+    np.testing.assert_array_equal(
+        read_write_zarr_python_v3_async.read_zarr_array(store_path, in_flight=3), image
+    )
+
+
+def test_gather_limited_creates_coroutines_lazily():
+    """Check at most in_flight coroutines exist at once (i.e. they aren't all created up front), and all are run"""
+    n_created = 0
+    n_finished = 0
+    max_outstanding = 0
+
+    async def request():
+        nonlocal n_finished
+        await asyncio.sleep(0.001)
+        n_finished += 1
+
+    def requests():
+        nonlocal n_created, max_outstanding
+        for _ in range(50):
+            n_created += 1
+            max_outstanding = max(max_outstanding, n_created - n_finished)
+            yield request()
+
+    asyncio.run(
+        read_write_zarr_python_v3_async._gather_limited(requests(), in_flight=4)
+    )
+
+    assert n_finished == 50
+    assert max_outstanding == 4
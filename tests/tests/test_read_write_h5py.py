@@ -0,0 +1,82 @@
+from importlib.util import find_spec
+
+import numpy as np
+import pytest
+
+if find_spec("h5py") is None or find_spec("hdf5plugin") is None:
+    pytest.skip("Requires h5py and hdf5plugin", allow_module_level=True)
+
+from zarr_benchmarks.read_write_zarr import read_write_h5py  # noqa: E402
+
+# h5py is installed alongside zarr-python in the h5py tox env
+pytestmark = [pytest.mark.zarr_python]
+
+
+@pytest.mark.parametrize(
+    "get_compressor, expected_config",
+    [
+        (
+            lambda: read_write_h5py.get_blosc_compressor("lz4", 5, "bitshuffle"),
+            {"id": "blosc", "cname": "lz4", "clevel": 5, "shuffle": 2},
+        ),
+        (
+            lambda: read_write_h5py.get_gzip_compressor(3),
+            {"id": "gzip", "level": 3},
+        ),
+        (
+            lambda: read_write_h5py.get_zstd_compressor(7),
+            {"id": "zstd", "level": 7},
+        ),
+        (lambda: None, None),
+    ],
+)
+def test_zarr_v2_metadata(tmp_path, get_compressor, expected_config):
+    """Check HDF5 dataset settings are described in the same form as Zarr v2 metadata"""
+    image = np.ones((20, 15, 10), dtype=np.uint16)
+    store_path = tmp_path / "image.zarr"
+
+    # chunks are larger than the image along the last axis, which is allowed by Zarr
+    read_write_h5py.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(16, 16, 16),
+        compressor=get_compressor(),
+        zarr_spec=2,
+    )
+
+    assert read_write_h5py.get_zarr_v2_metadata(store_path) == {
+        "zarr_format": 2,
+        "shape": [20, 15, 10],
+        "chunks": [16, 16, 16],
+        "dtype": "<u2",
+        "compressor": expected_config,
+    }
+
+
+def test_read_write_region(tmp_path):
+    image = np.random.randint(0, 1000, size=(20, 15, 10), dtype=np.uint16)
+    store_path = tmp_path / "image.zarr"
+    read_write_h5py.create_zarr_array(
+        store_path,
+        shape=image.shape,
+        dtype=image.dtype,
+        overwrite=True,
+        chunks=(8, 8, 8),
+        compressor=read_write_h5py.get_zstd_compressor(3),
+        zarr_spec=2,
+    )
+
+    region = (slice(3, 17), slice(0, 15), slice(5, 9))
+    read_write_h5py.write_zarr_region(image[region], store_path, region)
+
+    expected_image = np.zeros_like(image)
+    expected_image[region] = image[region]
+    np.testing.assert_array_equal(
+        read_write_h5py.read_zarr_array(store_path), expected_image
+    )
+
+    dataset = read_write_h5py.open_zarr_array(store_path)
+    np.testing.assert_array_equal(
+        read_write_h5py.read_zarr_region(dataset, region), image[region]
+    )
@@ -0,0 +1,83 @@
+from importlib.util import find_spec
+
+import numpy as np
+import pytest
+
+if find_spec("numcodecs") is None:
+    pytest.skip("Requires numcodecs", allow_module_level=True)
+
+from zarr_benchmarks.read_write_zarr import read_write_numcodecs  # noqa: E402
+
+# numcodecs is installed alongside zarr-python, so run these in the zarr-python environments
+pytestmark = [pytest.mark.zarr_python]
+
+
+@pytest.fixture
+def image() -> np.ndarray:
+    # shape isn't a multiple of the chunk size, so edge chunks are partially filled
+    return np.random.randint(0, 1000, size=(20, 15, 10), dtype=np.uint16)
+
+
+@pytest.mark.parametrize("n_threads", [None, 4])
+def test_read_write_round_trip(tmp_path, image, n_threads):
+    store_path = tmp_path / "image.zarr"
+    read_write_numcodecs.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(8, 8, 8),
+        compressor=read_write_numcodecs.get_zstd_compressor(3),
+        zarr_spec=2,
+        concurrency=n_threads,
+    )
+
+    # one file per chunk, plus the .zarray metadata
+    assert len(list(store_path.iterdir())) == 3 * 2 * 2 + 1
+
+    read_image = read_write_numcodecs.read_zarr_array(store_path, concurrency=n_threads)
+    np.testing.assert_array_equal(read_image, image)
+
+
+def test_read_write_region(tmp_path, image):
+    """Check regions that don't line up with chunk boundaries are read / written correctly"""
+    store_path = tmp_path / "image.zarr"
+    read_write_numcodecs.create_zarr_array(
+        store_path,
+        shape=image.shape,
+        dtype=image.dtype,
+        overwrite=True,
+        chunks=(8, 8, 8),
+        compressor=None,
+        zarr_spec=2,
+    )
+
+    region = (slice(3, 17), slice(0, 15), slice(5, 9))
+    read_write_numcodecs.write_zarr_region(image[region], store_path, region)
+
+    expected_image = np.zeros_like(image)
+    expected_image[region] = image[region]
+    zarr_array = read_write_numcodecs.open_zarr_array(store_path)
+    full_region = tuple(slice(0, dim_size) for dim_size in image.shape)
+    np.testing.assert_array_equal(
+        read_write_numcodecs.read_zarr_region(zarr_array, full_region), expected_image
+    )
+    np.testing.assert_array_equal(
+        read_write_numcodecs.read_zarr_region(zarr_array, region), image[region]
+    )
+
+
+def test_readable_by_zarr_python(tmp_path, image):
+    """Check arrays written by the baseline are valid Zarr spec v2 arrays"""
+    zarr = pytest.importorskip("zarr")
+
+    store_path = tmp_path / "image.zarr"
+    read_write_numcodecs.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(8, 8, 8),
+        compressor=read_write_numcodecs.get_blosc_compressor("lz4", 5, "bitshuffle"),
+        zarr_spec=2,
+    )
+
+    np.testing.assert_array_equal(zarr.open_array(store_path, mode="r")[:], image)
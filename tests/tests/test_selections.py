@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from zarr_benchmarks.selections import (
+    get_n_chunks_touched,
+    get_random_planes,
+    get_random_regions,
+    get_region_nbytes,
+    get_write_slabs,
+)
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+SHAPE = (200, 256, 300)
+CHUNKS = (64, 64, 64)
+
+
+@pytest.mark.parametrize("alignment", ["aligned", "misaligned", "straddle"])
+def test_regions_inside_image(alignment):
+    """Check all regions have the requested size, and lie inside the image"""
+    regions = get_random_regions(SHAPE, CHUNKS, 32, alignment, n_regions=20)
+
+    assert len(regions) == 20
+    for region in regions:
+        for s, dim_size in zip(region, SHAPE):
+            assert s.stop - s.start == 32
+            assert 0 <= s.start and s.stop <= dim_size
+
+
+def test_aligned_regions():
+    regions = get_random_regions(SHAPE, CHUNKS, 32, "aligned", n_regions=20)
+
+    for region in regions:
+        assert all(s.start % 64 == 0 for s in region)
+        assert get_n_chunks_touched(region, CHUNKS) == 1
+
+
+def test_misaligned_regions():
+    regions = get_random_regions(SHAPE, CHUNKS, 32, "misaligned", n_regions=20)
+
+    for region in regions:
+        assert all(s.start % 64 != 0 for s in region)
+
+
+def test_straddling_regions():
+    regions = get_random_regions(SHAPE, CHUNKS, 32, "straddle", n_regions=20)
+
+    for region in regions:
+        assert get_n_chunks_touched(region, CHUNKS) == 8
+
+
+def test_regions_are_reproducible():
+    assert get_random_regions(
+        SHAPE, CHUNKS, 32, "misaligned", n_regions=5
+    ) == get_random_regions(SHAPE, CHUNKS, 32, "misaligned", n_regions=5)
+
+
+def test_region_clipped_to_image():
+    (region,) = get_random_regions(SHAPE, CHUNKS, 256, "aligned", n_regions=1)
+
+    assert region == (slice(0, 200), slice(0, 256), region[2])
+    assert get_region_nbytes(region, itemsize=2) == 200 * 256 * 256 * 2
+
+
+@pytest.mark.parametrize(
+    "plane,expected_shape",
+    [("xy", (1, 256, 300)), ("xz", (200, 1, 300)), ("yz", (200, 256, 1))],
+)
+def test_planes(plane, expected_shape):
+    """Check planes cover the full image, apart from the axis normal to the plane"""
+    regions = get_random_planes(SHAPE, plane, 1, n_regions=10)
+
+    for region in regions:
+        assert tuple(s.stop - s.start for s in region) == expected_shape
+
+
+def test_plane_chunks_touched():
+    """A single yz plane reads a full column of chunks along z and y"""
+    (region,) = get_random_planes(SHAPE, "yz", 1, n_regions=1)
+
+    assert get_n_chunks_touched(region, CHUNKS) == 4 * 4
+
+
+def test_write_slabs_in_memory():
+    """Check images in memory are written in one go"""
+    image = np.zeros(SHAPE, dtype=np.uint8)
+    assert get_write_slabs(image, CHUNKS, max_slab_bytes=1) == [
+        (slice(0, 200), slice(0, 256), slice(0, 300))
+    ]
+
+
+def test_write_slabs_memmap(tmp_path):
+    """Check memory-mapped images are split into chunk-aligned slabs, that cover the image and are no larger than
+    max_slab_bytes"""
+    image = np.lib.format.open_memmap(
+        tmp_path / "image.npy", mode="w+", dtype=np.uint16, shape=SHAPE
+    )
+    max_slab_bytes = 2 * 64 * 256 * 300 * 2
+    slabs = get_write_slabs(image, CHUNKS, max_slab_bytes=max_slab_bytes)
+
+    # slabs two chunks thick: 200 / 128 -> 2 slabs
+    assert [slab[0] for slab in slabs] == [slice(0, 128), slice(128, 200)]
+    for slab in slabs:
+        assert slab[1:] == (slice(0, 256), slice(0, 300))
+        assert get_region_nbytes(slab, image.itemsize) <= max_slab_bytes
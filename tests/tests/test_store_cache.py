@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pytest
+
+from zarr_benchmarks import store_cache
+from zarr_benchmarks.store_cache import StoreCache, get_cache_key, hash_image
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+
+def _store_writer(nbytes: int, calls: list):
+    """Function to write a store with a single chunk file of nbytes, that records each path it writes to in calls"""
+
+    def write_store(store_path):
+        calls.append(store_path)
+        store_path.mkdir(parents=True)
+        (store_path / "0").write_bytes(b"x" * nbytes)
+
+    return write_store
+
+
+def _set_last_used(cache: StoreCache, params: dict, last_used: float) -> None:
+    entry_path = cache.cache_dir / f"{get_cache_key(params)}.json"
+    os.utime(entry_path, (last_used, last_used))
+
+
+def test_hash_image(monkeypatch):
+    # hash in several slabs, to check they're combined
+    monkeypatch.setattr(store_cache, "HASH_SLAB_NBYTES", 1000)
+    image = np.arange(16 * 16 * 16, dtype=np.uint16).reshape(16, 16, 16)
+
+    assert hash_image(image) == hash_image(image.copy())
+    assert hash_image(image) != hash_image(image.astype(np.uint32))
+    assert hash_image(image) != hash_image(image.reshape(8, 32, 16))
+
+    changed_image = image.copy()
+    changed_image[-1, -1, -1] += 1
+    assert hash_image(image) != hash_image(changed_image)
+
+
+def test_get_cache_key():
+    assert get_cache_key({"a": 1, "chunks": (32, 32, 32)}) == get_cache_key(
+        {"chunks": [32, 32, 32], "a": 1}
+    )
+    assert get_cache_key({"a": 1}) != get_cache_key({"a": 2})
+
+
+def test_get_store_reuses_stores(tmp_path):
+    cache = StoreCache(tmp_path / "cache", max_nbytes=1000)
+    calls = []
+    write_store = _store_writer(10, calls)
+
+    store_path = cache.get_store({"a": 1}, write_store)
+    assert (store_path / "0").exists()
+    assert cache.get_store({"a": 1}, write_store) == store_path
+    assert len(calls) == 1
+
+    # different params write a different store
+    assert cache.get_store({"a": 2}, write_store) != store_path
+    assert len(calls) == 2
+    assert cache.get_nbytes() == 20
+
+    # stores are reused by other caches in the same directory (e.g. in later runs)
+    other_cache = StoreCache(tmp_path / "cache", max_nbytes=1000)
+    assert other_cache.get_store({"a": 1}, write_store) == store_path
+    assert len(calls) == 2
+
+    # no temporary directories are left behind
+    assert sorted(path.name for path in (tmp_path / "cache").iterdir()) == sorted(
+        [get_cache_key({"a": 1}), get_cache_key({"a": 2})]
+        + [f"{get_cache_key({'a': 1})}.json", f"{get_cache_key({'a': 2})}.json"]
+    )
+
+
+def test_get_store_evicts_least_recently_used(tmp_path):
+    cache = StoreCache(tmp_path / "cache", max_nbytes=25)
+    calls = []
+    write_store = _store_writer(10, calls)
+
+    cache.get_store({"a": 1}, write_store)
+    cache.get_store({"a": 2}, write_store)
+    _set_last_used(cache, {"a": 1}, 1000)
+    _set_last_used(cache, {"a": 2}, 2000)
+    # using a store marks it as recently used
+    cache.get_store({"a": 1}, write_store)
+
+    # a third store makes the cache too large, so the least recently used store is removed
+    cache.get_store({"a": 3}, write_store)
+    assert cache.get_nbytes() == 20
+    assert not (tmp_path / "cache" / get_cache_key({"a": 2})).exists()
+
+    cache.get_store({"a": 1}, write_store)
+    cache.get_store({"a": 2}, write_store)
+    assert len(calls) == 4
+
+
+def test_get_store_keeps_stores_larger_than_cache(tmp_path):
+    cache = StoreCache(tmp_path / "cache", max_nbytes=5)
+    store_path = cache.get_store({"a": 1}, _store_writer(10, []))
+
+    assert store_path.exists()
+    assert cache.get_nbytes() == 10
+
+
+def test_get_store_failed_write(tmp_path):
+    cache = StoreCache(tmp_path / "cache", max_nbytes=1000)
+
+    def write_store(store_path):
+        store_path.mkdir(parents=True)
+        raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        cache.get_store({"a": 1}, write_store)
+
+    assert list((tmp_path / "cache").iterdir()) == []
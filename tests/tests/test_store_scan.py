@@ -0,0 +1,84 @@
+import pytest
+
+from zarr_benchmarks import store_scan
+from zarr_benchmarks.store_scan import get_n_chunks, scan_array_store, scan_store
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    """A nested store (like zarr spec v3's c/0/0/0 chunk keys), with metadata, chunk files of various sizes and an
+    empty chunk file"""
+    store_path = tmp_path / "store.zarr"
+    (store_path / "c" / "0").mkdir(parents=True)
+    (store_path / "c" / "1").mkdir(parents=True)
+    (store_path / "zarr.json").write_text("{}")
+
+    for i, nbytes in enumerate([1, 3, 100, 5000]):
+        (store_path / "c" / "0" / str(i)).write_bytes(b"x" * nbytes)
+    (store_path / "c" / "1" / "0").write_bytes(b"")
+
+    return store_path
+
+
+@pytest.mark.parametrize("stat_batch_size", [1, 512])
+def test_scan_store(store_path, stat_batch_size, monkeypatch):
+    monkeypatch.setattr(store_scan, "STAT_BATCH_SIZE", stat_batch_size)
+    scan = scan_store(store_path, n_chunks=8)
+
+    assert scan.nbytes_stored == 2 + 1 + 3 + 100 + 5000
+    assert sorted(scan.chunk_nbytes) == [0, 1, 3, 100, 5000]
+    assert scan.n_empty_chunks == 1
+    assert scan.n_missing_chunks == 3
+
+
+def test_chunk_nbytes_histogram(store_path):
+    histogram = scan_store(store_path).get_chunk_nbytes_histogram()
+
+    assert histogram["bin_edges"][:4] == [0, 1, 2, 4]
+    assert histogram["bin_edges"][-1] > 5000
+    assert sum(histogram["counts"]) == 5
+    # [0, 1) holds the empty chunk, [1, 2) the 1 byte chunk and [2, 4) the 3 byte chunk
+    assert histogram["counts"][:3] == [1, 1, 1]
+
+
+def test_extra_info(store_path):
+    extra_info = scan_store(store_path).to_extra_info()
+
+    assert extra_info["n_chunk_files"] == 5
+    assert extra_info["n_missing_chunks"] is None
+    assert extra_info["chunk_nbytes_quantiles"][0] == 0
+    assert extra_info["chunk_nbytes_quantiles"][-1] == 5000
+
+
+def test_scan_store_not_a_directory(tmp_path):
+    with pytest.raises(ValueError, match="not a directory"):
+        scan_store(tmp_path / "missing.zarr")
+
+
+def test_get_n_chunks():
+    assert get_n_chunks((128, 128, 128), (64, 64, 64)) == 8
+    assert get_n_chunks((100, 128, 1), (32, 128, 128)) == 4
+
+
+@pytest.mark.parametrize(
+    "chunks,shards,zarr_store,expected_n_missing_chunks",
+    [
+        ((64, 64, 64), None, True, 3),
+        ((32, 32, 32), (64, 64, 64), True, 3),
+        ((32, 32, 32), None, True, 59),
+        ((64, 64, 64), None, False, None),
+    ],
+)
+def test_scan_array_store(
+    store_path, chunks, shards, zarr_store, expected_n_missing_chunks
+):
+    """Missing chunks are counted on the chunk grid, or the shard grid for sharded arrays - and only for Zarr
+    stores"""
+    scan = scan_array_store(
+        store_path, (128, 128, 128), chunks, shards, zarr_store=zarr_store
+    )
+
+    assert scan.n_missing_chunks == expected_n_missing_chunks
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from zarr_benchmarks import synthetic_images
+from zarr_benchmarks.synthetic_images import IMAGE_KINDS, generate_image, save_image
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+SHAPE = (40, 50, 60)
+
+
+@pytest.mark.parametrize("kind", IMAGE_KINDS)
+def test_same_seed_gives_same_image(kind):
+    image = generate_image(kind, SHAPE, seed=1, object_size=8)
+    np.testing.assert_array_equal(
+        image, generate_image(kind, SHAPE, seed=1, object_size=8)
+    )
+    assert not np.array_equal(image, generate_image(kind, SHAPE, seed=2, object_size=8))
+
+
+@pytest.mark.parametrize("kind", IMAGE_KINDS)
+@pytest.mark.parametrize("image_dtype", ["uint8", "uint16", "uint64", "float32"])
+def test_shape_and_dtype(kind, image_dtype):
+    image = generate_image(kind, SHAPE, image_dtype, object_size=16)
+
+    assert image.shape == SHAPE
+    assert image.dtype == image_dtype
+    assert image.min() != image.max()
+
+
+@pytest.mark.parametrize("kind", IMAGE_KINDS)
+def test_independent_of_generation_chunks(kind, monkeypatch):
+    """Check images are the same, no matter what size of blocks they're generated in"""
+    image = generate_image(kind, SHAPE, object_size=8)
+
+    monkeypatch.setattr(synthetic_images, "GENERATION_CHUNKS", (7, 16, 33))
+    np.testing.assert_array_equal(image, generate_image(kind, SHAPE, object_size=8))
+
+
+@pytest.mark.parametrize("sparsity", [0, 0.5, 0.9])
+def test_label_sparsity(sparsity):
+    """Check roughly the requested fraction of objects are background"""
+    labels = generate_image("labels", (64, 64, 64), object_size=4, sparsity=sparsity)
+
+    assert (labels == 0).mean() == pytest.approx(sparsity, abs=0.05)
+
+
+def test_too_many_labels_for_dtype():
+    with pytest.raises(ValueError, match="can't hold"):
+        generate_image("labels", (64, 64, 64), "uint8", object_size=2)
+
+
+def test_save_image(tmp_path):
+    image_path = tmp_path / "image.npy"
+    save_image(image_path, "microscopy", SHAPE, seed=3)
+
+    np.testing.assert_array_equal(
+        np.load(image_path), generate_image("microscopy", SHAPE, seed=3)
+    )
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from zarr_benchmarks.utils import cast_image, is_valid_shard_size
+
+# mark as tensorstore, so tests in this file are only run once and not for every tox environment
+pytestmark = [pytest.mark.tensorstore]
+
+
+@pytest.mark.parametrize(
+    "cast_dtype", ["uint8", "uint16", "uint32", "uint64", "float32", "float64"]
+)
+def test_cast_float_image(cast_dtype):
+    """Check float images cast to integer dtypes are rescaled to use the dtype's full range"""
+    image = np.random.default_rng(0).random((16, 16, 16))
+    cast = cast_image(image, cast_dtype)
+
+    assert cast.dtype == cast_dtype
+    if np.issubdtype(cast.dtype, np.integer):
+        assert cast.min() == 0
+        assert cast.max() >= np.iinfo(cast_dtype).max // 2
+    else:
+        np.testing.assert_allclose(cast, image, rtol=1e-6)
+
+
+def test_cast_labels_unchanged():
+    """Check integer images whose values fit in the new dtype keep their values"""
+    labels = np.arange(1000, dtype=np.uint16).reshape(10, 10, 10)
+
+    np.testing.assert_array_equal(cast_image(labels, np.uint64), labels)
+    assert cast_image(labels, np.uint16) is labels
+
+
+@pytest.mark.parametrize(
+    "chunks, shard, expected",
+    [
+        (64, None, True),
+        (64, 128, True),
+        (96, 128, False),
+        ((32, 128, 128), 128, True),
+        ((1, 96, 96), 128, False),
+    ],
+)
+def test_is_valid_shard_size(chunks, shard, expected):
+    assert is_valid_shard_size(shard, chunks) == expected
@@ -4,18 +4,25 @@ from importlib.util import find_spec
 import numpy as np
 import pytest
 
-from zarr_benchmarks.read_write_zarr import read_write_zarr
-from zarr_benchmarks.utils import is_zarr_python_v2
+from zarr_benchmarks import selections
+from zarr_benchmarks.read_write_zarr import (
+    get_available_backends,
+    get_backend,
+    get_default_backend,
+    register_backend,
+)
+from zarr_benchmarks.read_write_zarr import read_write_zarr as default_read_write_zarr
+from zarr_benchmarks.utils import read_json_file
 
 pytestmark = [pytest.mark.tensorstore, pytest.mark.zarr_python]
 
 
-@pytest.mark.parametrize("write_empty_chunks", [True, False])
-def test_write_empty_chunks_spec_3(tmp_path, write_empty_chunks):
+@pytest.mark.parametrize("write_empty", [True, False])
+def test_write_empty_chunks_spec_3(tmp_path, write_empty, backend, read_write_zarr):
     """Check an empty chunk is written to file when write_empty_chunks=True (zarr spec v3)"""
 
-    if is_zarr_python_v2():
-        pytest.skip("Zarr spec v3 is not supported by zarr-python v2")
+    if 3 not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v3 is not supported by {backend}")
 
     image = np.zeros(shape=(1, 1, 1))
     store_path = tmp_path / "image.zarr"
@@ -27,17 +34,20 @@ def test_write_empty_chunks_spec_3(tmp_path, write_empty_chunks):
         chunks=(1, 1, 1),
         compressor=None,
         zarr_spec=3,
-        write_empty_chunks=write_empty_chunks,
+        write_empty_chunks=write_empty,
     )
 
     assert (store_path / "zarr.json").exists()
-    assert (store_path / "c" / "0" / "0" / "0").exists() == write_empty_chunks
+    assert (store_path / "c" / "0" / "0" / "0").exists() == write_empty
 
 
-@pytest.mark.parametrize("write_empty_chunks", [True, False])
-def test_write_empty_chunks_spec_2(tmp_path, write_empty_chunks):
+@pytest.mark.parametrize("write_empty", [True, False])
+def test_write_empty_chunks_spec_2(tmp_path, write_empty, backend, read_write_zarr):
     """Check an empty chunk is written to file when write_empty_chunks=True (zarr spec v2)"""
 
+    if not get_backend(backend).zarr_store:
+        pytest.skip(f"{backend} doesn't write a Zarr store")
+
     image = np.zeros(shape=(1, 1, 1))
     store_path = tmp_path / "image.zarr"
 
@@ -48,39 +58,108 @@ def test_write_empty_chunks_spec_2(tmp_path, write_empty_chunks):
         chunks=(1, 1, 1),
         compressor=None,
         zarr_spec=2,
-        write_empty_chunks=write_empty_chunks,
+        write_empty_chunks=write_empty,
     )
 
     assert (store_path / ".zarray").exists()
-    assert (store_path / "0.0.0").exists() == write_empty_chunks
+    assert (store_path / "0.0.0").exists() == write_empty
+
+
+def test_write_sharded_array(tmp_path, backend, read_write_zarr):
+    """Check a sharded array (zarr spec v3) is written as one file per shard, and reads back the original image"""
+
+    if 3 not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Sharding is not supported by {backend}")
+
+    image = np.arange(4 * 4 * 4, dtype=np.uint16).reshape((4, 4, 4))
+    store_path = tmp_path / "image.zarr"
+
+    read_write_zarr.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(1, 1, 1),
+        compressor=None,
+        shards=(2, 2, 2),
+        zarr_spec=3,
+    )
+
+    zarr_metadata = read_json_file(store_path / "zarr.json")
+    assert zarr_metadata["codecs"][0]["name"] == "sharding_indexed"
+
+    shard_files = [path for path in (store_path / "c").rglob("*") if path.is_file()]
+    assert len(shard_files) == 8
+
+    read_image = read_write_zarr.read_zarr_array(store_path, zarr_spec=3)
+    np.testing.assert_array_equal(read_image, image)
+
+
+def test_write_sharded_array_spec_2(tmp_path, backend, read_write_zarr):
+    """Check sharding is rejected for zarr spec v2"""
 
+    image = np.zeros(shape=(2, 2, 2))
 
-def test_read_write_zarr_import():
-    """Check that the correct package is imported as read_write_zarr for each tox environment"""
+    with pytest.raises(ValueError):
+        read_write_zarr.write_zarr_array(
+            image,
+            tmp_path / "image.zarr",
+            overwrite=True,
+            chunks=(1, 1, 1),
+            compressor=None,
+            shards=(2, 2, 2),
+            zarr_spec=2,
+        )
+
+
+@pytest.mark.parametrize("zarr_format", [2, 3])
+def test_write_memmap_in_slabs(
+    tmp_path, monkeypatch, zarr_format, backend, read_write_zarr
+):
+    """Check a memory-mapped image (which is written slab by slab, rather than in one go) reads back the original
+    image"""
+
+    if zarr_format not in get_backend(backend).zarr_specs:
+        pytest.skip(f"Zarr spec v{zarr_format} is not supported by {backend}")
+
+    # slabs of 2 chunks along the first axis
+    monkeypatch.setattr(selections, "DEFAULT_MAX_SLAB_BYTES", 2 * 2 * 8 * 8 * 2)
+    image = np.lib.format.open_memmap(
+        tmp_path / "image.npy", mode="w+", dtype=np.uint16, shape=(10, 8, 8)
+    )
+    image[:] = np.arange(10 * 8 * 8, dtype=np.uint16).reshape((10, 8, 8))
+    store_path = tmp_path / "image.zarr"
+
+    read_write_zarr.write_zarr_array(
+        image,
+        store_path,
+        overwrite=True,
+        chunks=(2, 4, 4),
+        compressor=None,
+        zarr_spec=zarr_format,
+    )
+
+    read_image = read_write_zarr.read_zarr_array(store_path, zarr_spec=zarr_format)
+    np.testing.assert_array_equal(read_image, image)
 
+
+def test_available_backends():
+    """Check every installed library is available as a backend, and the default backend matches the read_write_zarr
+    alias"""
+
+    available_backends = [backend.name for backend in get_available_backends()]
     tensorstore_installed = find_spec("tensorstore") is not None
     zarr_python_installed = find_spec("zarr") is not None
 
-    # one (and only one) of tensorstore / zarr python should be installed in each env
-    assert tensorstore_installed != zarr_python_installed
+    assert ("tensorstore" in available_backends) == tensorstore_installed
+    if zarr_python_installed:
+        zarr_major_version = version("zarr").split(".")[0]
+        assert f"zarr_python_{zarr_major_version}" in available_backends
 
+    assert default_read_write_zarr is get_default_backend().load()
     if tensorstore_installed:
-        assert (
-            read_write_zarr.__name__
-            == "zarr_benchmarks.read_write_zarr.read_write_tensorstore"
-        )
-        return
+        assert get_default_backend().name == "tensorstore"
 
-    if version("zarr").split(".")[0] == "2":
-        assert (
-            read_write_zarr.__name__
-            == "zarr_benchmarks.read_write_zarr.read_write_zarr_python_v2"
-        )
-        return
 
-    if version("zarr").split(".")[0] == "3":
-        assert (
-            read_write_zarr.__name__
-            == "zarr_benchmarks.read_write_zarr.read_write_zarr_python_v3"
-        )
-        return
+def test_register_backend_name_clash():
+    with pytest.raises(ValueError, match="already registered"):
+        register_backend(get_backend("zarr_python_3"))